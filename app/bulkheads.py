@@ -0,0 +1,199 @@
+# app/bulkheads.py
+
+import asyncio
+import math
+import os
+import threading
+import time
+from typing import Callable, Dict, Optional
+from fastapi import HTTPException, status
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from app.config.database import DATABASE_URL, ASYNC_DATABASE_URL, ASYNC_ROUTES, echo_sql, SessionLocal, AsyncSessionLocal, shard_router
+from app.config.pool import pool_options
+
+# Workload classes routes are assigned to with Depends(workload(...))
+READS = "reads"
+WRITES = "writes"
+ADMIN = "admin"
+AUTH = "auth"
+STREAMS = "streams"
+
+# Give each workload class its own concurrency limit and connection pool. Off by default: the limits
+# below turn reads away with 503 well before the threadpool is busy, size them to the deployment first
+BULKHEADS_ENABLED = os.getenv("BULKHEADS_ENABLED", "false").lower() == "true"
+
+# (concurrent requests, seconds a request may queue) per class. Each can be overridden with
+# BULKHEAD_<CLASS>_CONCURRENCY / _QUEUE_SECONDS / _QUEUE_SIZE. The sync classes add up to 36,
+# below AnyIO's 40 threadpool threads, so sync routes of one class cannot take every thread.
+# Event streams run on the event loop and hold no connection, their limit only caps open streams.
+BULKHEAD_DEFAULTS = {
+    READS: (16, 0.5),
+    WRITES: (12, 2.0),
+    ADMIN: (4, 2.0),
+    AUTH: (4, 1.0),
+    STREAMS: (500, 1.0),
+}
+
+def _setting(workload: str, setting: str, default):
+    value = os.getenv(f"BULKHEAD_{workload.upper()}_{setting}")
+    return type(default)(value) if value is not None else default
+
+class Bulkhead:
+    """
+    Concurrency limit and connection pool of one workload class.
+
+    At most `limit` requests of the class run at once. Up to `queue_size`
+    more wait for a slot, each for at most `queue_seconds`; beyond either
+    bound the request fails straight away with 503 and Retry-After instead
+    of piling up. The class also gets its own engines on the primary, sized
+    to the limit with no overflow, so a burst in one class can exhaust
+    neither the threadpool nor the connections the others need.
+    """
+
+    def __init__(self, name: str, limit: int, queue_seconds: float, queue_size: int):
+        self.name = name
+        self.limit = limit
+        self.queue_seconds = queue_seconds
+        self.queue_size = queue_size
+        self._lock = threading.Lock()
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._loop = None
+        self._in_flight = 0
+        self._waiting = 0
+        self._admitted = 0
+        self._rejected = 0
+        self._timeouts = 0
+        self._peak_in_flight = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+
+        self.engine = None
+        self.shard_engines = {}
+        self.sessions = SessionLocal
+        self.async_engine = None
+        self.async_sessions = AsyncSessionLocal
+        options = pool_options(DATABASE_URL)
+        # In-memory SQLite is a single connection, separate pools would each see an empty database
+        if options:
+            sizing = {"pool_size": limit, "max_overflow": 0}
+            self.engine = create_engine(DATABASE_URL, echo=echo_sql, **{**options, **sizing})
+            self.sessions = sessionmaker(autocommit=False, autoflush=False, bind=self.engine)
+            if shard_router:
+                self.shard_engines = shard_router.create_engines(**sizing)
+                self.sessions = shard_router.sessionmaker(self.engine, self.shard_engines)
+            if ASYNC_ROUTES:
+                self.async_engine = create_async_engine(ASYNC_DATABASE_URL, echo=echo_sql,
+                                                        **{**pool_options(ASYNC_DATABASE_URL, is_async=True), **sizing})
+                self.async_sessions = async_sessionmaker(bind=self.async_engine, autoflush=False, expire_on_commit=False)
+
+    async def acquire(self):
+        """Take a slot, queueing for at most queue_seconds; raises 503 when the class is saturated"""
+        semaphore = self._get_semaphore()
+        if self._waiting >= self.queue_size and semaphore.locked():
+            self._reject()
+        started = time.perf_counter()
+        self._waiting += 1
+        try:
+            await asyncio.wait_for(semaphore.acquire(), timeout=self.queue_seconds)
+        except asyncio.TimeoutError:
+            with self._lock:
+                self._timeouts += 1
+            raise self._busy()
+        finally:
+            self._waiting -= 1
+        waited = time.perf_counter() - started
+        with self._lock:
+            self._in_flight += 1
+            self._admitted += 1
+            self._peak_in_flight = max(self._peak_in_flight, self._in_flight)
+            self._wait_total += waited
+            self._wait_max = max(self._wait_max, waited)
+
+    def release(self):
+        loop = self._loop
+        if loop is not None and _running_loop() is not loop:
+            # Called from a threadpool thread, e.g. where a streamed body ends; the semaphore belongs to the loop
+            try:
+                loop.call_soon_threadsafe(self.release)
+            except RuntimeError:
+                # The loop is closed, and its semaphore with it
+                pass
+            return
+        with self._lock:
+            self._in_flight -= 1
+        self._semaphore.release()
+
+    def release_once(self) -> Callable[[], None]:
+        """release() that only takes effect the first time it is called, for slots that several paths may release"""
+        released = threading.Event()
+
+        def release():
+            with self._lock:
+                if released.is_set():
+                    return
+                released.set()
+            self.release()
+        return release
+
+    def stats(self) -> dict:
+        with self._lock:
+            admitted = self._admitted
+            stats = {
+                "limit": self.limit,
+                "queue_size": self.queue_size,
+                "queue_seconds": self.queue_seconds,
+                "in_flight": self._in_flight,
+                "waiting": self._waiting,
+                "peak_in_flight": self._peak_in_flight,
+                "admitted": admitted,
+                "rejected": self._rejected,
+                "timeouts": self._timeouts,
+                "avg_wait_seconds": self._wait_total / admitted if admitted else 0.0,
+                "max_wait_seconds": self._wait_max,
+            }
+        for key, db_engine in (("pool", self.engine), ("async_pool", self.async_engine)):
+            if db_engine is not None and hasattr(db_engine.pool, "stats"):
+                stats[key] = db_engine.pool.stats()
+        if self.shard_engines:
+            stats["shard_pools"] = {shard_id: db_engine.pool.stats() for shard_id, db_engine in self.shard_engines.items()
+                                    if hasattr(db_engine.pool, "stats")}
+        return stats
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        # One per event loop; a server has a single loop, test clients may start new ones
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._semaphore = asyncio.Semaphore(self.limit)
+        return self._semaphore
+
+    def _reject(self):
+        with self._lock:
+            self._rejected += 1
+        raise self._busy()
+
+    def _busy(self) -> HTTPException:
+        return HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=f"Too many {self.name} requests in progress, please retry",
+            headers={"Retry-After": str(max(math.ceil(self.queue_seconds), 1))}
+        )
+
+def _running_loop() -> Optional[asyncio.AbstractEventLoop]:
+    try:
+        return asyncio.get_running_loop()
+    except RuntimeError:
+        return None
+
+def create_bulkheads() -> Dict[str, Bulkhead]:
+    bulkheads = {}
+    for name, (limit, queue_seconds) in BULKHEAD_DEFAULTS.items():
+        limit = _setting(name, "CONCURRENCY", limit)
+        bulkheads[name] = Bulkhead(name, limit, _setting(name, "QUEUE_SECONDS", queue_seconds),
+                                   _setting(name, "QUEUE_SIZE", limit * 4))
+    return bulkheads
+
+# Per-worker bulkheads, empty when BULKHEADS_ENABLED is off
+bulkheads: Dict[str, Bulkhead] = create_bulkheads() if BULKHEADS_ENABLED else {}
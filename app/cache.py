@@ -0,0 +1,205 @@
+# app/cache.py
+
+import os
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, Generic, List, Optional, Type, TypeVar
+from pydantic import BaseModel
+from app.config.database import READ_DATABASE_URLS, READ_YOUR_WRITES_SECONDS
+from app.validators import UserResponse, OrderResponse
+
+ENTITY_CACHE_ENABLED = os.getenv("ENTITY_CACHE_ENABLED", "true").lower() == "true"
+# Bounds staleness of entries written by other workers, local writes invalidate immediately
+ENTITY_CACHE_TTL_SECONDS = float(os.getenv("ENTITY_CACHE_TTL_SECONDS", "30"))
+ENTITY_CACHE_MAX_ENTRIES = int(os.getenv("ENTITY_CACHE_MAX_ENTRIES", "10000"))
+
+ModelT = TypeVar("ModelT", bound=BaseModel)
+
+class CacheBackend(ABC):
+    """
+    Key/value store behind EntityCache.
+
+    Values are opaque bytes with a per-entry TTL, so a networked store such as
+    Redis (GET / SET EX / DEL) can implement this interface directly.
+    """
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[bytes]:
+        ...
+
+    @abstractmethod
+    def set(self, key: str, value: bytes, ttl: float):
+        ...
+
+    @abstractmethod
+    def delete(self, key: str):
+        ...
+
+    @abstractmethod
+    def stats(self) -> dict:
+        ...
+
+class MemoryCacheBackend(CacheBackend):
+    """In-process cache with per-entry TTL and least-recently-used eviction"""
+
+    def __init__(self, max_entries: int = ENTITY_CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, tuple[bytes, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._expirations = 0
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._misses += 1
+                return None
+            value, expires_at = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                self._expirations += 1
+                self._misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return value
+
+    def set(self, key: str, value: bytes, ttl: float):
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._evictions += 1
+
+    def delete(self, key: str):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self._hits,
+                "misses": self._misses,
+                "evictions": self._evictions,
+                "expirations": self._expirations,
+            }
+
+class EntityCache(Generic[ModelT]):
+    """
+    Read-through cache of response models keyed by entity id.
+
+    A load only populates the cache if no invalidation happened in the
+    namespace while it ran, so a read that raced with a local write can never
+    store the pre-write value. Loads served by a read replica are also not
+    stored for `replica_hold` seconds after an invalidation, since the replica
+    may not have applied the write yet. clear() moves the namespace to a new
+    key prefix, which drops every entry without enumerating the backend.
+    """
+
+    def __init__(self, namespace: str, model_type: Type[ModelT], backend: CacheBackend,
+                 ttl: float = ENTITY_CACHE_TTL_SECONDS, enabled: bool = ENTITY_CACHE_ENABLED,
+                 replica_hold: float = READ_YOUR_WRITES_SECONDS if READ_DATABASE_URLS else 0.0):
+        self.namespace = namespace
+        self.model_type = model_type
+        self.backend = backend
+        self.ttl = ttl
+        self.enabled = enabled
+        self.replica_hold = replica_hold
+        self._lock = threading.Lock()
+        self._generation = 0
+        self._write_sequence = 0
+        self._invalidated_at = float("-inf")
+
+    def get_or_load(self, entity_id: int, loader: Callable[[], ModelT], from_replica: bool = False) -> ModelT:
+        if not self.enabled:
+            return loader()
+        key = self._key(entity_id)
+        cached = self.backend.get(key)
+        if cached is not None:
+            return self.model_type.model_validate_json(cached)
+
+        sequence = self._write_sequence
+        model = loader()
+        with self._lock:
+            if self._may_store(sequence, from_replica):
+                self.backend.set(key, model.model_dump_json().encode(), self.ttl)
+        return model
+
+    async def get_or_load_async(self, entity_id: int, loader: Callable[[], Awaitable[ModelT]], from_replica: bool = False) -> ModelT:
+        """get_or_load() with a coroutine loader, for the async services"""
+        if not self.enabled:
+            return await loader()
+        key = self._key(entity_id)
+        cached = self.backend.get(key)
+        if cached is not None:
+            return self.model_type.model_validate_json(cached)
+
+        sequence = self._write_sequence
+        model = await loader()
+        with self._lock:
+            if self._may_store(sequence, from_replica):
+                self.backend.set(key, model.model_dump_json().encode(), self.ttl)
+        return model
+
+    def get_many_or_load(self, entity_ids: List[int], loader: Callable[[List[int]], Dict[int, ModelT]],
+                         from_replica: bool = False) -> Dict[int, ModelT]:
+        """Models for `entity_ids`, all cache misses loaded by one `loader` call; ids that do not exist are left out"""
+        if not self.enabled:
+            return loader(list(entity_ids))
+        found = {}
+        misses = []
+        for entity_id in entity_ids:
+            cached = self.backend.get(self._key(entity_id))
+            if cached is not None:
+                found[entity_id] = self.model_type.model_validate_json(cached)
+            else:
+                misses.append(entity_id)
+        if misses:
+            sequence = self._write_sequence
+            loaded = loader(misses)
+            with self._lock:
+                if self._may_store(sequence, from_replica):
+                    for entity_id, model in loaded.items():
+                        self.backend.set(self._key(entity_id), model.model_dump_json().encode(), self.ttl)
+            found.update(loaded)
+        return found
+
+    def peek(self, entity_id: int) -> Optional[ModelT]:
+        """The cached model of `entity_id`, None on a miss (nothing is loaded)"""
+        if not self.enabled:
+            return None
+        cached = self.backend.get(self._key(entity_id))
+        return self.model_type.model_validate_json(cached) if cached is not None else None
+
+    def invalidate(self, entity_id: int):
+        with self._lock:
+            self._write_sequence += 1
+            self._invalidated_at = time.monotonic()
+            self.backend.delete(self._key(entity_id))
+
+    def clear(self):
+        with self._lock:
+            self._write_sequence += 1
+            self._invalidated_at = time.monotonic()
+            self._generation += 1
+
+    def _may_store(self, sequence: int, from_replica: bool) -> bool:
+        """Whether a load that started at write `sequence` may populate the cache (caller holds the lock)"""
+        if sequence != self._write_sequence:
+            return False
+        return not (from_replica and time.monotonic() - self._invalidated_at < self.replica_hold)
+
+    def _key(self, entity_id: int) -> str:
+        return f"{self.namespace}:{self._generation}:{entity_id}"
+
+# Caches used by UserService.get_user and OrderService.get_order
+user_cache = EntityCache("user", UserResponse, MemoryCacheBackend())
+order_cache = EntityCache("order", OrderResponse, MemoryCacheBackend())
@@ -0,0 +1,127 @@
+# app/config/pool.py
+
+import os
+import threading
+import time
+from sqlalchemy import event
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+# Connections kept open per engine, per worker process
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+# Extra connections opened under load beyond DB_POOL_SIZE, closed again when returned
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+# Seconds a request waits for a free connection before failing
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+# Reconnect connections older than this, keep it below MySQL's wait_timeout (-1 disables)
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+# Test connections with a lightweight ping on checkout and reconnect stale ones
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() == "true"
+
+# Upper bounds (seconds) of the checkout wait histogram buckets
+WAIT_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0)
+
+class InstrumentedQueuePool(QueuePool):
+    """
+    QueuePool that records how it is used.
+
+    Checkout wait is timed around the pool's own queue get, so it measures
+    time spent waiting for a free connection rather than query time. Pool
+    events count connects, invalidations and the peak number of connections
+    checked out at once, which together show whether pool_size/max_overflow
+    fit the worker's concurrency.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._stats_lock = threading.Lock()
+        self._checkouts = 0
+        self._timeouts = 0
+        self._connects = 0
+        self._invalidations = 0
+        self._soft_invalidations = 0
+        self._peak_in_use = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+        self._wait_buckets = [0] * (len(WAIT_BUCKETS) + 1)
+        event.listen(self, "connect", self._on_connect)
+        event.listen(self, "checkout", self._on_checkout)
+        event.listen(self, "invalidate", self._on_invalidate)
+        event.listen(self, "soft_invalidate", self._on_soft_invalidate)
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except PoolTimeoutError:
+            with self._stats_lock:
+                self._timeouts += 1
+            raise
+        waited = time.perf_counter() - started
+        bucket = next((i for i, bound in enumerate(WAIT_BUCKETS) if waited <= bound), len(WAIT_BUCKETS))
+        with self._stats_lock:
+            self._checkouts += 1
+            self._wait_total += waited
+            self._wait_max = max(self._wait_max, waited)
+            self._wait_buckets[bucket] += 1
+        return connection
+
+    def _on_connect(self, dbapi_connection, connection_record):
+        with self._stats_lock:
+            self._connects += 1
+
+    def _on_checkout(self, dbapi_connection, connection_record, connection_proxy):
+        in_use = self.checkedout()
+        with self._stats_lock:
+            self._peak_in_use = max(self._peak_in_use, in_use)
+
+    def _on_invalidate(self, dbapi_connection, connection_record, exception):
+        with self._stats_lock:
+            self._invalidations += 1
+
+    def _on_soft_invalidate(self, dbapi_connection, connection_record, exception):
+        with self._stats_lock:
+            self._soft_invalidations += 1
+
+    def stats(self) -> dict:
+        """Pool configuration, current usage and counters since start"""
+        with self._stats_lock:
+            checkouts = self._checkouts
+            buckets = {f"le_{bound}": count for bound, count in zip(WAIT_BUCKETS, self._wait_buckets)}
+            buckets["le_inf"] = self._wait_buckets[-1]
+            return {
+                "pool_size": self.size(),
+                "max_overflow": self._max_overflow,
+                "timeout": self._timeout,
+                "recycle": self._recycle,
+                "pre_ping": self._pre_ping,
+                "in_use": self.checkedout(),
+                "idle": self.checkedin(),
+                "overflow": max(self.overflow(), 0),
+                "peak_in_use": self._peak_in_use,
+                "checkouts": checkouts,
+                "timeouts": self._timeouts,
+                "connects": self._connects,
+                "invalidations": self._invalidations,
+                "soft_invalidations": self._soft_invalidations,
+                "avg_wait_seconds": self._wait_total / checkouts if checkouts else 0.0,
+                "max_wait_seconds": self._wait_max,
+                "wait_buckets": buckets,
+            }
+
+class InstrumentedAsyncQueuePool(InstrumentedQueuePool, AsyncAdaptedQueuePool):
+    """InstrumentedQueuePool for engines made with create_async_engine()"""
+
+def pool_options(url: str, is_async: bool = False) -> dict:
+    """create_engine() (or create_async_engine() with is_async) pool arguments from the DB_POOL_* settings"""
+    if url.startswith("sqlite") and ":memory:" in url:
+        # In-memory SQLite lives inside a single connection, keep SQLAlchemy's default pool
+        return {}
+    return {
+        "poolclass": InstrumentedAsyncQueuePool if is_async else InstrumentedQueuePool,
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_recycle": DB_POOL_RECYCLE,
+        "pool_pre_ping": DB_POOL_PRE_PING,
+    }
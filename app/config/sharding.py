@@ -0,0 +1,326 @@
+# app/config/sharding.py
+
+import bisect
+import hashlib
+import heapq
+import math
+import os
+import threading
+import time
+from typing import Callable, Dict, Iterator, List, Optional, Set, Tuple
+from fastapi import HTTPException, status
+from sqlalchemy import column, create_engine, event, func, insert, inspect, select, table, update
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.horizontal_shard import ShardedSession
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.sql import operators
+from sqlalchemy.sql.elements import BinaryExpression, BindParameter, BooleanClauseList
+from sqlalchemy.sql.selectable import Subquery
+from sqlalchemy.sql.util import find_tables
+from app.config.pool import pool_options
+
+# Comma-separated URLs of the databases users and their orders are spread over, empty means no sharding.
+# Shards are named by position ("0", "1", ...), so new shards must only ever be appended.
+SHARD_DATABASE_URLS = [url.strip() for url in os.getenv("SHARD_DATABASE_URLS", "").split(",") if url.strip()]
+# Points each shard gets on the hash ring, more points spread users more evenly
+SHARD_VNODES = int(os.getenv("SHARD_VNODES", "64"))
+# How long a worker trusts its copy of the user_shards remap table
+SHARD_DIRECTORY_TTL_SECONDS = float(os.getenv("SHARD_DIRECTORY_TTL_SECONDS", "5"))
+# user_id / order_id values a worker reserves from id_blocks per round trip
+SHARD_ID_BLOCK_SIZE = int(os.getenv("SHARD_ID_BLOCK_SIZE", "100"))
+
+# Shard id of DATABASE_URL, which keeps every table that is not sharded (roles, permissions, idempotency keys...)
+GLOBAL_SHARD = "global"
+# Sharded tables and their primary keys; every row is placed by the user_id it carries
+SHARDED_TABLES = {"users": "user_id", "orders": "order_id", "user_order_stats": "user_id"}
+
+# The routing tables on the global database (models in app/database/models/user_shard.py and
+# id_block.py, which cannot be imported here because they need app.config.database)
+user_shards = table("user_shards", column("user_id"), column("shard"), column("moving"), column("updated_at"))
+id_blocks = table("id_blocks", column("name"), column("next_id"))
+
+def _hash(value: str) -> int:
+    return int.from_bytes(hashlib.md5(value.encode()).digest()[:8], "big")
+
+class HashRing:
+    """
+    Consistent hash ring over the shard names.
+
+    Each shard owns SHARD_VNODES points and a key belongs to the first point
+    at or after its hash, so appending a shard only takes over the keys that
+    fall just before its new points instead of reshuffling everyone.
+    """
+
+    def __init__(self, shards: List[str], vnodes: int = SHARD_VNODES):
+        points = sorted((_hash(f"{shard}#{vnode}"), shard) for shard in shards for vnode in range(vnodes))
+        self._points = [point for point, _ in points]
+        self._shards = [shard for _, shard in points]
+
+    def shard_for(self, key) -> str:
+        index = bisect.bisect_left(self._points, _hash(str(key))) % len(self._points)
+        return self._shards[index]
+
+class ShardDirectory:
+    """
+    This worker's copy of the user_shards remap table: users placed somewhere
+    other than their hash ring shard, and users whose rows are being moved.
+
+    The whole table is reloaded at most every SHARD_DIRECTORY_TTL_SECONDS, so
+    it is meant to hold the exceptions, not one row per user.
+    """
+
+    def __init__(self, engine: Engine, ttl_seconds: float = SHARD_DIRECTORY_TTL_SECONDS):
+        self.engine = engine
+        self.ttl_seconds = ttl_seconds
+        self._entries: Dict[int, Tuple[str, bool]] = {}
+        self._loaded_at: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def get(self, user_id: int) -> Optional[Tuple[str, bool]]:
+        """(shard, moving) for a remapped user, None for a user that lives on their ring shard"""
+        with self._lock:
+            if self._loaded_at is None or time.monotonic() - self._loaded_at >= self.ttl_seconds:
+                with self.engine.connect() as connection:
+                    rows = connection.execute(select(user_shards.c.user_id, user_shards.c.shard, user_shards.c.moving)).all()
+                self._entries = {row.user_id: (row.shard, bool(row.moving)) for row in rows}
+                self._loaded_at = time.monotonic()
+            return self._entries.get(user_id)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+class IdAllocator:
+    """
+    user_id / order_id values that are unique across all shards.
+
+    Shards cannot each use their own autoincrement without handing out the
+    same ids, so workers reserve blocks of SHARD_ID_BLOCK_SIZE ids from the
+    id_blocks table on the global database and assign them from memory. The
+    first block of a table starts after the highest id already stored.
+    """
+
+    def __init__(self, engine: Engine, first_free_id: Callable[[str], int], block_size: int = SHARD_ID_BLOCK_SIZE):
+        self.engine = engine
+        self.first_free_id = first_free_id
+        self.block_size = block_size
+        self._blocks: Dict[str, Tuple[int, int]] = {}
+        self._lock = threading.Lock()
+
+    def next_id(self, name: str) -> int:
+        with self._lock:
+            next_value, end = self._blocks.get(name, (0, 0))
+            if next_value >= end:
+                next_value = self._reserve(name)
+                end = next_value + self.block_size
+            self._blocks[name] = (next_value + 1, end)
+            return next_value
+
+    def _reserve(self, name: str) -> int:
+        """Start of a fresh block for `name`"""
+        while True:
+            with self.engine.begin() as connection:
+                bump = update(id_blocks).where(id_blocks.c.name == name).values(next_id=id_blocks.c.next_id + self.block_size)
+                if connection.execute(bump).rowcount:
+                    return connection.execute(select(id_blocks.c.next_id).where(id_blocks.c.name == name)).scalar_one() - self.block_size
+            start = self.first_free_id(name)
+            try:
+                with self.engine.begin() as connection:
+                    connection.execute(insert(id_blocks).values(name=name, next_id=start + self.block_size))
+                return start
+            except IntegrityError:
+                # Another worker created the row first, take a block after theirs
+                continue
+
+def _user_ids(statement, params: Optional[dict] = None) -> Optional[Set[int]]:
+    """
+    user_id values a statement is limited to by a `user_id = ?` or `user_id IN (...)`
+    term of its top-level AND (looking through one wrapping subquery, as in
+    counts), or None when it can touch any user. Bound values missing from the
+    statement itself, as in Session.get(), are looked up in `params`.
+    """
+    where = getattr(statement, "whereclause", None)
+    if where is not None:
+        terms = where.clauses if isinstance(where, BooleanClauseList) and where.operator is operators.and_ else [where]
+        for term in terms:
+            if not (isinstance(term, BinaryExpression) and isinstance(term.right, BindParameter)
+                    and getattr(term.left, "name", None) == "user_id"
+                    and getattr(getattr(term.left, "table", None), "name", None) in SHARDED_TABLES):
+                continue
+            value = (params or {}).get(term.right.key, term.right.effective_value)
+            if value is None:
+                continue
+            if term.operator is operators.eq:
+                return {value}
+            if term.operator is operators.in_op:
+                return set(value)
+    froms = statement.get_final_froms() if hasattr(statement, "get_final_froms") else []
+    if len(froms) == 1 and isinstance(froms[0], Subquery):
+        return _user_ids(froms[0].element, params)
+    return None
+
+class ShardRouter:
+    """
+    Places each user, together with their orders, on one of the shard databases.
+
+    A user's shard is their user_shards entry when they have one, otherwise
+    their point on a HashRing of the shard names. Sessions from sessionmaker()
+    are SQLAlchemy ShardedSessions that route by this map: a statement
+    restricted to known user_ids runs on their shards only, other statements
+    on users or orders run on every shard and their rows are concatenated
+    (callers that page or sort merge them, see app/services/pagination.py),
+    and everything else runs on the global database.
+
+    Writes for a user whose rows are being moved (see rebalance_shards.py)
+    are refused with 503 until the move is done; reads carry on.
+    """
+
+    def __init__(self, global_engine: Engine, urls: List[str], echo: bool = False):
+        self.global_engine = global_engine
+        self.urls = {str(index): url for index, url in enumerate(urls)}
+        self.echo = echo
+        self.ring = HashRing(list(self.urls))
+        self.directory = ShardDirectory(global_engine)
+        self.ids = IdAllocator(global_engine, self._first_free_id)
+        self.engines = self.create_engines()
+
+    def create_engines(self, **pool_overrides) -> Dict[str, Engine]:
+        """One engine per shard, pooled like the primary unless overridden"""
+        return {
+            shard_id: create_engine(url, echo=self.echo, **{**pool_options(url), **pool_overrides})
+            for shard_id, url in self.urls.items()
+        }
+
+    def sessionmaker(self, global_engine: Engine, shard_engines: Optional[Dict[str, Engine]] = None) -> sessionmaker:
+        """Session factory over the global engine and the shard engines (this router's own by default)"""
+        factory = sessionmaker(
+            class_=ShardedSession,
+            autocommit=False,
+            autoflush=False,
+            shards={GLOBAL_SHARD: global_engine, **(shard_engines or self.engines)},
+            shard_chooser=self._shard_chooser,
+            identity_chooser=self._identity_chooser,
+            execute_chooser=self._execute_chooser,
+            info={"shard_router": self},
+        )
+        event.listen(factory, "before_flush", self._before_flush)
+        return factory
+
+    def shard_for_user(self, user_id: int, writing: bool = False) -> str:
+        entry = self.directory.get(user_id)
+        if entry is None:
+            return self.ring.shard_for(user_id)
+        shard_id, moving = entry
+        if writing and moving:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="This user's data is being moved to another shard, please retry",
+                headers={"Retry-After": str(max(math.ceil(self.directory.ttl_seconds), 1))}
+            )
+        return shard_id
+
+    def statement_shards(self, statement, params: Optional[dict] = None) -> List[str]:
+        """Shards a statement has to run on: the global database, the shards of the users it is limited to, or all of them"""
+        if not {found.name for found in find_tables(statement, include_crud=True)} & SHARDED_TABLES.keys():
+            return [GLOBAL_SHARD]
+        user_ids = _user_ids(statement, params)
+        if user_ids is None:
+            return list(self.engines)
+        return sorted({self.shard_for_user(user_id) for user_id in user_ids})
+
+    def locate(self, db: Session, target_table, pk_value) -> Optional[str]:
+        """
+        Shard holding the row of `target_table` with primary key `pk_value`, for
+        a statement that writes to it; None when no shard has the row.
+        """
+        if target_table.name not in SHARDED_TABLES:
+            return GLOBAL_SHARD
+        user_id = pk_value
+        if SHARDED_TABLES[target_table.name] != "user_id":
+            pk_column = target_table.c[SHARDED_TABLES[target_table.name]]
+            user_id = db.execute(select(target_table.c.user_id).where(pk_column == pk_value)).scalars().first()
+            if user_id is None:
+                return None
+        return self.shard_for_user(user_id, writing=True)
+
+    def insert_rows(self, db: Session, target_table, rows: List[dict]):
+        """
+        Multi-row INSERT into a sharded table, one statement per shard. The rows
+        get their ids here, ORM bulk inserts cannot be routed per row.
+        """
+        key = SHARDED_TABLES[target_table.name]
+        by_shard: Dict[str, List[dict]] = {}
+        for row in rows:
+            shard_id = self.shard_for_user(row["user_id"], writing=True)
+            by_shard.setdefault(shard_id, []).append({**row, key: self.ids.next_id(target_table.name)})
+        for shard_id, shard_rows in by_shard.items():
+            db.execute(insert(target_table), shard_rows, bind_arguments={"shard_id": shard_id})
+
+    def merge_partitions(self, db: Session, stmt, key: Callable, batch_size: int) -> Iterator[List]:
+        """
+        Stream `stmt`, which must be ordered by `key`, from every shard it reaches
+        as one ordered sequence of row lists of up to `batch_size` rows. A row
+        present on two shards while its user is being moved is returned once.
+        """
+        results = [db.execute(stmt.execution_options(yield_per=batch_size), bind_arguments={"shard_id": shard_id})
+                   for shard_id in self.statement_shards(stmt)]
+        batch = []
+        last_key = None
+        for row in heapq.merge(*results, key=key):
+            if batch and key(row) == last_key:
+                continue
+            last_key = key(row)
+            batch.append(row)
+            if len(batch) == batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    def stats(self) -> dict:
+        return {
+            "shards": {shard_id: engine.url.render_as_string(hide_password=True) for shard_id, engine in self.engines.items()},
+            "vnodes": SHARD_VNODES,
+            "remapped_users": len(self.directory),
+        }
+
+    def _first_free_id(self, name: str) -> int:
+        pk = column(SHARDED_TABLES[name])
+        stmt = select(func.max(pk)).select_from(table(name, pk))
+        highest = 0
+        for db_engine in (self.global_engine, *self.engines.values()):
+            with db_engine.connect() as connection:
+                highest = max(highest, connection.execute(stmt).scalar() or 0)
+        return highest + 1
+
+    def _shard_chooser(self, mapper, instance, clause=None) -> str:
+        if mapper is not None and instance is not None and mapper.local_table.name in SHARDED_TABLES:
+            return self.shard_for_user(instance.user_id)
+        return GLOBAL_SHARD
+
+    def _identity_chooser(self, mapper, primary_key, *, lazy_loaded_from, execution_options, bind_arguments, **kw) -> List[str]:
+        name = mapper.local_table.name
+        if SHARDED_TABLES.get(name) == "user_id":
+            return [self.shard_for_user(primary_key[0])]
+        if name in SHARDED_TABLES:
+            return list(self.engines)
+        return [GLOBAL_SHARD]
+
+    def _execute_chooser(self, context) -> List[str]:
+        # A list of parameter sets (executemany) cannot be pinned to one user
+        params = context.parameters if isinstance(context.parameters, dict) else None
+        shards = self.statement_shards(context.statement, params)
+        if len(shards) > 1 and context.is_select and context.lazy_loaded_from is not None and context.lazy_loaded_from.identity_token:
+            # Lazy loads from a user (their orders) stay on that user's shard
+            return [context.lazy_loaded_from.identity_token]
+        return shards
+
+    def _before_flush(self, session, flush_context, instances):
+        """Give new users and orders their cluster-wide id, and refuse writes for users that are being moved"""
+        for obj in session.new:
+            name = inspect(obj).mapper.local_table.name
+            if name in SHARDED_TABLES and getattr(obj, SHARDED_TABLES[name]) is None:
+                setattr(obj, SHARDED_TABLES[name], self.ids.next_id(name))
+        for obj in (*session.new, *session.dirty, *session.deleted):
+            if inspect(obj).mapper.local_table.name in SHARDED_TABLES and obj.user_id is not None:
+                self.shard_for_user(obj.user_id, writing=True)
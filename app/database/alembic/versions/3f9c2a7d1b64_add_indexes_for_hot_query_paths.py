@@ -0,0 +1,52 @@
+"""Add indexes for hot query paths
+
+Revision ID: 3f9c2a7d1b64
+Revises: 7450045c19b9
+Create Date: 2026-10-18 09:12:41.305518
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f9c2a7d1b64'
+down_revision: Union[str, Sequence[str], None] = '7450045c19b9'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # orders: one index per service query shape, each ending in order_id so
+    # keyset pagination (ORDER BY order_id) is served without a sort
+    op.create_index('ix_orders_user_id_order_id', 'orders', ['user_id', 'order_id'], unique=False)
+    op.create_index('ix_orders_status_order_id', 'orders', ['status', 'order_id'], unique=False)
+    op.create_index('ix_orders_created_at_order_id', 'orders', ['created_at', 'order_id'], unique=False)
+
+    # authenticate_tokens: token lookups by user
+    op.create_index(op.f('ix_authenticate_tokens_user_id'), 'authenticate_tokens', ['user_id'], unique=False)
+
+    # role_permissions: the (role_id, permission_id) lookup in assign_permission_to_role,
+    # and a guarantee that a permission is assigned to a role at most once
+    op.create_unique_constraint('uq_role_permissions_role_id_permission_id', 'role_permissions', ['role_id', 'permission_id'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    is_mysql = op.get_bind().dialect.name == 'mysql'
+    if is_mysql:
+        # MySQL silently dropped its implicit foreign key indexes when the indexes
+        # above were created, so single-column ones must exist before removing them
+        op.create_index('ix_orders_user_id', 'orders', ['user_id'], unique=False)
+        op.create_index('ix_role_permissions_role_id', 'role_permissions', ['role_id'], unique=False)
+
+    op.drop_constraint('uq_role_permissions_role_id_permission_id', 'role_permissions', type_='unique')
+    if not is_mysql:
+        # On MySQL this index now backs the foreign key and has to stay
+        op.drop_index(op.f('ix_authenticate_tokens_user_id'), table_name='authenticate_tokens')
+    op.drop_index('ix_orders_created_at_order_id', table_name='orders')
+    op.drop_index('ix_orders_status_order_id', table_name='orders')
+    op.drop_index('ix_orders_user_id_order_id', table_name='orders')
@@ -0,0 +1,49 @@
+"""Add order rollups
+
+Revision ID: a7d2e4f91c53
+Revises: f3b9d6e2c418
+Create Date: 2026-10-18 18:40:27.051964
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a7d2e4f91c53'
+down_revision: Union[str, Sequence[str], None] = 'f3b9d6e2c418'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Both live on the global database when sharded; fill them from existing orders with rebuild_order_rollups.py
+    op.create_table('order_rollups',
+    sa.Column('granularity', sa.String(length=8), nullable=False),
+    sa.Column('bucket_start', sa.TIMESTAMP(), nullable=False),
+    sa.Column('status', sa.Enum('PENDING', 'IN_PROCESS', 'COMPLETED', 'CANCELLED', name='orderstatus'), nullable=False),
+    sa.Column('order_count', sa.Integer(), nullable=False),
+    sa.Column('total_amount', sa.Numeric(precision=16, scale=2), nullable=False),
+    sa.Column('updated_at', sa.TIMESTAMP(), server_default=sa.text('now()'), nullable=True),
+    sa.PrimaryKeyConstraint('granularity', 'bucket_start', 'status')
+    )
+    op.create_table('order_rollup_deltas',
+    sa.Column('delta_id', sa.Integer(), autoincrement=True, nullable=False),
+    sa.Column('bucket_start', sa.TIMESTAMP(), nullable=False),
+    sa.Column('status', sa.Enum('PENDING', 'IN_PROCESS', 'COMPLETED', 'CANCELLED', name='orderstatus'), nullable=False),
+    sa.Column('order_count', sa.Integer(), nullable=False),
+    sa.Column('total_amount', sa.Numeric(precision=16, scale=2), nullable=False),
+    sa.Column('created_at', sa.TIMESTAMP(), server_default=sa.text('now()'), nullable=True),
+    sa.PrimaryKeyConstraint('delta_id')
+    )
+    op.create_index('ix_order_rollup_deltas_bucket_start', 'order_rollup_deltas', ['bucket_start'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_order_rollup_deltas_bucket_start', table_name='order_rollup_deltas')
+    op.drop_table('order_rollup_deltas')
+    op.drop_table('order_rollups')
@@ -0,0 +1,34 @@
+"""Add order code workers
+
+Revision ID: c62e9f4a1d07
+Revises: a7d2e4f91c53
+Create Date: 2026-10-18 20:12:44.309518
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c62e9f4a1d07'
+down_revision: Union[str, Sequence[str], None] = 'a7d2e4f91c53'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Snowflake worker id leases, on the global database when sharded
+    op.create_table('order_code_workers',
+    sa.Column('worker_id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('holder', sa.String(length=255), nullable=False),
+    sa.Column('expires_at', sa.TIMESTAMP(), nullable=False),
+    sa.PrimaryKeyConstraint('worker_id')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('order_code_workers')
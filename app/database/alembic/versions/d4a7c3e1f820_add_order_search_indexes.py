@@ -0,0 +1,45 @@
+"""Add order search indexes
+
+Revision ID: d4a7c3e1f820
+Revises: b81e4d09c5a2
+Create Date: 2026-10-18 12:41:09.562371
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd4a7c3e1f820'
+down_revision: Union[str, Sequence[str], None] = 'b81e4d09c5a2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# One index per filter shape accepted by GET /orders/search (see SEARCH_INDEXES in
+# app/services/order_service.py); shapes already served by earlier indexes are not repeated
+SEARCH_INDEXES = [
+    ('ix_orders_order_date_order_id', ['order_date', 'order_id']),
+    ('ix_orders_total_amount_order_id', ['total_amount', 'order_id']),
+    ('ix_orders_user_id_created_at_order_id', ['user_id', 'created_at', 'order_id']),
+    ('ix_orders_user_id_order_date_order_id', ['user_id', 'order_date', 'order_id']),
+    ('ix_orders_user_id_total_amount_order_id', ['user_id', 'total_amount', 'order_id']),
+    ('ix_orders_status_created_at_order_id', ['status', 'created_at', 'order_id']),
+    ('ix_orders_status_order_date_order_id', ['status', 'order_date', 'order_id']),
+    ('ix_orders_status_total_amount_order_id', ['status', 'total_amount', 'order_id']),
+    ('ix_orders_user_id_status_order_id', ['user_id', 'status', 'order_id']),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for name, columns in SEARCH_INDEXES:
+        op.create_index(name, 'orders', columns, unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # ix_orders_user_id_order_id from the previous revision still backs the user_id foreign key on MySQL
+    for name, _ in reversed(SEARCH_INDEXES):
+        op.drop_index(name, table_name='orders')
@@ -0,0 +1,41 @@
+"""Add shard routing tables
+
+Revision ID: e5c81f2a9d37
+Revises: d4a7c3e1f820
+Create Date: 2026-10-18 14:22:51.306148
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e5c81f2a9d37'
+down_revision: Union[str, Sequence[str], None] = 'd4a7c3e1f820'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Both live on the global database (DATABASE_URL), see app/config/sharding.py
+    op.create_table('user_shards',
+    sa.Column('user_id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('shard', sa.String(length=32), nullable=False),
+    sa.Column('moving', sa.Boolean(), nullable=False),
+    sa.Column('updated_at', sa.TIMESTAMP(), server_default=sa.text('now()'), nullable=True),
+    sa.PrimaryKeyConstraint('user_id')
+    )
+    op.create_table('id_blocks',
+    sa.Column('name', sa.String(length=64), nullable=False),
+    sa.Column('next_id', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('name')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('id_blocks')
+    op.drop_table('user_shards')
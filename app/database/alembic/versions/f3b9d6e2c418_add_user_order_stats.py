@@ -0,0 +1,56 @@
+"""Add user order stats
+
+Revision ID: f3b9d6e2c418
+Revises: e5c81f2a9d37
+Create Date: 2026-10-18 16:05:12.418733
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f3b9d6e2c418'
+down_revision: Union[str, Sequence[str], None] = 'e5c81f2a9d37'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('user_order_stats',
+    sa.Column('user_id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('order_count', sa.Integer(), nullable=False),
+    sa.Column('total_spent', sa.Numeric(precision=14, scale=2), nullable=False),
+    sa.Column('last_order_date', sa.TIMESTAMP(), nullable=True),
+    sa.Column('pending_count', sa.Integer(), nullable=False),
+    sa.Column('in_process_count', sa.Integer(), nullable=False),
+    sa.Column('completed_count', sa.Integer(), nullable=False),
+    sa.Column('cancelled_count', sa.Integer(), nullable=False),
+    sa.Column('updated_at', sa.TIMESTAMP(), server_default=sa.text('now()'), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.user_id'], ),
+    sa.PrimaryKeyConstraint('user_id')
+    )
+    # Backfill every existing user; orders.status holds the enum names
+    op.execute("""
+        INSERT INTO user_order_stats (user_id, order_count, total_spent, last_order_date,
+                                      pending_count, in_process_count, completed_count, cancelled_count)
+        SELECT u.user_id,
+               COUNT(o.order_id),
+               COALESCE(SUM(CASE WHEN o.status <> 'CANCELLED' THEN o.total_amount ELSE 0 END), 0),
+               MAX(o.order_date),
+               COALESCE(SUM(CASE WHEN o.status = 'PENDING' THEN 1 ELSE 0 END), 0),
+               COALESCE(SUM(CASE WHEN o.status = 'IN_PROCESS' THEN 1 ELSE 0 END), 0),
+               COALESCE(SUM(CASE WHEN o.status = 'COMPLETED' THEN 1 ELSE 0 END), 0),
+               COALESCE(SUM(CASE WHEN o.status = 'CANCELLED' THEN 1 ELSE 0 END), 0)
+        FROM users u
+        LEFT JOIN orders o ON o.user_id = u.user_id
+        GROUP BY u.user_id
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('user_order_stats')
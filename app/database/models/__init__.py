@@ -7,6 +7,13 @@ from .role import Role
 from .permission import Permission
 from .role_permission import RolePermission
 from .authenticate_token import AuthenticateToken
+from .idempotency_key import IdempotencyKey
+from .user_shard import UserShard
+from .id_block import IdBlock
+from .user_order_stats import UserOrderStats
+from .order_rollup import OrderRollup
+from .order_rollup_delta import OrderRollupDelta
+from .order_code_worker import OrderCodeWorker
 
 __all__ = [
     "User",
@@ -15,4 +22,11 @@ __all__ = [
     "Permission",
     "RolePermission",
     "AuthenticateToken",
+    "IdempotencyKey",
+    "UserShard",
+    "IdBlock",
+    "UserOrderStats",
+    "OrderRollup",
+    "OrderRollupDelta",
+    "OrderCodeWorker",
 ]
@@ -15,7 +15,7 @@ class AuthenticateToken(Base):
     __tablename__ = "authenticate_tokens"
 
     token_id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(Integer, ForeignKey("users.user_id"), nullable=False)
+    user_id = Column(Integer, ForeignKey("users.user_id"), nullable=False, index=True)
     access_token = Column(Text, nullable=False)  # JWT access token
     access_token_expires_at = Column(TIMESTAMP, nullable=False)
     refresh_token = Column(Text, nullable=False)  # JWT refresh token
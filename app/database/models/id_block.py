@@ -0,0 +1,20 @@
+# app/database/models/id_block.py
+
+from sqlalchemy import Column, Integer, String
+from app.config.database import Base
+
+class IdBlock(Base):
+    """
+    Id Block Model
+
+    This model holds the next free id of each sharded table. Workers reserve
+    ids from it in blocks, so users and orders get ids that are unique across
+    all shards (see IdAllocator in app/config/sharding.py).
+    """
+    __tablename__ = "id_blocks"
+
+    name = Column(String(64), primary_key=True)  # Table name
+    next_id = Column(Integer, nullable=False)
+
+    def __repr__(self):
+        return f"<IdBlock(name='{self.name}', next_id={self.next_id})>"
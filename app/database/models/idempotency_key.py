@@ -0,0 +1,26 @@
+# app/database/models/idempotency_key.py
+
+from sqlalchemy import Column, Integer, String, Text, TIMESTAMP, func
+from app.config.database import Base
+
+class IdempotencyKey(Base):
+    """
+    Idempotency Key Model
+
+    This model stores the first response to a request sent with an
+    Idempotency-Key header, so retries of that request can be answered
+    without repeating it. A row without a status code is a claim held by a
+    request that is still running.
+    """
+    __tablename__ = "idempotency_keys"
+
+    key = Column(String(255), primary_key=True)  # Endpoint scope plus the client's key
+    request_hash = Column(String(64), nullable=False)  # SHA-256 of the request payload
+    status_code = Column(Integer, nullable=True)
+    response_body = Column(Text, nullable=True)
+    created_at = Column(TIMESTAMP, server_default=func.now())
+    locked_at = Column(TIMESTAMP, nullable=False)  # When the current claim was taken
+    expires_at = Column(TIMESTAMP, nullable=False, index=True)
+
+    def __repr__(self):
+        return f"<IdempotencyKey(key='{self.key}', status_code={self.status_code})>"
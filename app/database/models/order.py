@@ -1,6 +1,6 @@
 # app/database/models/order.py
 
-from sqlalchemy import Column, Integer, ForeignKey, TIMESTAMP, Numeric, String, func, Enum
+from sqlalchemy import Column, Integer, ForeignKey, TIMESTAMP, Numeric, String, func, Enum, Index
 from sqlalchemy.orm import relationship
 from app.config.database import Base
 from app.validators.order import OrderStatus
@@ -13,6 +13,25 @@ class Order(Base):
     Each order belongs to a user and has a status that tracks its progress.
     """
     __tablename__ = "orders"
+    __table_args__ = (
+        # Per-user listing and keyset paging: WHERE user_id = ? ORDER BY order_id
+        Index("ix_orders_user_id_order_id", "user_id", "order_id"),
+        # Status filtered scans and exports: WHERE status = ? ORDER BY order_id
+        Index("ix_orders_status_order_id", "status", "order_id"),
+        # created_at range filters
+        Index("ix_orders_created_at_order_id", "created_at", "order_id"),
+        # Order search (OrderService.search_orders, see SEARCH_INDEXES): one index per
+        # accepted (equality filters, sort/range column) shape, each ending in order_id
+        Index("ix_orders_order_date_order_id", "order_date", "order_id"),
+        Index("ix_orders_total_amount_order_id", "total_amount", "order_id"),
+        Index("ix_orders_user_id_created_at_order_id", "user_id", "created_at", "order_id"),
+        Index("ix_orders_user_id_order_date_order_id", "user_id", "order_date", "order_id"),
+        Index("ix_orders_user_id_total_amount_order_id", "user_id", "total_amount", "order_id"),
+        Index("ix_orders_status_created_at_order_id", "status", "created_at", "order_id"),
+        Index("ix_orders_status_order_date_order_id", "status", "order_date", "order_id"),
+        Index("ix_orders_status_total_amount_order_id", "status", "total_amount", "order_id"),
+        Index("ix_orders_user_id_status_order_id", "user_id", "status", "order_id"),
+    )
 
     order_id = Column(Integer, primary_key=True, index=True)
     order_code = Column(String(255), unique=True, nullable=False)  # External order identifier
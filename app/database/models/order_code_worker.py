@@ -0,0 +1,22 @@
+# app/database/models/order_code_worker.py
+
+from sqlalchemy import Column, Integer, String, TIMESTAMP
+from app.config.database import Base
+
+class OrderCodeWorker(Base):
+    """
+    Order Code Worker Model
+
+    This model holds the leases on Snowflake order code worker ids. Each
+    process claims a free or expired id when it generates its first code and
+    renews the lease while it runs, so no two live processes share an id
+    (see WorkerIdLease in app/order_codes.py).
+    """
+    __tablename__ = "order_code_workers"
+
+    worker_id = Column(Integer, primary_key=True, autoincrement=False)  # 0-1023
+    holder = Column(String(255), nullable=False)  # host:pid:nonce of the leasing process
+    expires_at = Column(TIMESTAMP, nullable=False)
+
+    def __repr__(self):
+        return f"<OrderCodeWorker(worker_id={self.worker_id}, holder='{self.holder}', expires_at={self.expires_at})>"
@@ -0,0 +1,26 @@
+# app/database/models/order_rollup.py
+
+from sqlalchemy import Column, Integer, String, TIMESTAMP, Numeric, Enum, func
+from app.config.database import Base
+from app.validators.order import OrderStatus
+
+class OrderRollup(Base):
+    """
+    Order Rollup Model
+
+    This model holds the number of orders and their summed total_amount per
+    status for each hour and each day, by order_date. Rows are only written
+    by the rollup compactor, which folds in order_rollup_deltas (see
+    OrderRollupService).
+    """
+    __tablename__ = "order_rollups"
+
+    granularity = Column(String(8), primary_key=True)  # RollupGranularity value
+    bucket_start = Column(TIMESTAMP, primary_key=True)  # Start of the hour or day
+    status = Column(Enum(OrderStatus), primary_key=True)
+    order_count = Column(Integer, nullable=False, default=0)
+    total_amount = Column(Numeric(16, 2), nullable=False, default=0)
+    updated_at = Column(TIMESTAMP, server_default=func.now(), onupdate=func.now())
+
+    def __repr__(self):
+        return f"<OrderRollup(granularity='{self.granularity}', bucket_start={self.bucket_start}, status='{self.status}', order_count={self.order_count})>"
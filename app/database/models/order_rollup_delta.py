@@ -0,0 +1,30 @@
+# app/database/models/order_rollup_delta.py
+
+from sqlalchemy import Column, Integer, TIMESTAMP, Numeric, Enum, Index, func
+from app.config.database import Base
+from app.validators.order import OrderStatus
+
+class OrderRollupDelta(Base):
+    """
+    Order Rollup Delta Model
+
+    This model is an append-only log of changes to the hourly order rollups.
+    Each order write inserts its net change here in its own transaction, so
+    concurrent writes never wait on a shared rollup row; the compactor later
+    folds the deltas into order_rollups and deletes them.
+    """
+    __tablename__ = "order_rollup_deltas"
+    __table_args__ = (
+        # Analytics reads add the deltas not yet compacted: WHERE bucket_start >= ? AND bucket_start < ?
+        Index("ix_order_rollup_deltas_bucket_start", "bucket_start"),
+    )
+
+    delta_id = Column(Integer, primary_key=True, autoincrement=True)
+    bucket_start = Column(TIMESTAMP, nullable=False)  # Hour of the order's order_date
+    status = Column(Enum(OrderStatus), nullable=False)
+    order_count = Column(Integer, nullable=False)  # Signed change
+    total_amount = Column(Numeric(16, 2), nullable=False)  # Signed change
+    created_at = Column(TIMESTAMP, server_default=func.now())
+
+    def __repr__(self):
+        return f"<OrderRollupDelta(delta_id={self.delta_id}, bucket_start={self.bucket_start}, status='{self.status}', order_count={self.order_count})>"
@@ -1,6 +1,6 @@
 # app/database/models/role_permission.py
 
-from sqlalchemy import Column, Integer, ForeignKey, TIMESTAMP, func
+from sqlalchemy import Column, Integer, ForeignKey, TIMESTAMP, func, UniqueConstraint
 from sqlalchemy.orm import relationship
 from app.config.database import Base
 
@@ -13,6 +13,10 @@ class RolePermission(Base):
     can be assigned to multiple roles.
     """
     __tablename__ = "role_permissions"
+    __table_args__ = (
+        # A permission can be assigned to a role only once; also serves lookups by role_id
+        UniqueConstraint("role_id", "permission_id", name="uq_role_permissions_role_id_permission_id"),
+    )
 
     role_permission_id = Column(Integer, primary_key=True, index=True)
     role_id = Column(Integer, ForeignKey("roles.role_id"), nullable=False)
@@ -0,0 +1,29 @@
+# app/database/models/user_order_stats.py
+
+from sqlalchemy import Column, Integer, ForeignKey, TIMESTAMP, Numeric, func
+from app.config.database import Base
+
+class UserOrderStats(Base):
+    """
+    User Order Stats Model
+
+    This model holds one summary row per user: how many orders they have,
+    their lifetime spend and last order date, and a count per order status.
+    The order write paths keep it up to date in the same transaction as the
+    order itself (see OrderStatsService).
+    """
+    __tablename__ = "user_order_stats"
+
+    user_id = Column(Integer, ForeignKey("users.user_id"), primary_key=True, autoincrement=False)
+    order_count = Column(Integer, nullable=False, default=0)
+    total_spent = Column(Numeric(14, 2), nullable=False, default=0)  # Sum of total_amount over orders that are not cancelled
+    last_order_date = Column(TIMESTAMP, nullable=True)
+    # One counter per OrderStatus, named <status>_count
+    pending_count = Column(Integer, nullable=False, default=0)
+    in_process_count = Column(Integer, nullable=False, default=0)
+    completed_count = Column(Integer, nullable=False, default=0)
+    cancelled_count = Column(Integer, nullable=False, default=0)
+    updated_at = Column(TIMESTAMP, server_default=func.now(), onupdate=func.now())
+
+    def __repr__(self):
+        return f"<UserOrderStats(user_id={self.user_id}, order_count={self.order_count}, total_spent={self.total_spent})>"
@@ -0,0 +1,22 @@
+# app/database/models/user_shard.py
+
+from sqlalchemy import Column, Integer, String, Boolean, TIMESTAMP, func
+from app.config.database import Base
+
+class UserShard(Base):
+    """
+    User Shard Model
+
+    This model is the remap table of the shard router (app/config/sharding.py).
+    It only has rows for users that do not live on their hash ring shard, or
+    whose rows are being moved between shards by rebalance_shards.py.
+    """
+    __tablename__ = "user_shards"
+
+    user_id = Column(Integer, primary_key=True, autoincrement=False)
+    shard = Column(String(32), nullable=False)  # Shard name, the position of its URL in SHARD_DATABASE_URLS
+    moving = Column(Boolean, nullable=False, default=False)  # Writes for the user are refused while set
+    updated_at = Column(TIMESTAMP, server_default=func.now(), onupdate=func.now())
+
+    def __repr__(self):
+        return f"<UserShard(user_id={self.user_id}, shard='{self.shard}', moving={self.moving})>"
@@ -0,0 +1,164 @@
+# app/dependencies.py
+
+import os
+import weakref
+from typing import List, Optional
+from fastapi import Depends, HTTPException, Query, Request, status
+from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from jose import JWTError
+from sqlalchemy.orm import Session
+from app.bulkheads import bulkheads, BULKHEADS_ENABLED
+from app.config.database import get_read_db
+from app.loaders import Loader
+from app.utils import verify_token
+from app.services import UserService, OrderService
+from app.services.authorization_service import permission_engine
+from app.validators import MAX_BATCH_IDS
+
+# RBAC is opt-in until every client authenticates with a bearer token
+RBAC_ENABLED = os.getenv("RBAC_ENABLED", "false").lower() == "true"
+
+bearer_scheme = HTTPBearer(auto_error=False)
+
+def check_permission(token: Optional[str], permission_key: str) -> Optional[dict]:
+    """
+    Return the claims of `token` if its role is granted `permission_key`.
+
+    The role is taken from the `role_id` claim of the bearer access token and
+    checked against the in-memory permission engine, so no database query is
+    made per request. Always passes while RBAC is disabled.
+    """
+    if not RBAC_ENABLED:
+        return None
+    if token is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Not authenticated",
+            headers={"WWW-Authenticate": "Bearer"}
+        )
+    try:
+        claims = verify_token(token)
+    except JWTError:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid token",
+            headers={"WWW-Authenticate": "Bearer"}
+        )
+    role_id = claims.get("role_id")
+    if not isinstance(role_id, int) or not permission_engine.has_permission(role_id, permission_key):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail=f"Missing permission: {permission_key}")
+    return claims
+
+def require_permission(permission_key: str):
+    """
+    Build a dependency that only lets the request through if the caller's role
+    is granted `permission_key` (see check_permission).
+    """
+    def dependency(credentials: Optional[HTTPAuthorizationCredentials] = Depends(bearer_scheme)) -> Optional[dict]:
+        return check_permission(credentials.credentials if credentials else None, permission_key)
+    return dependency
+
+def workload(name: str):
+    """
+    Build a dependency that runs the route in the bulkhead of workload class
+    `name` (see app/bulkheads.py): the request waits for one of the class's
+    slots or fails with 503, and get_db / get_read_db hand it sessions from the
+    class's own pool. List it first in `dependencies` so a saturated class is
+    turned away before any other work is done.
+    """
+    bulkhead = _bulkhead(name)
+
+    async def dependency(request: Request):
+        if bulkhead is None:
+            yield
+            return
+        await bulkhead.acquire()
+        request.state.sessions = bulkhead.sessions
+        request.state.async_sessions = bulkhead.async_sessions
+        try:
+            yield
+        finally:
+            bulkhead.release()
+    return dependency
+
+def streaming_workload(name: str):
+    """
+    workload() for routes returning a StreamingResponse. Their body runs after
+    the dependencies have exited, so the route hands the slot to the body by
+    wrapping it with held_body(), which releases it when the body ends. A
+    request that never gets that far releases it on the way out as usual.
+    """
+    bulkhead = _bulkhead(name)
+
+    async def dependency(request: Request):
+        if bulkhead is None:
+            yield
+            return
+        await bulkhead.acquire()
+        request.state.sessions = bulkhead.sessions
+        request.state.async_sessions = bulkhead.async_sessions
+        release = request.state.release_workload = bulkhead.release_once()
+        try:
+            yield
+        finally:
+            if request.state.release_workload is release:
+                # No body took the slot over, e.g. the parameters did not validate
+                release()
+    return dependency
+
+def held_body(request: Request, body):
+    """
+    Wrap the sync or async body of a streaming_workload() route so the slot is
+    released when the body finishes, fails or is closed. A body the server
+    never starts (the client left first) releases it once it is collected.
+    """
+    release = getattr(request.state, "release_workload", None)
+    if release is None:
+        return body
+    request.state.release_workload = None
+    if hasattr(body, "__aiter__"):
+        async def held():
+            try:
+                async for chunk in body:
+                    yield chunk
+            finally:
+                await body.aclose()
+                release()
+    else:
+        def held():
+            try:
+                yield from body
+            finally:
+                release()
+    wrapped = held()
+    weakref.finalize(wrapped, release)
+    return wrapped
+
+def _bulkhead(name: str):
+    if BULKHEADS_ENABLED and name not in bulkheads:
+        raise ValueError(f"Unknown workload class: {name}")
+    return bulkheads.get(name)
+
+def batch_ids(ids: str = Query(..., description=f"Comma-separated ids, at most {MAX_BATCH_IDS}")) -> List[int]:
+    """Parse the `ids` query parameter of the batch endpoints, dropping repeats but keeping order"""
+    try:
+        parsed = [int(value) for value in ids.split(",") if value.strip()]
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="ids must be a comma-separated list of integers")
+    unique = list(dict.fromkeys(parsed))
+    if not unique:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="ids must not be empty")
+    if len(unique) > MAX_BATCH_IDS:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"At most {MAX_BATCH_IDS} ids can be requested at once")
+    return unique
+
+class RequestLoaders:
+    """Entity loaders shared by everything handling one request"""
+
+    def __init__(self, db: Session):
+        self.users = Loader(lambda ids: UserService.get_users(db, ids))
+        self.orders = Loader(lambda ids: OrderService.get_orders(db, ids))
+
+def get_loaders(db: Session = Depends(get_read_db)) -> RequestLoaders:
+    """Per-request loaders reading through the entity caches, on a replica when one is configured"""
+    return RequestLoaders(db)
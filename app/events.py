@@ -0,0 +1,234 @@
+# app/events.py
+
+import asyncio
+import itertools
+import json
+import logging
+import os
+import threading
+from abc import ABC, abstractmethod
+from typing import Callable, Optional, Set
+from pydantic import BaseModel
+
+# Events buffered per subscriber before it is considered too slow and disconnected
+EVENTS_QUEUE_SIZE = int(os.getenv("EVENTS_QUEUE_SIZE", "100"))
+# Seconds between SSE comment lines that keep idle connections open through proxies
+EVENTS_KEEPALIVE_SECONDS = float(os.getenv("EVENTS_KEEPALIVE_SECONDS", "15"))
+# "local" delivers within this worker only, "redis" fans out across workers through Redis pub/sub
+EVENTS_TRANSPORT = os.getenv("EVENTS_TRANSPORT", "local")
+EVENTS_REDIS_URL = os.getenv("EVENTS_REDIS_URL", "redis://localhost:6379/0")
+EVENTS_REDIS_CHANNEL = os.getenv("EVENTS_REDIS_CHANNEL", "order_events")
+
+logger = logging.getLogger(__name__)
+
+class EventTransport(ABC):
+    """
+    Carries published events to every worker's hub.
+
+    An event is a dict with "type", "order_id", "user_id" and "data" (the
+    JSON payload sent to clients). start() is given the hub's deliver callback,
+    which must be called for each event received, from any thread.
+    """
+
+    @abstractmethod
+    def start(self, deliver: Callable[[dict], None]):
+        ...
+
+    @abstractmethod
+    def publish(self, event: dict):
+        ...
+
+    def close(self):
+        pass
+
+class LocalTransport(EventTransport):
+    """Delivers straight to this worker's hub"""
+
+    def __init__(self):
+        self._deliver: Optional[Callable[[dict], None]] = None
+
+    def start(self, deliver: Callable[[dict], None]):
+        self._deliver = deliver
+
+    def publish(self, event: dict):
+        if self._deliver is not None:
+            self._deliver(event)
+
+class RedisTransport(EventTransport):
+    """
+    Fans events out to all workers through a Redis pub/sub channel.
+
+    Needs the `redis` package. Each worker publishes to the channel and a
+    listener thread feeds everything on it, including its own events, to the
+    local hub.
+    """
+
+    def __init__(self, url: str = EVENTS_REDIS_URL, channel: str = EVENTS_REDIS_CHANNEL):
+        try:
+            import redis
+        except ImportError:
+            raise RuntimeError("EVENTS_TRANSPORT=redis needs the redis package (pip install redis)")
+
+        self.channel = channel
+        self._client = redis.Redis.from_url(url)
+        self._pubsub = None
+        self._thread = None
+
+    def start(self, deliver: Callable[[dict], None]):
+        def _handle(message):
+            try:
+                deliver(json.loads(message["data"]))
+            except Exception:
+                logger.exception("Dropping malformed event from %s", self.channel)
+
+        self._pubsub = self._client.pubsub(ignore_subscribe_messages=True)
+        self._pubsub.subscribe(**{self.channel: _handle})
+        self._thread = self._pubsub.run_in_thread(sleep_time=1.0, daemon=True)
+
+    def publish(self, event: dict):
+        self._client.publish(self.channel, json.dumps(event, separators=(",", ":")))
+
+    def close(self):
+        if self._thread is not None:
+            self._thread.stop()
+        if self._pubsub is not None:
+            self._pubsub.close()
+
+class Subscription:
+    """
+    One SSE or WebSocket client's bounded queue of events.
+
+    Lives on the event loop that created it. When the queue overflows the
+    subscriber is dropped: its backlog is discarded and get() returns None so
+    the endpoint can close the connection, rather than letting one slow
+    client buffer events without limit.
+    """
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, user_id: Optional[int], order_id: Optional[int], queue_size: int):
+        self.loop = loop
+        self.user_id = user_id
+        self.order_id = order_id
+        self.dropped = False
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+
+    def matches(self, event: dict) -> bool:
+        return ((self.user_id is None or event["user_id"] == self.user_id)
+                and (self.order_id is None or event["order_id"] == self.order_id))
+
+    def offer(self, message: str):
+        """Queue a message; runs on the subscription's loop"""
+        if self.dropped:
+            return
+        try:
+            self._queue.put_nowait(message)
+        except asyncio.QueueFull:
+            self.dropped = True
+            while not self._queue.empty():
+                self._queue.get_nowait()
+            self._queue.put_nowait(None)
+
+    async def get(self) -> Optional[str]:
+        """Next message, or None once the subscriber has been dropped"""
+        return await self._queue.get()
+
+class EventHub:
+    """
+    In-process pub/sub of order events for the streaming endpoints.
+
+    publish() is safe to call from the threadpool running sync routes; the
+    transport hands each event back to deliver(), which schedules it onto the
+    loop of every matching subscription.
+    """
+
+    def __init__(self, transport: EventTransport, queue_size: int = EVENTS_QUEUE_SIZE):
+        self.transport = transport
+        self.queue_size = queue_size
+        self._subscriptions: Set[Subscription] = set()
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self._published = 0
+        self._delivered = 0
+        self._dropped = 0
+        self._started = False
+
+    def publish(self, event_type: str, order: BaseModel):
+        """Announce a change to an order; `order` is its OrderResponse after the change"""
+        self._start()
+        with self._lock:
+            self._published += 1
+        try:
+            self.transport.publish({
+                "type": event_type,
+                "order_id": order.order_id,
+                "user_id": order.user_id,
+                "data": f'{{"type":"{event_type}","order":{order.model_dump_json()}}}',
+            })
+        except Exception:
+            # A streaming outage must never fail the write that triggered the event
+            logger.exception("Failed to publish %s for order %s", event_type, order.order_id)
+
+    def deliver(self, event: dict):
+        """Queue an event for every matching local subscriber"""
+        with self._lock:
+            targets = [subscription for subscription in self._subscriptions if subscription.matches(event)]
+            self._delivered += len(targets)
+        message = f"{next(self._ids)}\n{event['type']}\n{event['data']}"
+        for subscription in targets:
+            try:
+                subscription.loop.call_soon_threadsafe(self._offer, subscription, message)
+            except RuntimeError:
+                # The subscriber's loop is closed, it is going away anyway
+                self.unsubscribe(subscription)
+
+    def subscribe(self, user_id: Optional[int] = None, order_id: Optional[int] = None) -> Subscription:
+        """Register a subscriber; must be called from the event loop that will read it"""
+        self._start()
+        subscription = Subscription(asyncio.get_running_loop(), user_id, order_id, self.queue_size)
+        with self._lock:
+            self._subscriptions.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        with self._lock:
+            self._subscriptions.discard(subscription)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "transport": type(self.transport).__name__,
+                "subscribers": len(self._subscriptions),
+                "published": self._published,
+                "delivered": self._delivered,
+                "dropped_subscribers": self._dropped,
+            }
+
+    def _offer(self, subscription: Subscription, message: str):
+        was_dropped = subscription.dropped
+        subscription.offer(message)
+        if subscription.dropped and not was_dropped:
+            with self._lock:
+                self._dropped += 1
+            logger.warning("Dropped slow event subscriber (user_id=%s, order_id=%s)", subscription.user_id, subscription.order_id)
+
+    def _start(self):
+        # Started on first use so importing the app never connects to a broker
+        with self._lock:
+            if self._started:
+                return
+            self._started = True
+        self.transport.start(self.deliver)
+
+def parse_message(message: str):
+    """Split a queued message into (event id, event type, JSON data)"""
+    event_id, event_type, data = message.split("\n", 2)
+    return event_id, event_type, data
+
+def create_transport(kind: str = EVENTS_TRANSPORT) -> EventTransport:
+    if kind == "local":
+        return LocalTransport()
+    if kind == "redis":
+        return RedisTransport()
+    raise ValueError(f"Unknown EVENTS_TRANSPORT: {kind}")
+
+# Hub fed by OrderService writes and read by the /orders/stream endpoints
+order_events = EventHub(create_transport())
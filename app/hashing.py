@@ -0,0 +1,157 @@
+# app/hashing.py
+
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from typing import Optional
+from fastapi import HTTPException, status
+from passlib.context import CryptContext
+
+# Worker processes used for bcrypt, 0 hashes inline in the calling thread
+HASH_WORKERS = int(os.getenv("HASH_WORKERS", "2"))
+# Hashes allowed to wait for a free worker before new ones are rejected
+HASH_QUEUE_SIZE = int(os.getenv("HASH_QUEUE_SIZE", "8"))
+# Upper bound on queue wait plus hashing time for a single call
+HASH_TIMEOUT_SECONDS = float(os.getenv("HASH_TIMEOUT_SECONDS", "10"))
+
+# Password hashing context
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+def _hash(password: str):
+    started = time.perf_counter()
+    return pwd_context.hash(password), time.perf_counter() - started
+
+def _verify(plain_password: str, hashed_password: str):
+    started = time.perf_counter()
+    return pwd_context.verify(plain_password, hashed_password), time.perf_counter() - started
+
+class PasswordHasher:
+    """
+    Runs bcrypt in a bounded pool of worker processes.
+
+    Hashing is CPU-bound, so doing it in request threads starves the threadpool
+    that every sync route shares. Calls are admitted only while fewer than
+    workers + queue_size are in flight; beyond that they fail fast with 503 so
+    a signup burst cannot pile up threads waiting for a worker. A call that
+    timed out stays in flight until its worker finishes the hash.
+    """
+
+    def __init__(self, workers: int = HASH_WORKERS, queue_size: int = HASH_QUEUE_SIZE,
+                 timeout: float = HASH_TIMEOUT_SECONDS):
+        self.workers = workers
+        self.queue_size = queue_size
+        self.timeout = timeout
+        self._slots = threading.BoundedSemaphore(max(workers, 1) + queue_size)
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._completed = 0
+        self._rejected = 0
+        self._timeouts = 0
+        self._total_seconds = 0.0
+        self._compute_seconds = 0.0
+        self._max_seconds = 0.0
+
+    def hash(self, password: str) -> str:
+        return self._run(_hash, password)
+
+    def verify(self, plain_password: str, hashed_password: str) -> bool:
+        return self._run(_verify, plain_password, hashed_password)
+
+    def stats(self) -> dict:
+        """Counters and timings for hashes run so far"""
+        with self._lock:
+            completed = self._completed
+            return {
+                "workers": self.workers,
+                "queue_size": self.queue_size,
+                "in_flight": self._in_flight,
+                "completed": completed,
+                "rejected": self._rejected,
+                "timeouts": self._timeouts,
+                "avg_seconds": self._total_seconds / completed if completed else 0.0,
+                "avg_compute_seconds": self._compute_seconds / completed if completed else 0.0,
+                "max_seconds": self._max_seconds,
+            }
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                # spawn avoids forking a server process that already runs threads
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("spawn")
+                )
+            return self._executor
+
+    def _run(self, func, *args):
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self._rejected += 1
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Password hashing is busy, please retry",
+                headers={"Retry-After": "1"}
+            )
+
+        started = time.perf_counter()
+        with self._lock:
+            self._in_flight += 1
+        if self.workers == 0:
+            try:
+                result, compute_seconds = func(*args)
+            finally:
+                self._release()
+        else:
+            try:
+                future = self._get_executor().submit(func, *args)
+            except BaseException:
+                self._release()
+                raise
+            # The slot is held until the hash stops running, not until we stop waiting for it:
+            # cancel() cannot stop a hash a worker already started, so a timed out one keeps its slot
+            future.add_done_callback(lambda _: self._release())
+            try:
+                result, compute_seconds = future.result(timeout=self.timeout)
+            except FutureTimeoutError:
+                future.cancel()
+                with self._lock:
+                    self._timeouts += 1
+                raise HTTPException(
+                    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                    detail="Password hashing timed out, please retry",
+                    headers={"Retry-After": "1"}
+                )
+            except BrokenProcessPool:
+                # A worker died, start a fresh pool for the next call
+                self.shutdown()
+                raise HTTPException(
+                    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                    detail="Password hashing is unavailable, please retry",
+                    headers={"Retry-After": "1"}
+                )
+
+        elapsed = time.perf_counter() - started
+        with self._lock:
+            self._completed += 1
+            self._total_seconds += elapsed
+            self._compute_seconds += compute_seconds
+            self._max_seconds = max(self._max_seconds, elapsed)
+        return result
+
+    def _release(self):
+        with self._lock:
+            self._in_flight -= 1
+        self._slots.release()
+
+# Process-wide hasher used by app.utils.hash_password / verify_password
+password_hasher = PasswordHasher()
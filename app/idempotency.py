@@ -0,0 +1,202 @@
+# app/idempotency.py
+
+import hashlib
+import json
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Optional, Tuple
+from fastapi import HTTPException, Response, status
+from pydantic import BaseModel
+from sqlalchemy import delete, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from app.cache import MemoryCacheBackend
+from app.database.models import IdempotencyKey
+
+# How long a stored response is replayed for a repeated key
+IDEMPOTENCY_TTL_SECONDS = int(os.getenv("IDEMPOTENCY_TTL_SECONDS", "86400"))
+# Stored responses also kept in process memory
+IDEMPOTENCY_MEMORY_ENTRIES = int(os.getenv("IDEMPOTENCY_MEMORY_ENTRIES", "10000"))
+# How long a duplicate waits for the in-flight original before giving up with 409
+IDEMPOTENCY_WAIT_SECONDS = float(os.getenv("IDEMPOTENCY_WAIT_SECONDS", "10"))
+# A claim older than this is treated as abandoned by a crashed worker and can be taken over
+IDEMPOTENCY_LOCK_SECONDS = int(os.getenv("IDEMPOTENCY_LOCK_SECONDS", "60"))
+# Minimum interval between sweeps of expired keys
+IDEMPOTENCY_PURGE_SECONDS = float(os.getenv("IDEMPOTENCY_PURGE_SECONDS", "300"))
+
+IDEMPOTENCY_KEY_MAX_LENGTH = 200
+# Polling interval while another worker holds the claim
+_POLL_SECONDS = 0.05
+
+def request_fingerprint(payload: dict) -> str:
+    """Stable hash of a request payload, used to reject a key reused for a different request"""
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, separators=(",", ":"), default=str).encode()).hexdigest()
+
+class IdempotencyStore:
+    """
+    First responses of requests made with an Idempotency-Key header.
+
+    Completed responses live in an in-process LRU in front of the
+    idempotency_keys table, so a replay on the same worker needs no database
+    work and a replay on another worker costs one primary-key lookup. The
+    first request for a key inserts a claim row before doing any work; a
+    duplicate that arrives meanwhile waits on an Event when the original is
+    in the same process, or polls the claim when it is in another one, and is
+    then answered with the stored response. Failed requests release their
+    claim, so only successful responses are ever replayed.
+    """
+
+    def __init__(self, ttl: int = IDEMPOTENCY_TTL_SECONDS, wait_seconds: float = IDEMPOTENCY_WAIT_SECONDS,
+                 lock_seconds: int = IDEMPOTENCY_LOCK_SECONDS, memory_entries: int = IDEMPOTENCY_MEMORY_ENTRIES):
+        self.ttl = ttl
+        self.wait_seconds = wait_seconds
+        self.lock_seconds = lock_seconds
+        self.memory = MemoryCacheBackend(max_entries=memory_entries)
+        self._lock = threading.Lock()
+        self._in_flight: Dict[str, threading.Event] = {}
+        self._last_purge = 0.0
+
+    def run(self, db: Session, scope: str, key: str, fingerprint: str,
+            produce: Callable[[Callable[[BaseModel], None]], BaseModel], status_code: int = status.HTTP_200_OK) -> Response:
+        """
+        Return the stored response for `key`, or call `produce` once and store its result.
+
+        `produce` gets a callback to call with its response right before it
+        commits, which writes the response in that same transaction: a crash
+        after the commit cannot leave the work done with its key unanswered,
+        to be done again by a retry once the claim is taken over. A producer
+        that does not call it has its response stored in a second transaction.
+        """
+        full_key = f"{scope}:{key}"
+        deadline = time.monotonic() + self.wait_seconds
+        while True:
+            stored = self._from_memory(full_key, fingerprint)
+            if stored is not None:
+                return self._replay(*stored)
+
+            with self._lock:
+                event = self._in_flight.get(full_key)
+                if event is None:
+                    event = self._in_flight[full_key] = threading.Event()
+                    break
+            # The original is running in this process, wait for it and look again
+            if not event.wait(max(deadline - time.monotonic(), 0)):
+                raise self._in_progress()
+
+        try:
+            stored = self._claim(db, full_key, fingerprint, deadline)
+            if stored is not None:
+                return self._replay(*stored)
+            stored_body = None
+
+            def store(response: BaseModel):
+                nonlocal stored_body
+                stored_body = response.model_dump_json()
+                db.execute(update(IdempotencyKey).where(IdempotencyKey.key == full_key)
+                           .values(status_code=status_code, response_body=stored_body))
+
+            try:
+                model = produce(store)
+            except BaseException:
+                db.rollback()
+                db.execute(delete(IdempotencyKey).where(IdempotencyKey.key == full_key, IdempotencyKey.status_code.is_(None)))
+                db.commit()
+                raise
+            if stored_body is None:
+                store(model)
+                db.commit()
+            body = stored_body
+            self._remember(full_key, fingerprint, status_code, body)
+            return Response(content=body, status_code=status_code, media_type="application/json")
+        finally:
+            with self._lock:
+                self._in_flight.pop(full_key, None)
+            event.set()
+
+    def _claim(self, db: Session, full_key: str, fingerprint: str, deadline: float) -> Optional[Tuple[int, str]]:
+        """Insert the claim row; returns a stored (status, body) instead if the key was already completed"""
+        self._purge_expired(db)
+        while True:
+            now = datetime.utcnow()
+            db.add(IdempotencyKey(key=full_key, request_hash=fingerprint, locked_at=now,
+                                  expires_at=now + timedelta(seconds=self.ttl)))
+            try:
+                db.commit()
+                return None
+            except IntegrityError:
+                db.rollback()
+
+            row = db.query(IdempotencyKey).filter_by(key=full_key).first()
+            if row is None:
+                continue
+            if row.expires_at <= now:
+                db.delete(row)
+                db.commit()
+                continue
+            if row.request_hash != fingerprint:
+                raise self._mismatch()
+            if row.status_code is not None:
+                self._remember(full_key, fingerprint, row.status_code, row.response_body)
+                return row.status_code, row.response_body
+            if row.locked_at <= now - timedelta(seconds=self.lock_seconds):
+                # The worker that claimed it died before finishing, take the claim over
+                taken = db.execute(
+                    update(IdempotencyKey)
+                    .where(IdempotencyKey.key == full_key, IdempotencyKey.locked_at == row.locked_at)
+                    .values(locked_at=now)
+                ).rowcount
+                db.commit()
+                if taken:
+                    return None
+                continue
+            # Another worker is running the original request
+            db.rollback()
+            if time.monotonic() >= deadline:
+                raise self._in_progress()
+            time.sleep(_POLL_SECONDS)
+
+    def _purge_expired(self, db: Session):
+        with self._lock:
+            if time.monotonic() - self._last_purge < IDEMPOTENCY_PURGE_SECONDS:
+                return
+            self._last_purge = time.monotonic()
+        db.execute(delete(IdempotencyKey).where(IdempotencyKey.expires_at < datetime.utcnow()))
+        db.commit()
+
+    def _from_memory(self, full_key: str, fingerprint: str) -> Optional[Tuple[int, str]]:
+        cached = self.memory.get(full_key)
+        if cached is None:
+            return None
+        entry = json.loads(cached)
+        if entry["fingerprint"] != fingerprint:
+            raise self._mismatch()
+        return entry["status_code"], entry["body"]
+
+    def _remember(self, full_key: str, fingerprint: str, status_code: int, body: str):
+        entry = {"fingerprint": fingerprint, "status_code": status_code, "body": body}
+        self.memory.set(full_key, json.dumps(entry).encode(), self.ttl)
+
+    @staticmethod
+    def _replay(status_code: int, body: str) -> Response:
+        return Response(content=body, status_code=status_code, media_type="application/json",
+                        headers={"Idempotent-Replayed": "true"})
+
+    @staticmethod
+    def _mismatch() -> HTTPException:
+        return HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="Idempotency-Key was already used for a different request"
+        )
+
+    @staticmethod
+    def _in_progress() -> HTTPException:
+        return HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="A request with this Idempotency-Key is still in progress",
+            headers={"Retry-After": "1"}
+        )
+
+# Process-wide store used by POST /orders/
+idempotency_store = IdempotencyStore()
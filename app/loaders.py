@@ -0,0 +1,32 @@
+# app/loaders.py
+
+from typing import Callable, Dict, Generic, Hashable, Iterable, List, Optional, TypeVar
+from app.validators import MAX_BATCH_IDS
+
+KeyT = TypeVar("KeyT", bound=Hashable)
+ValueT = TypeVar("ValueT")
+
+class Loader(Generic[KeyT, ValueT]):
+    """
+    Batching, deduplicating lookup of entities by key, meant to live for one request.
+
+    load_many() fetches the keys it has not seen yet with as few `batch_load`
+    calls as max_batch_size allows. Each key is fetched at most once per
+    loader; keys that do not exist resolve to None.
+    """
+
+    def __init__(self, batch_load: Callable[[List[KeyT]], Dict[KeyT, ValueT]], max_batch_size: int = MAX_BATCH_IDS):
+        self.batch_load = batch_load
+        self.max_batch_size = max_batch_size
+        self._results: Dict[KeyT, Optional[ValueT]] = {}
+
+    def load_many(self, keys: Iterable[KeyT]) -> List[Optional[ValueT]]:
+        """Values for `keys` in the same order, None where a key does not exist"""
+        keys = list(keys)
+        missing = [key for key in dict.fromkeys(keys) if key not in self._results]
+        for start in range(0, len(missing), self.max_batch_size):
+            chunk = missing[start:start + self.max_batch_size]
+            found = self.batch_load(chunk)
+            for key in chunk:
+                self._results[key] = found.get(key)
+        return [self._results[key] for key in keys]
@@ -0,0 +1,128 @@
+# app/metrics.py
+
+import os
+import time
+from bisect import bisect_left
+from typing import Dict, List, Tuple
+
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+# Upper limit on (method, route, status) series, later combinations share one overflow series
+METRICS_MAX_SERIES = int(os.getenv("METRICS_MAX_SERIES", "1000"))
+
+# Histogram bucket upper bounds in seconds (the Prometheus client defaults)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+KNOWN_METHODS = {"GET", "HEAD", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"}
+# Route label for requests that matched no route (404s for arbitrary paths)
+UNMATCHED_ROUTE = "<unmatched>"
+# Route label used once METRICS_MAX_SERIES is reached
+OVERFLOW_ROUTE = "<other>"
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+class HttpMetrics:
+    """
+    Request counts, latency histograms and in-progress gauges for one worker.
+
+    Series are labelled by method, route template and status code. Routes come
+    from the matched route's path, never the raw URL, so ids in paths do not
+    create new series; the total is capped at max_series regardless. State is
+    only touched from the event loop (the middleware and the async /metrics
+    endpoint), so updates need no locking.
+    """
+
+    def __init__(self, buckets: Tuple[float, ...] = LATENCY_BUCKETS, max_series: int = METRICS_MAX_SERIES):
+        self.buckets = buckets
+        self.max_series = max_series
+        # Per series: one count per bucket, one for +Inf, then the sum of observed seconds
+        self._series: Dict[Tuple[str, str, int], List[float]] = {}
+        self._in_progress: Dict[str, int] = {}
+
+    def started(self, method: str):
+        self._in_progress[method] = self._in_progress.get(method, 0) + 1
+
+    def finished(self, method: str, route: str, status_code: int, seconds: float):
+        self._in_progress[method] -= 1
+        key = (method, route, status_code)
+        series = self._series.get(key)
+        if series is None:
+            if len(self._series) >= self.max_series:
+                key = (method, OVERFLOW_ROUTE, status_code)
+                series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0] * (len(self.buckets) + 1) + [0.0]
+        series[bisect_left(self.buckets, seconds)] += 1
+        series[-1] += seconds
+
+    def render(self) -> str:
+        """All series in the Prometheus text exposition format"""
+        bounds = [str(bound) for bound in self.buckets] + ["+Inf"]
+        totals = [
+            "# HELP http_requests_total Total HTTP requests by method, route template and status code.",
+            "# TYPE http_requests_total counter",
+        ]
+        histogram = [
+            "# HELP http_request_duration_seconds Time from receiving a request to sending the last response byte.",
+            "# TYPE http_request_duration_seconds histogram",
+        ]
+        for (method, route, status_code), series in sorted(self._series.items()):
+            labels = f'method="{method}",route="{_escape(route)}",status="{status_code}"'
+            cumulative = 0
+            for bound, count in zip(bounds, series):
+                cumulative += count
+                histogram.append(f'http_request_duration_seconds_bucket{{{labels},le="{bound}"}} {cumulative}')
+            histogram.append(f"http_request_duration_seconds_sum{{{labels}}} {series[-1]}")
+            histogram.append(f"http_request_duration_seconds_count{{{labels}}} {cumulative}")
+            totals.append(f"http_requests_total{{{labels}}} {cumulative}")
+
+        gauges = [
+            "# HELP http_requests_in_progress HTTP requests currently being handled.",
+            "# TYPE http_requests_in_progress gauge",
+        ]
+        for method, count in sorted(self._in_progress.items()):
+            gauges.append(f'http_requests_in_progress{{method="{method}"}} {count}')
+        return "\n".join(totals + histogram + gauges) + "\n"
+
+    def reset(self):
+        self._series.clear()
+        self._in_progress.clear()
+
+class MetricsMiddleware:
+    """
+    Pure ASGI middleware feeding HttpMetrics.
+
+    The route template is read from scope["route"], which FastAPI sets while
+    routing; the scope dict is shared down the stack, so it is visible here
+    once the inner app returns. Streaming responses are timed to their last
+    chunk.
+    """
+
+    def __init__(self, app, metrics: HttpMetrics = None):
+        self.app = app
+        self.metrics = metrics or http_metrics
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"] if scope["method"] in KNOWN_METHODS else "OTHER"
+        status_code = 500
+
+        async def send_with_status(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        self.metrics.started(method)
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            route = scope.get("route")
+            # path_format drops convertors, so /orders/{order_id:int} is labelled like /orders/{order_id}
+            self.metrics.finished(method, getattr(route, "path_format", UNMATCHED_ROUTE), status_code, time.perf_counter() - started)
+
+# Process-wide metrics served by GET /metrics
+http_metrics = HttpMetrics()
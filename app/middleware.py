@@ -0,0 +1,39 @@
+# app/middleware.py
+
+import time
+from http.cookies import SimpleCookie
+from app.config.database import READ_DATABASE_URLS, READ_YOUR_WRITES_SECONDS, PRIMARY_PIN_COOKIE
+
+SAFE_METHODS = {"GET", "HEAD", "OPTIONS"}
+
+class ReadYourWritesMiddleware:
+    """
+    Pin a client to the primary database for a short window after it writes.
+
+    Successful non-GET responses get a cookie holding the end of the window;
+    get_read_db sends requests carrying a live cookie to the primary, so the
+    client never reads a replica that has not caught up with its own write.
+    """
+
+    def __init__(self, app, window_seconds: float = READ_YOUR_WRITES_SECONDS):
+        self.app = app
+        self.window_seconds = window_seconds
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] in SAFE_METHODS or not READ_DATABASE_URLS:
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_pin(message):
+            if message["type"] == "http.response.start" and message["status"] < 400:
+                cookie = SimpleCookie()
+                cookie[PRIMARY_PIN_COOKIE] = f"{time.time() + self.window_seconds:.3f}"
+                cookie[PRIMARY_PIN_COOKIE]["path"] = "/"
+                cookie[PRIMARY_PIN_COOKIE]["max-age"] = int(self.window_seconds) + 1
+                cookie[PRIMARY_PIN_COOKIE]["httponly"] = True
+                headers = list(message.get("headers", []))
+                headers.append((b"set-cookie", cookie.output(header="").strip().encode("latin-1")))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        await self.app(scope, receive, send_with_pin)
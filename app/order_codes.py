@@ -0,0 +1,183 @@
+# app/order_codes.py
+
+import os
+import socket
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from datetime import datetime, timedelta
+from typing import Optional
+from sqlalchemy import insert, select, update
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import IntegrityError
+from app.config.database import engine
+from app.database.models import OrderCodeWorker
+
+# "snowflake" (time-ordered, default) or "uuid" (the original random 8-hex-digit codes)
+ORDER_CODE_GENERATOR = os.getenv("ORDER_CODE_GENERATOR", "snowflake")
+# 0-1023 and unique per running process; unset leases one from order_code_workers
+ORDER_CODE_WORKER_ID = os.getenv("ORDER_CODE_WORKER_ID")
+# How long a leased worker id stays reserved without renewal, renewed at half of it
+ORDER_CODE_WORKER_LEASE_SECONDS = float(os.getenv("ORDER_CODE_WORKER_LEASE_SECONDS", "600"))
+# Fresh codes tried when a generated code hits the unique index before giving up
+ORDER_CODE_RETRIES = int(os.getenv("ORDER_CODE_RETRIES", "3"))
+
+ORDER_CODE_PREFIX = "ORD-"
+# Crockford base32: no I, L, O or U, and sorts in the same order as the values it encodes
+_ALPHABET = "0123456789ABCDEFGHJKMNPQRSTVWXYZ"
+# 2025-01-01T00:00:00Z in milliseconds; 41 bits of milliseconds last ~69 years from here
+_EPOCH_MS = 1735689600000
+_WORKER_BITS = 10
+_SEQUENCE_BITS = 12
+_MAX_WORKER_ID = (1 << _WORKER_BITS) - 1
+_MAX_SEQUENCE = (1 << _SEQUENCE_BITS) - 1
+
+class OrderCodeGenerator(ABC):
+    """Produces order_code values for orders created without a client-supplied code"""
+
+    @abstractmethod
+    def generate(self) -> str:
+        ...
+
+class UuidOrderCodeGenerator(OrderCodeGenerator):
+    """The original random codes: 32 bits, collide at volume and insert at random index positions"""
+
+    def generate(self) -> str:
+        return f"{ORDER_CODE_PREFIX}{uuid.uuid4().hex[:8].upper()}"
+
+class WorkerIdLease:
+    """
+    A Snowflake worker id leased from the order_code_workers table.
+
+    The first call claims the lowest id no other process holds, or one whose
+    lease ran out (its process died), and later calls renew the lease once
+    half of ORDER_CODE_WORKER_LEASE_SECONDS has passed. That is one round trip
+    per process start and per renewal, none per code. A process stalled for
+    longer than the lease can lose its id; it claims a new one on its next
+    code.
+    """
+
+    _table = OrderCodeWorker.__table__
+
+    def __init__(self, db_engine: Engine, lease_seconds: float = ORDER_CODE_WORKER_LEASE_SECONDS):
+        self.engine = db_engine
+        self.lease_seconds = lease_seconds
+        # The pid alone can be reused by a later process on the same host
+        self.holder = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.worker_id: Optional[int] = None
+        self._renew_at = 0.0
+
+    def current(self) -> int:
+        if self.worker_id is None or time.monotonic() >= self._renew_at:
+            if self.worker_id is None or not self._renew():
+                self.worker_id = self._claim()
+            self._renew_at = time.monotonic() + self.lease_seconds / 2
+        return self.worker_id
+
+    def _renew(self) -> bool:
+        table = self._table
+        with self.engine.begin() as connection:
+            return connection.execute(
+                update(table).where(table.c.worker_id == self.worker_id, table.c.holder == self.holder)
+                .values(expires_at=datetime.utcnow() + timedelta(seconds=self.lease_seconds))
+            ).rowcount > 0
+
+    def _claim(self) -> int:
+        table = self._table
+        for _ in range(5):
+            now = datetime.utcnow()
+            values = {"holder": self.holder, "expires_at": now + timedelta(seconds=self.lease_seconds)}
+            with self.engine.connect() as connection:
+                leases = dict(connection.execute(select(table.c.worker_id, table.c.expires_at)).all())
+            free = next((worker_id for worker_id in range(_MAX_WORKER_ID + 1) if worker_id not in leases), None)
+            try:
+                with self.engine.begin() as connection:
+                    if free is not None:
+                        connection.execute(insert(table).values(worker_id=free, **values))
+                        return free
+                    expired = sorted(worker_id for worker_id, expires_at in leases.items() if expires_at < now)
+                    if not expired:
+                        raise RuntimeError(f"All {_MAX_WORKER_ID + 1} order code worker ids are leased by running processes")
+                    # Only taken if it is still expired, another process may have claimed it since the read
+                    if connection.execute(
+                        update(table).where(table.c.worker_id == expired[0], table.c.expires_at < now).values(**values)
+                    ).rowcount:
+                        return expired[0]
+            except IntegrityError:
+                # Another process inserted the same free id first
+                pass
+        raise RuntimeError("Could not lease an order code worker id, please retry")
+
+class SnowflakeOrderCodeGenerator(OrderCodeGenerator):
+    """
+    Time-ordered codes that are unique without a database round trip per code.
+
+    Each code packs 41 bits of milliseconds since 2025-01-01, a 10-bit worker
+    id and a 12-bit per-millisecond sequence into 63 bits, written as 13
+    Crockford base32 characters. Codes from one worker never repeat, codes
+    from workers with different ids cannot collide (an id not given is
+    leased from the database, see WorkerIdLease), and since they increase
+    with time new rows are appended to the right edge of the order_code index
+    instead of splitting pages all over it.
+    """
+
+    def __init__(self, worker_id: Optional[int] = None, db_engine: Optional[Engine] = None):
+        if worker_id is not None and not 0 <= worker_id <= _MAX_WORKER_ID:
+            raise ValueError(f"worker_id must be between 0 and {_MAX_WORKER_ID}")
+        # None leases the id per process, so workers forked after import do not share one
+        self._configured_worker_id = worker_id
+        self._engine = db_engine
+        self._pid = None
+        self._lease: Optional[WorkerIdLease] = None
+        self.worker_id = worker_id
+        self._lock = threading.Lock()
+        self._last_ms = -1
+        self._sequence = 0
+
+    def generate(self) -> str:
+        return ORDER_CODE_PREFIX + self._encode(self.next_id())
+
+    def next_id(self) -> int:
+        with self._lock:
+            if self._configured_worker_id is None:
+                if self._pid != os.getpid():
+                    self._pid = os.getpid()
+                    self._lease = WorkerIdLease(self._engine or engine)
+                self.worker_id = self._lease.current()
+            now = self._now_ms()
+            if now < self._last_ms:
+                # The clock went backwards, keep issuing from the last timestamp we used
+                now = self._last_ms
+            if now == self._last_ms:
+                self._sequence = (self._sequence + 1) & _MAX_SEQUENCE
+                if self._sequence == 0:
+                    # 4096 codes in this millisecond already, wait for the next one
+                    while now <= self._last_ms:
+                        now = self._now_ms()
+            else:
+                self._sequence = 0
+            self._last_ms = now
+            return (now << (_WORKER_BITS + _SEQUENCE_BITS)) | (self.worker_id << _SEQUENCE_BITS) | self._sequence
+
+    @staticmethod
+    def _now_ms() -> int:
+        return time.time_ns() // 1_000_000 - _EPOCH_MS
+
+    @staticmethod
+    def _encode(value: int) -> str:
+        chars = []
+        for _ in range(13):
+            chars.append(_ALPHABET[value & 31])
+            value >>= 5
+        return "".join(reversed(chars))
+
+def create_order_code_generator(kind: str = ORDER_CODE_GENERATOR) -> OrderCodeGenerator:
+    if kind == "uuid":
+        return UuidOrderCodeGenerator()
+    if kind == "snowflake":
+        return SnowflakeOrderCodeGenerator(int(ORDER_CODE_WORKER_ID) if ORDER_CODE_WORKER_ID is not None else None)
+    raise ValueError(f"Unknown ORDER_CODE_GENERATOR: {kind}")
+
+# Generator used by OrderService.generate_order_code
+order_code_generator = create_order_code_generator()
@@ -0,0 +1,154 @@
+# app/query_stats.py
+
+import logging
+import os
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import List, Optional
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+QUERY_STATS_ENABLED = os.getenv("QUERY_STATS_ENABLED", "true").lower() == "true"
+# Add X-DB-Queries / X-DB-Time (and X-DB-N-Plus-One when flagged) to responses; off by default, as they expose DB timing to clients
+QUERY_STATS_HEADERS = os.getenv("QUERY_STATS_HEADERS", "false").lower() == "true"
+# Runs of one statement within a request at which it is reported as an N+1 pattern
+N_PLUS_ONE_THRESHOLD = int(os.getenv("N_PLUS_ONE_THRESHOLD", "5"))
+# Statements slower than this are logged with their EXPLAIN plan, 0 disables
+SLOW_QUERY_SECONDS = float(os.getenv("SLOW_QUERY_SECONDS", "0.5"))
+
+logger = logging.getLogger(__name__)
+
+class QueryStats:
+    """Statements executed in one request (or one query_budget block)"""
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+        self.statements: Counter = Counter()
+        self._lock = threading.Lock()
+
+    def record(self, statement: str, seconds: float):
+        # Sync routes and their dependencies can run in different threadpool threads
+        with self._lock:
+            self.count += 1
+            self.seconds += seconds
+            self.statements[statement] += 1
+
+    def repeated(self, threshold: int = N_PLUS_ONE_THRESHOLD) -> List[tuple]:
+        """(statement, runs) for statements run at least `threshold` times"""
+        with self._lock:
+            return [(statement, runs) for statement, runs in self.statements.most_common() if runs >= threshold]
+
+_current: ContextVar[Optional[QueryStats]] = ContextVar("query_stats", default=None)
+# Active query_budget blocks, they see statements from every thread
+_budgets: List[QueryStats] = []
+
+def current_stats() -> Optional[QueryStats]:
+    return _current.get()
+
+def _explain(conn, statement: str, parameters) -> Optional[str]:
+    dialect = conn.dialect.name
+    prefix = "EXPLAIN QUERY PLAN " if dialect == "sqlite" else "EXPLAIN "
+    # A fresh DBAPI cursor keeps the original result intact and bypasses these listeners
+    cursor = conn.connection.cursor()
+    try:
+        cursor.execute(prefix + statement, parameters)
+        return "\n".join(" | ".join(str(value) for value in row) for row in cursor.fetchall())
+    finally:
+        cursor.close()
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    context.query_started = time.perf_counter()
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - context.query_started
+    stats = _current.get()
+    if stats is not None:
+        stats.record(statement, elapsed)
+    for budget in _budgets:
+        budget.record(statement, elapsed)
+
+    if SLOW_QUERY_SECONDS and elapsed >= SLOW_QUERY_SECONDS:
+        plan = None
+        # Streamed results still hold the connection's cursor, and only reads are safe to re-plan
+        streaming = context.execution_options.get("stream_results")
+        if not executemany and not streaming and statement.lstrip().upper().startswith("SELECT"):
+            try:
+                plan = _explain(conn, statement, parameters)
+            except Exception as exc:
+                plan = f"EXPLAIN failed: {exc}"
+        logger.warning("Slow query (%.1f ms): %s\nParameters: %r\nPlan:\n%s", elapsed * 1000, statement, parameters, plan)
+
+if QUERY_STATS_ENABLED:
+    # Registered on the Engine class so the primary, replicas and any later engines are all covered
+    event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+
+class QueryStatsMiddleware:
+    """
+    Pure ASGI middleware giving each request its own QueryStats.
+
+    The stats object lives in a context variable, which Starlette copies into
+    the threadpool that runs sync routes and dependencies, so the engine-level
+    cursor listeners attribute queries to the right request. Headers reflect
+    the statements run before the response started; statements repeated
+    N_PLUS_ONE_THRESHOLD times are logged as likely N+1 patterns.
+    """
+
+    def __init__(self, app, headers: bool = QUERY_STATS_HEADERS):
+        self.app = app
+        self.headers = headers
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = QueryStats()
+        token = _current.set(stats)
+
+        async def send_with_headers(message):
+            if message["type"] == "http.response.start" and self.headers:
+                headers = list(message.get("headers", []))
+                headers.append((b"x-db-queries", str(stats.count).encode()))
+                headers.append((b"x-db-time", f"{stats.seconds * 1000:.2f}ms".encode()))
+                repeated = stats.repeated()
+                if repeated:
+                    headers.append((b"x-db-n-plus-one", str(len(repeated)).encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_headers)
+        finally:
+            _current.reset(token)
+            for statement, runs in stats.repeated():
+                logger.warning("Possible N+1 in %s %s: statement ran %d times: %s",
+                               scope["method"], scope["path"], runs, statement)
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+@contextmanager
+def query_budget(max_queries: int):
+    """
+    Fail when the block runs more than `max_queries` SQL statements.
+
+    Meant for tests: statements are counted on every engine and thread while
+    the block is active, so requests made through TestClient are included.
+
+        with query_budget(2):
+            client.get("/orders/1")
+    """
+    stats = QueryStats()
+    _budgets.append(stats)
+    try:
+        yield stats
+    finally:
+        _budgets.remove(stats)
+    if stats.count > max_queries:
+        listing = "\n".join(f"  {runs}x {statement}" for statement, runs in stats.statements.most_common())
+        raise QueryBudgetExceeded(f"Expected at most {max_queries} queries, ran {stats.count}:\n{listing}")
@@ -0,0 +1,55 @@
+# app/responses.py
+
+import os
+from typing import Any
+from fastapi import Response, status
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+from starlette.concurrency import run_in_threadpool
+
+# Serialise service results once instead of letting FastAPI re-validate them
+FAST_JSON_RESPONSES = os.getenv("FAST_JSON_RESPONSES", "true").lower() == "true"
+
+class ModelJSONResponse(Response):
+    """JSON response rendered straight from a pydantic model by pydantic-core"""
+    media_type = "application/json"
+
+    def render(self, content: BaseModel) -> bytes:
+        return content.__pydantic_serializer__.to_json(content)
+
+class ClosingStreamingResponse(StreamingResponse):
+    """
+    StreamingResponse that closes its body as soon as the response ends.
+
+    When the client disconnects mid-body Starlette only stops iterating it,
+    which leaves the body's finally (closing its session, releasing its
+    workload slot) to whenever the generator happens to be collected.
+    """
+
+    def __init__(self, content, *args, **kwargs):
+        super().__init__(content, *args, **kwargs)
+        self.content = content
+
+    async def __call__(self, scope, receive, send):
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            if hasattr(self.content, "aclose"):
+                await self.content.aclose()
+            elif hasattr(self.content, "close"):
+                # A sync body's finally does blocking work, run it in the threadpool like the rest of the body
+                await run_in_threadpool(self.content.close)
+
+def model_response(model: BaseModel, status_code: int = status.HTTP_200_OK) -> Any:
+    """
+    Return a service result from a route.
+
+    Services already hand back validated response models. When FastAPI gets a
+    model back it validates it again against `response_model`, converts it to
+    plain Python and only then encodes it. Returning a Response skips all of
+    that and serialises the model once. The route keeps `response_model` for
+    the OpenAPI schema.
+    """
+    if not FAST_JSON_RESPONSES:
+        return model
+    return ModelJSONResponse(model, status_code=status_code)
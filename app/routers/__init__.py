@@ -5,11 +5,19 @@ from .users import router as users_router
 from .orders import router as orders_router
 from .roles import router as roles_router
 from .permissions import router as permissions_router
+from .internal import router as internal_router
+from .metrics import router as metrics_router
+from .async_users import router as async_users_router
+from .async_orders import router as async_orders_router
 
 __all__ = [
     "ping_router",
     "users_router", 
     "orders_router",
     "roles_router",
-    "permissions_router"
+    "permissions_router",
+    "internal_router",
+    "metrics_router",
+    "async_users_router",
+    "async_orders_router"
 ]
@@ -0,0 +1,74 @@
+# app/routers/async_orders.py
+
+from fastapi import APIRouter, Depends, Header, Request, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import run_in_threadpool
+from app.bulkheads import READS, WRITES
+from app.config.database import SessionLocal, get_async_db, get_async_read_db
+from app.dependencies import workload, require_permission
+from app.idempotency import idempotency_store, request_fingerprint, IDEMPOTENCY_KEY_MAX_LENGTH
+from app.responses import model_response
+from app.services import OrderService, AsyncOrderService
+from app.validators import OrderCreate, OrderUpdate, OrderResponse, OrderListResponse, OrderStatusUpdate, TotalMode
+from typing import Optional
+
+# Async handlers for the core /orders routes, registered ahead of app/routers/orders.py when ASYNC_ROUTES is on.
+# {order_id:int} only matches numeric ids, so /orders/export, /search, /stream and /batch still reach the sync router.
+router = APIRouter(prefix="/orders", tags=["orders"])
+
+@router.post("/", response_model=OrderResponse, status_code=status.HTTP_201_CREATED, dependencies=[Depends(workload(WRITES)), Depends(require_permission("order:create"))])
+async def create_order(order: OrderCreate, user_id: int, request: Request, db: AsyncSession = Depends(get_async_db),
+                       idempotency_key: Optional[str] = Header(None, min_length=1, max_length=IDEMPOTENCY_KEY_MAX_LENGTH)):
+    """
+    Create a new order for a user
+
+    Send an **Idempotency-Key** header to make retries safe: repeating the request
+    with the same key returns the first response instead of creating another order.
+    """
+    if idempotency_key is None:
+        return model_response(await AsyncOrderService.create_order(db, order, user_id), status.HTTP_201_CREATED)
+
+    # The idempotency store blocks while a duplicate waits for the original, so keyed creates stay on the threadpool
+    def create_once():
+        sync_db = getattr(request.state, "sessions", SessionLocal)()
+        try:
+            fingerprint = request_fingerprint({"user_id": user_id, "order": order.model_dump(mode="json")})
+            return idempotency_store.run(sync_db, "orders:create", idempotency_key, fingerprint,
+                                         lambda store: OrderService.create_order(sync_db, order, user_id, before_commit=store),
+                                         status.HTTP_201_CREATED)
+        finally:
+            sync_db.close()
+    return await run_in_threadpool(create_once)
+
+@router.get("/{order_id:int}", response_model=OrderResponse, dependencies=[Depends(workload(READS)), Depends(require_permission("order:read"))])
+async def get_order(order_id: int, db: AsyncSession = Depends(get_async_read_db)):
+    """Get order by ID"""
+    return model_response(await AsyncOrderService.get_order(db, order_id))
+
+@router.put("/{order_id:int}", response_model=OrderResponse, dependencies=[Depends(workload(WRITES)), Depends(require_permission("order:update"))])
+async def update_order(order_id: int, order_update: OrderUpdate, db: AsyncSession = Depends(get_async_db)):
+    """Update order by ID"""
+    return model_response(await AsyncOrderService.update_order(db, order_id, order_update))
+
+@router.delete("/{order_id:int}", status_code=status.HTTP_204_NO_CONTENT, dependencies=[Depends(workload(WRITES)), Depends(require_permission("order:delete"))])
+async def delete_order(order_id: int, db: AsyncSession = Depends(get_async_db)):
+    """Delete order by ID"""
+    await AsyncOrderService.delete_order(db, order_id)
+    return None
+
+@router.get("/", response_model=OrderListResponse, dependencies=[Depends(workload(READS)), Depends(require_permission("order:list"))])
+async def list_orders(page: int = 1, per_page: int = 10, cursor: Optional[str] = None,
+                      total_mode: TotalMode = TotalMode.EXACT, db: AsyncSession = Depends(get_async_read_db)):
+    """List all orders with pagination (pass next_cursor as cursor for keyset paging)"""
+    return model_response(await AsyncOrderService.list_orders(db, page, per_page, cursor, total_mode))
+
+@router.get("/user/{user_id:int}", response_model=OrderListResponse, dependencies=[Depends(workload(READS)), Depends(require_permission("order:list"))])
+async def list_user_orders(user_id: int, page: int = 1, per_page: int = 10, cursor: Optional[str] = None,
+                           total_mode: TotalMode = TotalMode.EXACT, db: AsyncSession = Depends(get_async_read_db)):
+    """List orders for a specific user (pass next_cursor as cursor for keyset paging)"""
+    return model_response(await AsyncOrderService.list_user_orders(db, user_id, page, per_page, cursor, total_mode))
+
+@router.patch("/{order_id:int}/status", response_model=OrderResponse, dependencies=[Depends(workload(WRITES)), Depends(require_permission("order:update_status"))])
+async def update_order_status(order_id: int, status_update: OrderStatusUpdate, db: AsyncSession = Depends(get_async_db)):
+    """Update order status"""
+    return model_response(await AsyncOrderService.update_order_status(db, order_id, status_update.status))
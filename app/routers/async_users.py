@@ -0,0 +1,42 @@
+# app/routers/async_users.py
+
+from fastapi import APIRouter, Depends, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.bulkheads import READS, WRITES, AUTH
+from app.config.database import get_async_db, get_async_read_db
+from app.dependencies import workload, require_permission
+from app.responses import model_response
+from app.services import AsyncUserService
+from app.validators import UserCreate, UserUpdate, UserResponse, UserListResponse, TotalMode
+from typing import Optional
+
+# Async handlers for the core /users routes, registered ahead of app/routers/users.py when ASYNC_ROUTES is on.
+# {user_id:int} only matches numeric ids, so literal paths such as /users/batch still reach the sync router.
+router = APIRouter(prefix="/users", tags=["users"])
+
+@router.post("/", response_model=UserResponse, status_code=status.HTTP_201_CREATED, dependencies=[Depends(workload(AUTH)), Depends(require_permission("user:create"))])
+async def create_user(user: UserCreate, db: AsyncSession = Depends(get_async_db)):
+    """Create a new user"""
+    return model_response(await AsyncUserService.create_user(db, user), status.HTTP_201_CREATED)
+
+@router.get("/{user_id:int}", response_model=UserResponse, dependencies=[Depends(workload(READS)), Depends(require_permission("user:read"))])
+async def get_user(user_id: int, db: AsyncSession = Depends(get_async_read_db)):
+    """Get user by ID"""
+    return model_response(await AsyncUserService.get_user(db, user_id))
+
+@router.put("/{user_id:int}", response_model=UserResponse, dependencies=[Depends(workload(AUTH)), Depends(require_permission("user:update"))])
+async def update_user(user_id: int, user_update: UserUpdate, db: AsyncSession = Depends(get_async_db)):
+    """Update user by ID"""
+    return model_response(await AsyncUserService.update_user(db, user_id, user_update))
+
+@router.delete("/{user_id:int}", status_code=status.HTTP_204_NO_CONTENT, dependencies=[Depends(workload(WRITES)), Depends(require_permission("user:delete"))])
+async def delete_user(user_id: int, db: AsyncSession = Depends(get_async_db)):
+    """Delete user by ID"""
+    await AsyncUserService.delete_user(db, user_id)
+    return None
+
+@router.get("/", response_model=UserListResponse, dependencies=[Depends(workload(READS)), Depends(require_permission("user:list"))])
+async def list_users(page: int = 1, per_page: int = 10, cursor: Optional[str] = None,
+                     total_mode: TotalMode = TotalMode.EXACT, db: AsyncSession = Depends(get_async_read_db)):
+    """List all users with pagination (pass next_cursor as cursor for keyset paging)"""
+    return model_response(await AsyncUserService.list_users(db, page, per_page, cursor, total_mode))
@@ -0,0 +1,72 @@
+# app/routers/internal.py
+
+import os
+from fastapi import APIRouter, Depends
+from app.cache import user_cache, order_cache
+from app.hashing import password_hasher
+from app.events import order_events
+from app.bulkheads import bulkheads
+from app.services.order_rollup_service import rollup_compactor
+from app.config.database import engine, replica_router, async_engine, async_replica_router, shard_router
+from app.dependencies import require_permission
+
+# Hidden from the docs, and with RBAC_ENABLED only admins (internal:read) can see the pool, replica and shard details
+router = APIRouter(prefix="/internal", tags=["internal"], include_in_schema=False,
+                   dependencies=[Depends(require_permission("internal:read"))])
+
+@router.get("/cache")
+def cache_stats():
+    """Hit, miss and eviction counters of the entity caches"""
+    return {cache.namespace: cache.backend.stats() for cache in (user_cache, order_cache)}
+
+@router.get("/hashing")
+def hashing_stats():
+    """Password hashing pool usage and timings"""
+    return password_hasher.stats()
+
+@router.get("/replicas")
+def replica_status():
+    """Configured read replicas and whether they are currently in rotation"""
+    return replica_router.status()
+
+@router.get("/shards")
+def shard_status():
+    """Configured shards and the size of this worker's remap table, empty without sharding"""
+    return shard_router.stats() if shard_router is not None else {}
+
+@router.get("/events")
+def event_stats():
+    """Order event subscribers and delivery counters of this worker"""
+    return order_events.stats()
+
+@router.get("/rollups")
+def rollup_stats():
+    """Order rollup compactor runs and folded deltas of this worker"""
+    return rollup_compactor.stats()
+
+@router.get("/bulkheads")
+def bulkhead_stats():
+    """Slots, queueing and pool usage of each workload class in this worker"""
+    return {name: bulkhead.stats() for name, bulkhead in bulkheads.items()}
+
+@router.get("/pool")
+def pool_stats():
+    """Connection pool usage of this worker process, for the primary and each replica (and their async engines)"""
+    def _stats(db_engine):
+        pool = db_engine.pool
+        return pool.stats() if hasattr(pool, "stats") else {"status": pool.status()}
+    stats = {
+        "pid": os.getpid(),
+        "primary": _stats(engine),
+        "replicas": {
+            db_engine.url.render_as_string(hide_password=True): _stats(db_engine) for db_engine in replica_router.engines
+        },
+    }
+    if shard_router is not None:
+        stats["shards"] = {shard_id: _stats(db_engine) for shard_id, db_engine in shard_router.engines.items()}
+    if async_engine is not None:
+        stats["async_primary"] = _stats(async_engine)
+        stats["async_replicas"] = {
+            db_engine.url.render_as_string(hide_password=True): _stats(db_engine) for db_engine in async_replica_router.engines
+        }
+    return stats
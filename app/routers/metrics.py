@@ -0,0 +1,13 @@
+# app/routers/metrics.py
+
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+from app.metrics import http_metrics
+
+router = APIRouter(tags=["metrics"], include_in_schema=False)
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Request metrics of this worker in Prometheus text format"""
+    # async so rendering runs on the event loop, the only place the metrics are updated
+    return PlainTextResponse(http_metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
@@ -1,46 +1,215 @@
 # app/routers/orders.py
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, WebSocket, WebSocketDisconnect, status
 from sqlalchemy.orm import Session
-from app.config.database import get_db
-from app.services import OrderService
-from app.validators import OrderCreate, OrderUpdate, OrderResponse, OrderListResponse, OrderStatusUpdate
-from typing import List
+from app.bulkheads import READS, WRITES, STREAMS
+from app.config.database import get_db, get_read_db
+from app.dependencies import workload, streaming_workload, held_body, require_permission, check_permission, batch_ids, get_loaders, RequestLoaders
+from app.events import order_events, parse_message, EVENTS_KEEPALIVE_SECONDS
+from app.idempotency import idempotency_store, request_fingerprint, IDEMPOTENCY_KEY_MAX_LENGTH
+from app.responses import model_response, ClosingStreamingResponse
+from app.services import OrderService, OrderRollupService
+from app.validators import OrderCreate, OrderUpdate, OrderResponse, OrderListResponse, OrderStatusUpdate, TotalMode
+from app.validators import OrderBulkCreate, OrderBulkResponse, OrderStatus, ExportFormat
+from app.validators import OrderSearchFilters, OrderSearchResponse, OrderSortField, SortDirection, OrderBatchResponse
+from app.validators import RollupGranularity, OrderAnalyticsResponse
+from typing import List, Optional
+import asyncio
+from datetime import datetime
+from decimal import Decimal
 
 router = APIRouter(prefix="/orders", tags=["orders"])
 
-@router.post("/", response_model=OrderResponse, status_code=status.HTTP_201_CREATED)
-def create_order(order: OrderCreate, user_id: int, db: Session = Depends(get_db)):
-    """Create a new order for a user"""
-    return OrderService.create_order(db, order, user_id)
+@router.post("/", response_model=OrderResponse, status_code=status.HTTP_201_CREATED, dependencies=[Depends(workload(WRITES)), Depends(require_permission("order:create"))])
+def create_order(order: OrderCreate, user_id: int, db: Session = Depends(get_db),
+                 idempotency_key: Optional[str] = Header(None, min_length=1, max_length=IDEMPOTENCY_KEY_MAX_LENGTH)):
+    """
+    Create a new order for a user
+    
+    Send an **Idempotency-Key** header to make retries safe: repeating the request
+    with the same key returns the first response instead of creating another order.
+    """
+    if idempotency_key is None:
+        return model_response(OrderService.create_order(db, order, user_id), status.HTTP_201_CREATED)
+    fingerprint = request_fingerprint({"user_id": user_id, "order": order.model_dump(mode="json")})
+    return idempotency_store.run(db, "orders:create", idempotency_key, fingerprint,
+                                 lambda store: OrderService.create_order(db, order, user_id, before_commit=store),
+                                 status.HTTP_201_CREATED)
 
-@router.get("/{order_id}", response_model=OrderResponse)
-def get_order(order_id: int, db: Session = Depends(get_db)):
+@router.post("/bulk", response_model=OrderBulkResponse, dependencies=[Depends(workload(WRITES)), Depends(require_permission("order:create"))])
+def create_orders_bulk(bulk: OrderBulkCreate, db: Session = Depends(get_db)):
+    """
+    Create up to 1000 orders, possibly for different users, in one request.
+    
+    Each item reports its own result; invalid items do not block the others.
+    """
+    return model_response(OrderService.create_orders_bulk(db, bulk))
+
+@router.get("/export", dependencies=[Depends(streaming_workload(READS)), Depends(require_permission("order:list"))])
+def export_orders(request: Request, format: ExportFormat = ExportFormat.NDJSON, user_id: Optional[int] = None,
+                  status: Optional[OrderStatus] = None, created_from: Optional[datetime] = None, created_to: Optional[datetime] = None):
+    """
+    Stream orders as NDJSON (default) or CSV.
+    
+    - **user_id** / **status**: optional filters
+    - **created_from** / **created_to**: optional created_at range, end exclusive
+    """
+    rows = held_body(request, OrderService.export_orders(format, user_id, status, created_from, created_to,
+                                                         getattr(request.state, "sessions", None)))
+    if format == ExportFormat.CSV:
+        return ClosingStreamingResponse(rows, media_type="text/csv", headers={"Content-Disposition": "attachment; filename=orders.csv"})
+    return ClosingStreamingResponse(rows, media_type="application/x-ndjson")
+
+@router.get("/analytics", response_model=OrderAnalyticsResponse, dependencies=[Depends(workload(READS)), Depends(require_permission("order:list"))])
+def order_analytics(start: datetime = Query(..., alias="from"), end: datetime = Query(..., alias="to"),
+                    granularity: RollupGranularity = RollupGranularity.DAY, db: Session = Depends(get_read_db)):
+    """
+    Order count and total_amount per status for each hour or day, by order_date.
+    
+    - **from** / **to**: range of buckets, from the one containing `from` up to `to`, exclusive
+    - **granularity**: hour or day (default)
+    
+    Served from precomputed rollups, never by scanning orders.
+    """
+    return model_response(OrderRollupService.get_analytics(db, granularity, start, end))
+
+@router.get("/search", response_model=OrderSearchResponse, dependencies=[Depends(workload(READS)), Depends(require_permission("order:list"))])
+def search_orders(user_id: Optional[int] = None, status: Optional[List[OrderStatus]] = Query(None),
+                  created_from: Optional[datetime] = None, created_to: Optional[datetime] = None,
+                  order_date_from: Optional[datetime] = None, order_date_to: Optional[datetime] = None,
+                  min_amount: Optional[Decimal] = None, max_amount: Optional[Decimal] = None,
+                  sort: Optional[OrderSortField] = None, direction: SortDirection = SortDirection.ASC,
+                  per_page: int = Query(10, ge=1, le=100), cursor: Optional[str] = None,
+                  db: Session = Depends(get_read_db)):
+    """
+    Search orders.
+    
+    - **user_id**, **status** (repeatable): equality filters
+    - **created_from**/**created_to**, **order_date_from**/**order_date_to**: date ranges, end exclusive
+    - **min_amount**/**max_amount**: total_amount range, inclusive
+    - **sort**/**direction**: order_id, created_at, order_date or total_amount; a range filter sorts by its own column
+    - **cursor**: next_cursor from the previous page
+    
+    Only one range can be used per search, and user_id together with status only sorts by order_id.
+    """
+    filters = OrderSearchFilters(user_id=user_id, status=status, created_from=created_from, created_to=created_to,
+                                 order_date_from=order_date_from, order_date_to=order_date_to,
+                                 min_amount=min_amount, max_amount=max_amount, sort=sort, direction=direction)
+    return model_response(OrderService.search_orders(db, filters, per_page, cursor))
+
+@router.get("/stream", dependencies=[Depends(streaming_workload(STREAMS)), Depends(require_permission("order:read"))])
+async def stream_orders(request: Request, user_id: Optional[int] = None, order_id: Optional[int] = None):
+    """
+    Server-sent events for order changes: order.created, order.updated,
+    order.status_changed and order.deleted, each carrying the order.
+    
+    - **user_id** / **order_id**: only send events for this user or order
+    
+    A client that falls more than EVENTS_QUEUE_SIZE events behind receives a
+    `dropped` event and the stream ends; reconnect and re-read to catch up.
+    The same stream is available over a WebSocket at this path.
+    """
+    subscription = order_events.subscribe(user_id, order_id)
+
+    async def events():
+        try:
+            yield ": connected\n\n"
+            while True:
+                try:
+                    message = await asyncio.wait_for(subscription.get(), timeout=EVENTS_KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                if message is None:
+                    yield "event: dropped\ndata: {}\n\n"
+                    return
+                event_id, event_type, data = parse_message(message)
+                yield f"id: {event_id}\nevent: {event_type}\ndata: {data}\n\n"
+        finally:
+            order_events.unsubscribe(subscription)
+
+    return ClosingStreamingResponse(held_body(request, events()), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+@router.websocket("/stream")
+async def stream_orders_ws(websocket: WebSocket, user_id: Optional[int] = None, order_id: Optional[int] = None,
+                           token: Optional[str] = None):
+    """
+    WebSocket variant of GET /orders/stream. Each message is the JSON event
+    data; pass the access token as ?token= when RBAC is enabled.
+    """
+    authorization = websocket.headers.get("authorization", "")
+    if authorization.lower().startswith("bearer "):
+        token = authorization[7:]
+    try:
+        check_permission(token, "order:read")
+    except HTTPException:
+        await websocket.close(code=1008)
+        return
+
+    await websocket.accept()
+    subscription = order_events.subscribe(user_id, order_id)
+
+    async def forward():
+        while True:
+            message = await subscription.get()
+            if message is None:
+                # Too slow to keep up, 1013 asks the client to reconnect later
+                await websocket.close(code=1013)
+                return
+            await websocket.send_text(parse_message(message)[2])
+
+    async def wait_for_disconnect():
+        try:
+            while True:
+                await websocket.receive_text()
+        except WebSocketDisconnect:
+            pass
+
+    tasks = [asyncio.create_task(forward()), asyncio.create_task(wait_for_disconnect())]
+    try:
+        await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        for task in tasks:
+            task.cancel()
+        order_events.unsubscribe(subscription)
+
+@router.get("/batch", response_model=OrderBatchResponse, dependencies=[Depends(workload(READS)), Depends(require_permission("order:read"))])
+def get_orders_batch(ids: List[int] = Depends(batch_ids), loaders: RequestLoaders = Depends(get_loaders)):
+    """Get several orders by ID in one request, e.g. ?ids=3,1,2"""
+    orders = loaders.orders.load_many(ids)
+    return model_response(OrderBatchResponse(orders=[order for order in orders if order is not None],
+                                             missing=[order_id for order_id, order in zip(ids, orders) if order is None]))
+
+@router.get("/{order_id}", response_model=OrderResponse, dependencies=[Depends(workload(READS)), Depends(require_permission("order:read"))])
+def get_order(order_id: int, db: Session = Depends(get_read_db)):
     """Get order by ID"""
-    return OrderService.get_order(db, order_id)
+    return model_response(OrderService.get_order(db, order_id))
 
-@router.put("/{order_id}", response_model=OrderResponse)
+@router.put("/{order_id}", response_model=OrderResponse, dependencies=[Depends(workload(WRITES)), Depends(require_permission("order:update"))])
 def update_order(order_id: int, order_update: OrderUpdate, db: Session = Depends(get_db)):
     """Update order by ID"""
-    return OrderService.update_order(db, order_id, order_update)
+    return model_response(OrderService.update_order(db, order_id, order_update))
 
-@router.delete("/{order_id}", status_code=status.HTTP_204_NO_CONTENT)
+@router.delete("/{order_id}", status_code=status.HTTP_204_NO_CONTENT, dependencies=[Depends(workload(WRITES)), Depends(require_permission("order:delete"))])
 def delete_order(order_id: int, db: Session = Depends(get_db)):
     """Delete order by ID"""
     OrderService.delete_order(db, order_id)
     return None
 
-@router.get("/", response_model=OrderListResponse)
-def list_orders(page: int = 1, per_page: int = 10, db: Session = Depends(get_db)):
-    """List all orders with pagination"""
-    return OrderService.list_orders(db, page, per_page)
+@router.get("/", response_model=OrderListResponse, dependencies=[Depends(workload(READS)), Depends(require_permission("order:list"))])
+def list_orders(page: int = 1, per_page: int = 10, cursor: Optional[str] = None,
+                total_mode: TotalMode = TotalMode.EXACT, db: Session = Depends(get_read_db)):
+    """List all orders with pagination (pass next_cursor as cursor for keyset paging)"""
+    return model_response(OrderService.list_orders(db, page, per_page, cursor, total_mode))
 
-@router.get("/user/{user_id}", response_model=OrderListResponse)
-def list_user_orders(user_id: int, page: int = 1, per_page: int = 10, db: Session = Depends(get_db)):
-    """List orders for a specific user"""
-    return OrderService.list_user_orders(db, user_id, page, per_page)
+@router.get("/user/{user_id}", response_model=OrderListResponse, dependencies=[Depends(workload(READS)), Depends(require_permission("order:list"))])
+def list_user_orders(user_id: int, page: int = 1, per_page: int = 10, cursor: Optional[str] = None,
+                     total_mode: TotalMode = TotalMode.EXACT, db: Session = Depends(get_read_db)):
+    """List orders for a specific user (pass next_cursor as cursor for keyset paging)"""
+    return model_response(OrderService.list_user_orders(db, user_id, page, per_page, cursor, total_mode))
 
-@router.patch("/{order_id}/status", response_model=OrderResponse)
+@router.patch("/{order_id}/status", response_model=OrderResponse, dependencies=[Depends(workload(WRITES)), Depends(require_permission("order:update_status"))])
 def update_order_status(order_id: int, status_update: OrderStatusUpdate, db: Session = Depends(get_db)):
     """Update order status"""
-    return OrderService.update_order_status(db, order_id, status_update.status)
+    return model_response(OrderService.update_order_status(db, order_id, status_update.status))
@@ -2,13 +2,15 @@
 
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
-from app.config.database import get_db
+from app.bulkheads import ADMIN
+from app.config.database import get_db, get_read_db
+from app.dependencies import workload, require_permission
 from app.services import PermissionService
 from app.validators import PermissionCreate, PermissionUpdate, PermissionResponse, PermissionListResponse
 
-router = APIRouter(prefix="/permissions", tags=["permissions"])
+router = APIRouter(prefix="/permissions", tags=["permissions"], dependencies=[Depends(workload(ADMIN))])
 
-@router.post("/", response_model=PermissionResponse, status_code=status.HTTP_201_CREATED)
+@router.post("/", response_model=PermissionResponse, status_code=status.HTTP_201_CREATED, dependencies=[Depends(require_permission("permission:create"))])
 def create_permission(permission: PermissionCreate, db: Session = Depends(get_db)):
     """
     Create a new permission.
@@ -19,8 +21,8 @@ def create_permission(permission: PermissionCreate, db: Session = Depends(get_db
     """
     return PermissionService.create_permission(db, permission)
 
-@router.get("/", response_model=PermissionListResponse)
-def list_permissions(db: Session = Depends(get_db)):
+@router.get("/", response_model=PermissionListResponse, dependencies=[Depends(require_permission("permission:list"))])
+def list_permissions(db: Session = Depends(get_read_db)):
     """
     Get all permissions in the system.
     
@@ -28,8 +30,8 @@ def list_permissions(db: Session = Depends(get_db)):
     """
     return PermissionService.list_permissions(db)
 
-@router.get("/{permission_id}", response_model=PermissionResponse)
-def get_permission(permission_id: int, db: Session = Depends(get_db)):
+@router.get("/{permission_id}", response_model=PermissionResponse, dependencies=[Depends(require_permission("permission:read"))])
+def get_permission(permission_id: int, db: Session = Depends(get_read_db)):
     """
     Get a specific permission by ID.
     
@@ -37,7 +39,7 @@ def get_permission(permission_id: int, db: Session = Depends(get_db)):
     """
     return PermissionService.get_permission(db, permission_id)
 
-@router.put("/{permission_id}", response_model=PermissionResponse)
+@router.put("/{permission_id}", response_model=PermissionResponse, dependencies=[Depends(require_permission("permission:update"))])
 def update_permission(permission_id: int, permission_update: PermissionUpdate, db: Session = Depends(get_db)):
     """
     Update a permission's information.
@@ -47,7 +49,7 @@ def update_permission(permission_id: int, permission_update: PermissionUpdate, d
     """
     return PermissionService.update_permission(db, permission_id, permission_update)
 
-@router.delete("/{permission_id}", status_code=status.HTTP_204_NO_CONTENT)
+@router.delete("/{permission_id}", status_code=status.HTTP_204_NO_CONTENT, dependencies=[Depends(require_permission("permission:delete"))])
 def delete_permission(permission_id: int, db: Session = Depends(get_db)):
     """
     Delete a permission.
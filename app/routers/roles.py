@@ -2,14 +2,16 @@
 
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
-from app.config.database import get_db
+from app.bulkheads import ADMIN
+from app.config.database import get_db, get_read_db
+from app.dependencies import workload, require_permission
 from app.services import RoleService
 from app.validators import RoleCreate, RoleUpdate, RoleResponse, RoleListResponse
 from typing import List
 
-router = APIRouter(prefix="/roles", tags=["roles"])
+router = APIRouter(prefix="/roles", tags=["roles"], dependencies=[Depends(workload(ADMIN))])
 
-@router.post("/", response_model=RoleResponse, status_code=status.HTTP_201_CREATED)
+@router.post("/", response_model=RoleResponse, status_code=status.HTTP_201_CREATED, dependencies=[Depends(require_permission("role:create"))])
 def create_role(role: RoleCreate, db: Session = Depends(get_db)):
     """
     Create a new role.
@@ -20,8 +22,8 @@ def create_role(role: RoleCreate, db: Session = Depends(get_db)):
     """
     return RoleService.create_role(db, role)
 
-@router.get("/", response_model=RoleListResponse)
-def list_roles(db: Session = Depends(get_db)):
+@router.get("/", response_model=RoleListResponse, dependencies=[Depends(require_permission("role:list"))])
+def list_roles(db: Session = Depends(get_read_db)):
     """
     Get all roles in the system.
     
@@ -29,8 +31,8 @@ def list_roles(db: Session = Depends(get_db)):
     """
     return RoleService.list_roles(db)
 
-@router.get("/{role_id}", response_model=RoleResponse)
-def get_role(role_id: int, db: Session = Depends(get_db)):
+@router.get("/{role_id}", response_model=RoleResponse, dependencies=[Depends(require_permission("role:read"))])
+def get_role(role_id: int, db: Session = Depends(get_read_db)):
     """
     Get a specific role by ID.
     
@@ -38,7 +40,7 @@ def get_role(role_id: int, db: Session = Depends(get_db)):
     """
     return RoleService.get_role(db, role_id)
 
-@router.put("/{role_id}", response_model=RoleResponse)
+@router.put("/{role_id}", response_model=RoleResponse, dependencies=[Depends(require_permission("role:update"))])
 def update_role(role_id: int, role_update: RoleUpdate, db: Session = Depends(get_db)):
     """
     Update a role's information.
@@ -48,7 +50,7 @@ def update_role(role_id: int, role_update: RoleUpdate, db: Session = Depends(get
     """
     return RoleService.update_role(db, role_id, role_update)
 
-@router.delete("/{role_id}", status_code=status.HTTP_204_NO_CONTENT)
+@router.delete("/{role_id}", status_code=status.HTTP_204_NO_CONTENT, dependencies=[Depends(require_permission("role:delete"))])
 def delete_role(role_id: int, db: Session = Depends(get_db)):
     """
     Delete a role.
@@ -60,8 +62,8 @@ def delete_role(role_id: int, db: Session = Depends(get_db)):
     RoleService.delete_role(db, role_id)
     return None
 
-@router.get("/{role_id}/permissions", response_model=List[dict])
-def get_role_permissions(role_id: int, db: Session = Depends(get_db)):
+@router.get("/{role_id}/permissions", response_model=List[dict], dependencies=[Depends(require_permission("role:read_permissions"))])
+def get_role_permissions(role_id: int, db: Session = Depends(get_read_db)):
     """
     Get all permissions assigned to a specific role.
     
@@ -70,7 +72,7 @@ def get_role_permissions(role_id: int, db: Session = Depends(get_db)):
     permissions = RoleService.get_role_permissions(db, role_id)
     return [{"permission_id": p.permission_id, "name": p.name, "key": p.key, "description": p.description} for p in permissions]
 
-@router.post("/{role_id}/permissions/{permission_id}", status_code=status.HTTP_204_NO_CONTENT)
+@router.post("/{role_id}/permissions/{permission_id}", status_code=status.HTTP_204_NO_CONTENT, dependencies=[Depends(require_permission("role_permission:assign"))])
 def assign_permission_to_role(role_id: int, permission_id: int, db: Session = Depends(get_db)):
     """
     Assign a permission to a role.
@@ -81,7 +83,7 @@ def assign_permission_to_role(role_id: int, permission_id: int, db: Session = De
     RoleService.assign_permission_to_role(db, role_id, permission_id)
     return None
 
-@router.delete("/{role_id}/permissions/{permission_id}", status_code=status.HTTP_204_NO_CONTENT)
+@router.delete("/{role_id}/permissions/{permission_id}", status_code=status.HTTP_204_NO_CONTENT, dependencies=[Depends(require_permission("role_permission:remove"))])
 def remove_permission_from_role(role_id: int, permission_id: int, db: Session = Depends(get_db)):
     """
     Remove a permission from a role.
@@ -2,35 +2,51 @@
 
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
-from app.config.database import get_db
-from app.services import UserService
-from app.validators import UserCreate, UserUpdate, UserResponse, UserListResponse
-from typing import List
+from app.bulkheads import READS, WRITES, AUTH
+from app.config.database import get_db, get_read_db
+from app.dependencies import workload, require_permission, batch_ids, get_loaders, RequestLoaders
+from app.responses import model_response
+from app.services import UserService, OrderStatsService
+from app.validators import UserCreate, UserUpdate, UserResponse, UserListResponse, UserBatchResponse, UserOrderStatsResponse, TotalMode
+from typing import List, Optional
 
 router = APIRouter(prefix="/users", tags=["users"])
 
-@router.post("/", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
+@router.post("/", response_model=UserResponse, status_code=status.HTTP_201_CREATED, dependencies=[Depends(workload(AUTH)), Depends(require_permission("user:create"))])
 def create_user(user: UserCreate, db: Session = Depends(get_db)):
     """Create a new user"""
-    return UserService.create_user(db, user)
+    return model_response(UserService.create_user(db, user), status.HTTP_201_CREATED)
 
-@router.get("/{user_id}", response_model=UserResponse)
-def get_user(user_id: int, db: Session = Depends(get_db)):
+@router.get("/batch", response_model=UserBatchResponse, dependencies=[Depends(workload(READS)), Depends(require_permission("user:read"))])
+def get_users_batch(ids: List[int] = Depends(batch_ids), loaders: RequestLoaders = Depends(get_loaders)):
+    """Get several users by ID in one request, e.g. ?ids=3,1,2"""
+    users = loaders.users.load_many(ids)
+    return model_response(UserBatchResponse(users=[user for user in users if user is not None],
+                                            missing=[user_id for user_id, user in zip(ids, users) if user is None]))
+
+@router.get("/{user_id}", response_model=UserResponse, dependencies=[Depends(workload(READS)), Depends(require_permission("user:read"))])
+def get_user(user_id: int, db: Session = Depends(get_read_db)):
     """Get user by ID"""
-    return UserService.get_user(db, user_id)
+    return model_response(UserService.get_user(db, user_id))
+
+@router.get("/{user_id}/order-stats", response_model=UserOrderStatsResponse, dependencies=[Depends(workload(READS)), Depends(require_permission("order:read"))])
+def get_user_order_stats(user_id: int, db: Session = Depends(get_read_db)):
+    """Order count, lifetime spend, last order date and count per status of a user, read from one summary row"""
+    return model_response(OrderStatsService.get_stats(db, user_id))
 
-@router.put("/{user_id}", response_model=UserResponse)
+@router.put("/{user_id}", response_model=UserResponse, dependencies=[Depends(workload(AUTH)), Depends(require_permission("user:update"))])
 def update_user(user_id: int, user_update: UserUpdate, db: Session = Depends(get_db)):
     """Update user by ID"""
-    return UserService.update_user(db, user_id, user_update)
+    return model_response(UserService.update_user(db, user_id, user_update))
 
-@router.delete("/{user_id}", status_code=status.HTTP_204_NO_CONTENT)
+@router.delete("/{user_id}", status_code=status.HTTP_204_NO_CONTENT, dependencies=[Depends(workload(WRITES)), Depends(require_permission("user:delete"))])
 def delete_user(user_id: int, db: Session = Depends(get_db)):
     """Delete user by ID"""
     UserService.delete_user(db, user_id)
     return None
 
-@router.get("/", response_model=UserListResponse)
-def list_users(page: int = 1, per_page: int = 10, db: Session = Depends(get_db)):
-    """List all users with pagination"""
-    return UserService.list_users(db, page, per_page)
+@router.get("/", response_model=UserListResponse, dependencies=[Depends(workload(READS)), Depends(require_permission("user:list"))])
+def list_users(page: int = 1, per_page: int = 10, cursor: Optional[str] = None,
+               total_mode: TotalMode = TotalMode.EXACT, db: Session = Depends(get_read_db)):
+    """List all users with pagination (pass next_cursor as cursor for keyset paging)"""
+    return model_response(UserService.list_users(db, page, per_page, cursor, total_mode))
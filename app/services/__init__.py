@@ -4,10 +4,18 @@ from .user_service import UserService
 from .order_service import OrderService
 from .role_service import RoleService
 from .permission_service import PermissionService
+from .async_user_service import AsyncUserService
+from .async_order_service import AsyncOrderService
+from .order_stats_service import OrderStatsService
+from .order_rollup_service import OrderRollupService
 
 __all__ = [
     "UserService",
     "OrderService", 
     "RoleService",
-    "PermissionService"
+    "PermissionService",
+    "AsyncUserService",
+    "AsyncOrderService",
+    "OrderStatsService",
+    "OrderRollupService"
 ]
@@ -0,0 +1,206 @@
+# app/services/async_order_service.py
+
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database.models import Order, User
+from app.validators import OrderCreate, OrderUpdate, OrderResponse, OrderListResponse, OrderStatus, TotalMode
+from app.services.order_service import OrderService
+from app.services.pagination import paginate_async
+from app.services.count_service import CountService
+from app.services.writes import FAST_WRITES, update_returning_async
+from app.services.order_stats_service import OrderStatsService
+from app.services.order_rollup_service import OrderRollupService
+from app.cache import order_cache
+from app.events import order_events
+from app.order_codes import ORDER_CODE_RETRIES
+from fastapi import HTTPException, status
+from typing import Optional
+
+class AsyncOrderService:
+    """
+    OrderService for the async routes (ASYNC_ROUTES).
+
+    Same behaviour, caches, counters and events as OrderService, with every
+    query awaited on an AsyncSession so a request waiting on the database
+    holds no thread.
+    """
+
+    @staticmethod
+    async def create_order(db: AsyncSession, order: OrderCreate, user_id: int) -> OrderResponse:
+        # Check if user exists
+        if await db.scalar(select(User.user_id).where(User.user_id == user_id)) is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
+
+        if order.order_code and await db.scalar(select(Order.order_id).where(Order.order_code == order.order_code)) is not None:
+            raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Order code already exists")
+
+        # Only a generated code can be retried, a supplied one is the client's to change
+        for _ in range(1 if order.order_code else ORDER_CODE_RETRIES):
+            order_code = order.order_code or OrderService.generate_order_code()
+            new_order = Order(
+                order_code=order_code,
+                user_id=user_id,
+                total_amount=order.total_amount,
+                status=OrderStatus.PENDING
+            )
+            db.add(new_order)
+            try:
+                await db.flush()
+                # One read of the server defaults (order_date...), for the rollups and the response alike
+                await db.refresh(new_order)
+                response = OrderResponse.model_validate(new_order)
+                await OrderStatsService.record_async(db, user_id, added=[(response.status, response.total_amount)])
+                await OrderRollupService.record_async(db, added=[(response.order_date, response.status, response.total_amount)])
+                await db.commit()
+                break
+            except IntegrityError:
+                await db.rollback()
+                if await db.scalar(select(Order.order_id).where(Order.order_code == order_code)) is None:
+                    raise
+                if order.order_code:
+                    # Taken by a concurrent request after the check above
+                    raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Order code already exists")
+                # A generated code collided, try a fresh one
+        else:
+            raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                                detail="Could not allocate a unique order code, please retry")
+        CountService.adjust(("orders", None), 1)
+        CountService.adjust(("orders", user_id), 1)
+        order_events.publish("order.created", response)
+        return response
+
+    @staticmethod
+    async def get_order(db: AsyncSession, order_id: int) -> OrderResponse:
+        return await order_cache.get_or_load_async(order_id, lambda: AsyncOrderService._load_order(db, order_id),
+                                                   db.info.get("replica", False))
+
+    @staticmethod
+    async def _load_order(db: AsyncSession, order_id: int) -> OrderResponse:
+        order = await db.scalar(select(Order).where(Order.order_id == order_id))
+        if not order:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Order not found")
+        return OrderResponse.model_validate(order)
+
+    @staticmethod
+    async def update_order(db: AsyncSession, order_id: int, order_update: OrderUpdate) -> OrderResponse:
+        values = order_update.model_dump(exclude_none=True)
+        if FAST_WRITES and values:
+            order, before = await AsyncOrderService._update_figures(db, order_id, values)
+            if not order:
+                raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Order not found")
+            await AsyncOrderService._record_change(db, order, before)
+            await db.commit()
+            order_cache.invalidate(order_id)
+            response = OrderResponse.model_validate(order)
+            order_events.publish("order.updated", response)
+            return response
+
+        order = await db.scalar(select(Order).where(Order.order_id == order_id).with_for_update())
+        if not order:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Order not found")
+        before = (order.status, order.total_amount)
+        if order_update.total_amount is not None:
+            order.total_amount = order_update.total_amount
+        if order_update.status is not None:
+            order.status = order_update.status
+
+        await db.flush()
+        await AsyncOrderService._record_change(db, order, before)
+        await db.commit()
+        order_cache.invalidate(order_id)
+        await db.refresh(order)
+        response = OrderResponse.model_validate(order)
+        order_events.publish("order.updated", response)
+        return response
+
+    @staticmethod
+    async def update_order_status(db: AsyncSession, order_id: int, new_status: OrderStatus) -> OrderResponse:
+        if FAST_WRITES:
+            order, before = await AsyncOrderService._update_figures(db, order_id, {"status": new_status})
+            if not order:
+                raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Order not found")
+            await AsyncOrderService._record_change(db, order, before)
+            await db.commit()
+            order_cache.invalidate(order_id)
+            response = OrderResponse.model_validate(order)
+            order_events.publish("order.status_changed", response)
+            return response
+
+        order = await db.scalar(select(Order).where(Order.order_id == order_id).with_for_update())
+        if not order:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Order not found")
+        before = (order.status, order.total_amount)
+        order.status = new_status
+        await db.flush()
+        await AsyncOrderService._record_change(db, order, before)
+        await db.commit()
+        order_cache.invalidate(order_id)
+        await db.refresh(order)
+        response = OrderResponse.model_validate(order)
+        order_events.publish("order.status_changed", response)
+        return response
+
+    @staticmethod
+    async def delete_order(db: AsyncSession, order_id: int):
+        order = await db.scalar(select(Order).where(Order.order_id == order_id).with_for_update())
+        if not order:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Order not found")
+        user_id = order.user_id
+        response = OrderResponse.model_validate(order)
+        await db.delete(order)
+        await db.flush()
+        await OrderStatsService.record_async(db, user_id, removed=[(order.status, order.total_amount)])
+        await OrderRollupService.record_async(db, removed=[(order.order_date, order.status, order.total_amount)])
+        await db.commit()
+        order_cache.invalidate(order_id)
+        CountService.adjust(("orders", None), -1)
+        CountService.adjust(("orders", user_id), -1)
+        order_events.publish("order.deleted", response)
+
+    @staticmethod
+    async def _update_figures(db: AsyncSession, order_id: int, values: dict):
+        """OrderService._update_figures() on an AsyncSession"""
+        cached = order_cache.peek(order_id)
+        if cached is not None:
+            before = (cached.status, cached.total_amount)
+            order = await update_returning_async(db, Order.order_id, order_id, values,
+                                                 expected={"status": before[0], "total_amount": before[1]})
+            if order:
+                return order, before
+        before = await AsyncOrderService._lock_figures(db, order_id)
+        if not before:
+            return None, None
+        return await update_returning_async(db, Order.order_id, order_id, values), tuple(before)
+
+    @staticmethod
+    async def _lock_figures(db: AsyncSession, order_id: int):
+        """OrderService._lock_figures() on an AsyncSession"""
+        return (await db.execute(select(Order.status, Order.total_amount).where(Order.order_id == order_id).with_for_update())).first()
+
+    @staticmethod
+    async def _record_change(db: AsyncSession, order, before):
+        """OrderService._record_change() on an AsyncSession"""
+        after = (order.status, order.total_amount)
+        if after == tuple(before):
+            return
+        await OrderStatsService.record_async(db, order.user_id, removed=[before], added=[after])
+        await OrderRollupService.record_async(db, removed=[(order.order_date, *before)], added=[(order.order_date, *after)])
+
+    @staticmethod
+    async def list_orders(db: AsyncSession, page: int = 1, per_page: int = 10, cursor: Optional[str] = None,
+                          total_mode: TotalMode = TotalMode.EXACT) -> OrderListResponse:
+        stmt = select(Order)
+        total = await CountService.get_total_async(db, stmt, ("orders", None), total_mode)
+        orders, next_cursor = await paginate_async(db, stmt, Order.order_id, page, per_page, cursor)
+        return OrderListResponse(orders=[OrderResponse.model_validate(order) for order in orders], total=total, total_mode=total_mode,
+                                 page=page, per_page=per_page, next_cursor=next_cursor)
+
+    @staticmethod
+    async def list_user_orders(db: AsyncSession, user_id: int, page: int = 1, per_page: int = 10, cursor: Optional[str] = None,
+                               total_mode: TotalMode = TotalMode.EXACT) -> OrderListResponse:
+        stmt = select(Order).where(Order.user_id == user_id)
+        total = await CountService.get_total_async(db, stmt, ("orders", user_id), total_mode)
+        orders, next_cursor = await paginate_async(db, stmt, Order.order_id, page, per_page, cursor)
+        return OrderListResponse(orders=[OrderResponse.model_validate(order) for order in orders], total=total, total_mode=total_mode,
+                                 page=page, per_page=per_page, next_cursor=next_cursor)
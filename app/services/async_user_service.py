@@ -0,0 +1,131 @@
+# app/services/async_user_service.py
+
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload
+from starlette.concurrency import run_in_threadpool
+from app.database.models import User, Role, Order, UserOrderStats
+from app.validators import UserCreate, UserUpdate, UserResponse, UserListResponse, TotalMode
+from app.utils import hash_password
+from app.services.pagination import paginate_async
+from app.services.count_service import CountService
+from app.services.order_stats_service import OrderStatsService
+from app.services.writes import FAST_WRITES, update_by_pk_async
+from app.cache import user_cache
+from fastapi import HTTPException, status
+from typing import Optional
+
+class AsyncUserService:
+    """
+    UserService for the async routes (ASYNC_ROUTES).
+
+    Queries are awaited on an AsyncSession; bcrypt still runs through the
+    hashing pool, called from the threadpool so it never blocks the loop.
+    """
+
+    @staticmethod
+    async def create_user(db: AsyncSession, user: UserCreate) -> UserResponse:
+        if await db.scalar(select(User.user_id).where(User.email == user.email)) is not None:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Email already registered")
+
+        # Get role_id - either provided or default to customer role
+        role_id = user.role_id
+        if not role_id:
+            role_id = await db.scalar(select(Role.role_id).where(Role.key == "customer"))
+            if not role_id:
+                raise HTTPException(
+                    status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                    detail="Default customer role not found. Please contact administrator."
+                )
+
+        # Validate that the role exists, and keep it for the response
+        role = await db.get(Role, role_id)
+        if not role:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Role with ID {role_id} not found"
+            )
+
+        new_user = User(
+            username=user.username,
+            email=user.email,
+            hashed_password=await run_in_threadpool(hash_password, user.password),
+            role_id=role_id
+        )
+        db.add(new_user)
+        await db.flush()
+        await OrderStatsService.create_async(db, new_user.user_id)
+        await db.commit()
+        # The role is already in the identity map, so the refresh loads it without another query
+        await db.refresh(new_user, ["created_at", "role"])
+        CountService.adjust(("users", None), 1)
+        return UserResponse.model_validate(new_user)
+
+    @staticmethod
+    async def get_user(db: AsyncSession, user_id: int) -> UserResponse:
+        return await user_cache.get_or_load_async(user_id, lambda: AsyncUserService._load_user(db, user_id),
+                                                  db.info.get("replica", False))
+
+    @staticmethod
+    async def _load_user(db: AsyncSession, user_id: int) -> UserResponse:
+        user = await db.scalar(select(User).options(joinedload(User.role)).where(User.user_id == user_id))
+        if not user:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
+        return UserResponse.model_validate(user)
+
+    @staticmethod
+    async def update_user(db: AsyncSession, user_id: int, user_update: UserUpdate) -> UserResponse:
+        hashed_password = await run_in_threadpool(hash_password, user_update.password) if user_update.password else None
+        if FAST_WRITES:
+            values = {}
+            if user_update.username:
+                values["username"] = user_update.username
+            if user_update.email:
+                values["email"] = user_update.email
+            if hashed_password:
+                values["hashed_password"] = hashed_password
+            if values:
+                if not await update_by_pk_async(db, User.user_id, user_id, values):
+                    raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
+                await db.commit()
+                user_cache.invalidate(user_id)
+            # Read back with the role joined in, RETURNING cannot carry the relationship
+            return await AsyncUserService.get_user(db, user_id)
+
+        user = await db.scalar(select(User).options(joinedload(User.role)).where(User.user_id == user_id))
+        if not user:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
+        if user_update.username:
+            user.username = user_update.username
+        if user_update.email:
+            user.email = user_update.email
+        if hashed_password:
+            user.hashed_password = hashed_password
+
+        await db.commit()
+        user_cache.invalidate(user_id)
+        await db.refresh(user)
+        return UserResponse.model_validate(user)
+
+    @staticmethod
+    async def delete_user(db: AsyncSession, user_id: int):
+        user = await db.scalar(select(User).where(User.user_id == user_id))
+        if not user:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
+        if await db.scalar(select(Order.order_id).where(Order.user_id == user_id).limit(1)) is not None:
+            raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="User has orders, delete them first")
+        await db.execute(delete(UserOrderStats).where(UserOrderStats.user_id == user_id))
+        await db.delete(user)
+        await db.commit()
+        user_cache.invalidate(user_id)
+        CountService.adjust(("users", None), -1)
+
+    @staticmethod
+    async def list_users(db: AsyncSession, page: int = 1, per_page: int = 10, cursor: Optional[str] = None,
+                         total_mode: TotalMode = TotalMode.EXACT) -> UserListResponse:
+        stmt = select(User)
+        total = await CountService.get_total_async(db, stmt, ("users", None), total_mode)
+        # Load roles in the same SELECT so serialising UserResponse.role doesn't query per user
+        users, next_cursor = await paginate_async(db, stmt.options(joinedload(User.role)), User.user_id, page, per_page, cursor)
+        return UserListResponse(users=[UserResponse.model_validate(user) for user in users], total=total, total_mode=total_mode,
+                                page=page, per_page=per_page, next_cursor=next_cursor)
@@ -0,0 +1,93 @@
+# app/services/authorization_service.py
+
+import os
+import threading
+import time
+from typing import Dict, Optional
+from sqlalchemy.orm import Session
+from app.config.database import SessionLocal
+from app.database.models import Permission, RolePermission
+
+# Safety net for changes made by other workers, local writes patch the engine directly
+RBAC_REFRESH_SECONDS = float(os.getenv("RBAC_REFRESH_SECONDS", "60"))
+
+class _Snapshot:
+    """Immutable view of the compiled permissions, swapped atomically on change"""
+    __slots__ = ("bits", "masks", "loaded_at")
+
+    def __init__(self, bits: Dict[str, int], masks: Dict[int, int], loaded_at: float):
+        self.bits = bits        # permission key -> bit (1 << permission_id)
+        self.masks = masks      # role_id -> OR of the bits granted to the role
+        self.loaded_at = loaded_at
+
+class PermissionEngine:
+    """
+    In-memory RBAC engine.
+
+    Each role's permissions are compiled into a single integer bitset where the
+    bit for a permission is its permission_id. A check is a dict lookup plus a
+    bitwise AND and never touches the database. The tables are read once, then
+    kept current by grant/revoke from RoleService and by invalidate() from the
+    other RBAC writes; a full reload also happens every RBAC_REFRESH_SECONDS.
+    """
+
+    def __init__(self, session_factory=SessionLocal, refresh_seconds: float = RBAC_REFRESH_SECONDS):
+        self._session_factory = session_factory
+        self._refresh_seconds = refresh_seconds
+        self._lock = threading.Lock()
+        self._snapshot: Optional[_Snapshot] = None
+
+    def has_permission(self, role_id: int, permission_key: str) -> bool:
+        """Check whether a role is granted a permission key"""
+        snapshot = self._snapshot
+        if self._is_stale(snapshot):
+            snapshot = self.reload()
+        bit = snapshot.bits.get(permission_key)
+        return bit is not None and snapshot.masks.get(role_id, 0) & bit != 0
+
+    def reload(self, db: Optional[Session] = None, force: bool = False) -> _Snapshot:
+        """Compile all role permissions from the database, unless another thread just did (see force)"""
+        with self._lock:
+            # Threads that found the snapshot stale queue on the lock, only the first one needs to load it
+            if not force and not self._is_stale(self._snapshot):
+                return self._snapshot
+            owns_session = db is None
+            db = db or self._session_factory()
+            try:
+                bits = {key: 1 << permission_id for permission_id, key in db.query(Permission.permission_id, Permission.key)}
+                masks: Dict[int, int] = {}
+                for role_id, permission_id in db.query(RolePermission.role_id, RolePermission.permission_id):
+                    masks[role_id] = masks.get(role_id, 0) | (1 << permission_id)
+            finally:
+                if owns_session:
+                    db.close()
+            self._snapshot = _Snapshot(bits, masks, time.monotonic())
+            return self._snapshot
+
+    def grant(self, role_id: int, permission_id: int):
+        """Patch a newly assigned permission into the compiled role bitset"""
+        self._patch(role_id, lambda mask: mask | (1 << permission_id))
+
+    def revoke(self, role_id: int, permission_id: int):
+        """Patch a removed permission out of the compiled role bitset"""
+        self._patch(role_id, lambda mask: mask & ~(1 << permission_id))
+
+    def invalidate(self):
+        """Drop the compiled state so the next check reloads it"""
+        with self._lock:
+            self._snapshot = None
+
+    def _is_stale(self, snapshot: Optional[_Snapshot]) -> bool:
+        return snapshot is None or time.monotonic() - snapshot.loaded_at > self._refresh_seconds
+
+    def _patch(self, role_id: int, update):
+        with self._lock:
+            snapshot = self._snapshot
+            if snapshot is None:
+                return
+            masks = dict(snapshot.masks)
+            masks[role_id] = update(masks.get(role_id, 0))
+            self._snapshot = _Snapshot(snapshot.bits, masks, snapshot.loaded_at)
+
+# Process-wide engine used by the require_permission dependency
+permission_engine = PermissionEngine()
@@ -0,0 +1,101 @@
+# app/services/count_service.py
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Hashable, Optional, Tuple
+from sqlalchemy import Select, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Query
+from app.validators import TotalMode
+
+# How long a cached counter is trusted before it is reconciled with COUNT(*)
+COUNT_RECONCILE_SECONDS = float(os.getenv("COUNT_RECONCILE_SECONDS", "60"))
+# Upper bound on tracked scopes (one per user_id), least recently used are dropped
+COUNT_MAX_SCOPES = int(os.getenv("COUNT_MAX_SCOPES", "10000"))
+
+class CountService:
+    """
+    In-memory row counters backing the `total` of paginated list responses.
+
+    Counters are kept per scope, e.g. ("orders", None) for all orders and
+    ("orders", user_id) for the orders of one user. The create/delete paths
+    adjust them in place, and a counter older than COUNT_RECONCILE_SECONDS is
+    recomputed with COUNT(*) on its next read, which also corrects drift from
+    writes made by other workers. Reconciling happens on read only, there is
+    no background job: a scope nobody lists is never counted, and one that is
+    listed is at most COUNT_RECONCILE_SECONDS out of date.
+    """
+    _counters: "OrderedDict[Hashable, Tuple[int, float]]" = OrderedDict()
+    _lock = threading.Lock()
+
+    @classmethod
+    def get_total(cls, query: Query, scope: Hashable, mode: TotalMode) -> Optional[int]:
+        """Return the total for a list query according to the requested mode"""
+        if mode == TotalMode.NONE:
+            return None
+        if mode == TotalMode.CACHED:
+            cached = cls._fresh(scope)
+            if cached is not None:
+                return cached
+
+        # Exact reads and stale/missing counters both refresh the cached value
+        total = cls._count(query)
+        cls.reconcile(scope, total)
+        return total
+
+    @staticmethod
+    def _count(query: Query) -> int:
+        if query.session.info.get("shard_router") is None:
+            return query.count()
+        # Query.count() expects one row, a query that runs on several shards returns a count from each
+        counts = query.session.execute(select(func.count()).select_from(query.order_by(None).subquery())).scalars()
+        return sum(counts)
+
+    @classmethod
+    async def get_total_async(cls, db: AsyncSession, stmt: Select, scope: Hashable, mode: TotalMode) -> Optional[int]:
+        """get_total() for a select() run on an AsyncSession"""
+        if mode == TotalMode.NONE:
+            return None
+        if mode == TotalMode.CACHED:
+            cached = cls._fresh(scope)
+            if cached is not None:
+                return cached
+
+        total = await db.scalar(select(func.count()).select_from(stmt.order_by(None).subquery()))
+        cls.reconcile(scope, total)
+        return total
+
+    @classmethod
+    def _fresh(cls, scope: Hashable) -> Optional[int]:
+        """The counter for a scope if it was reconciled recently enough to be trusted"""
+        with cls._lock:
+            entry = cls._counters.get(scope)
+            if entry and time.monotonic() - entry[1] < COUNT_RECONCILE_SECONDS:
+                cls._counters.move_to_end(scope)
+                return entry[0]
+        return None
+
+    @classmethod
+    def reconcile(cls, scope: Hashable, total: int):
+        """Store an authoritative total for a scope"""
+        with cls._lock:
+            cls._counters[scope] = (total, time.monotonic())
+            cls._counters.move_to_end(scope)
+            while len(cls._counters) > COUNT_MAX_SCOPES:
+                cls._counters.popitem(last=False)
+
+    @classmethod
+    def adjust(cls, scope: Hashable, delta: int):
+        """Apply a create (+1) or delete (-1) to a scope that is already being tracked"""
+        with cls._lock:
+            entry = cls._counters.get(scope)
+            if entry:
+                cls._counters[scope] = (max(entry[0] + delta, 0), entry[1])
+
+    @classmethod
+    def clear(cls):
+        """Drop all counters"""
+        with cls._lock:
+            cls._counters.clear()
@@ -0,0 +1,231 @@
+# app/services/order_rollup_service.py
+
+import logging
+import os
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+from decimal import Decimal
+from typing import Iterable, List, Tuple
+from sqlalchemy import delete, insert, select, union_all, update
+from sqlalchemy.engine import Connection
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from app.config.database import engine
+from app.database.models import OrderRollup, OrderRollupDelta
+from app.validators import OrderStatus, RollupGranularity, OrderStatusRollup, OrderRollupBucket, OrderAnalyticsResponse
+from fastapi import HTTPException, status
+
+# Seconds between compactor runs in each worker, 0 leaves the deltas to rebuild_order_rollups.py
+ROLLUP_COMPACT_SECONDS = float(os.getenv("ROLLUP_COMPACT_SECONDS", "5"))
+# Deltas folded per compactor transaction
+ROLLUP_COMPACT_BATCH_SIZE = int(os.getenv("ROLLUP_COMPACT_BATCH_SIZE", "5000"))
+# Most buckets one analytics request may span
+ROLLUP_MAX_BUCKETS = int(os.getenv("ROLLUP_MAX_BUCKETS", "2000"))
+
+# Length of each bucket
+BUCKET_LENGTHS = {RollupGranularity.HOUR: timedelta(hours=1), RollupGranularity.DAY: timedelta(days=1)}
+
+# (order_date, status, total_amount) of an order as it was before or is after a write
+RollupFigures = Tuple[datetime, OrderStatus, Decimal]
+
+logger = logging.getLogger(__name__)
+
+deltas_table = OrderRollupDelta.__table__
+rollups_table = OrderRollup.__table__
+
+def bucket_start(moment: datetime, granularity: RollupGranularity) -> datetime:
+    """Start of the hour or day containing `moment`"""
+    moment = moment.replace(minute=0, second=0, microsecond=0)
+    return moment.replace(hour=0) if granularity == RollupGranularity.DAY else moment
+
+class OrderRollupService:
+    """
+    Hourly and daily order counts and totals per status, by order_date.
+
+    Order writes never touch the rollups themselves: record() appends the
+    write's net change to order_rollup_deltas, and the compactor folds the
+    deltas into order_rollups in the background. Analytics reads add the few
+    deltas not yet folded, so they are exact and only read the requested
+    buckets, however many orders there are.
+    """
+
+    @staticmethod
+    def record(db: Session, removed: Iterable[RollupFigures] = (), added: Iterable[RollupFigures] = ()):
+        """
+        Log an order write for the rollups: a create adds one order, a delete
+        removes one, an update removes the old figures and adds the new ones.
+        Call before committing the write. On a sharded setup the deltas go to
+        the global database, which the session commits separately from the
+        shard: a failure between the two commits leaves the rollups out of step
+        with the orders until rebuild_order_rollups.py is run for those days.
+        """
+        rows = OrderRollupService.deltas(removed, added)
+        if rows:
+            db.execute(insert(deltas_table), rows)
+        rollup_compactor.start()
+
+    @staticmethod
+    async def record_async(db: AsyncSession, removed: Iterable[RollupFigures] = (), added: Iterable[RollupFigures] = ()):
+        """record() on an AsyncSession"""
+        rows = OrderRollupService.deltas(removed, added)
+        if rows:
+            await db.execute(insert(deltas_table), rows)
+        rollup_compactor.start()
+
+    @staticmethod
+    def deltas(removed: Iterable[RollupFigures], added: Iterable[RollupFigures]) -> List[dict]:
+        """order_rollup_deltas rows of the net change per hour and status, none when the rollups are unaffected"""
+        changes = defaultdict(lambda: [0, Decimal(0)])
+        for figures, sign in [(figures, -1) for figures in removed] + [(figures, 1) for figures in added]:
+            order_date, order_status, amount = figures
+            change = changes[(bucket_start(order_date, RollupGranularity.HOUR), order_status)]
+            change[0] += sign
+            change[1] += amount * sign
+        return [
+            {"bucket_start": hour, "status": order_status, "order_count": count, "total_amount": amount}
+            for (hour, order_status), (count, amount) in changes.items() if count or amount
+        ]
+
+    @staticmethod
+    def get_analytics(db: Session, granularity: RollupGranularity, start: datetime, end: datetime) -> OrderAnalyticsResponse:
+        """Buckets from the one containing `start` up to `end`, exclusive"""
+        if end <= start:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="from must be before to")
+        length = BUCKET_LENGTHS[granularity]
+        first = bucket_start(start, granularity)
+        stop = bucket_start(end, granularity)
+        if stop < end:
+            stop += length
+        if (stop - first) / length > ROLLUP_MAX_BUCKETS:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
+                                detail=f"At most {ROLLUP_MAX_BUCKETS} {granularity.value} buckets can be requested at a time")
+        rollup_compactor.start()
+
+        # One statement, so a compaction committing in between cannot count a delta twice or not at all
+        compacted = select(rollups_table.c.bucket_start, rollups_table.c.status, rollups_table.c.order_count, rollups_table.c.total_amount).where(
+            rollups_table.c.granularity == granularity.value, rollups_table.c.bucket_start >= first, rollups_table.c.bucket_start < stop
+        )
+        pending = select(deltas_table.c.bucket_start, deltas_table.c.status, deltas_table.c.order_count, deltas_table.c.total_amount).where(
+            deltas_table.c.bucket_start >= first, deltas_table.c.bucket_start < stop
+        )
+        sums = defaultdict(lambda: defaultdict(lambda: [0, Decimal("0.00")]))
+        for row in db.execute(union_all(compacted, pending)):
+            figures = sums[bucket_start(row.bucket_start, granularity)][row.status]
+            figures[0] += row.order_count
+            figures[1] += row.total_amount
+
+        buckets = []
+        for start_of_bucket in sorted(sums):
+            by_status = sums[start_of_bucket]
+            if not any(count or amount for count, amount in by_status.values()):
+                continue
+            statuses = {
+                order_status: OrderStatusRollup(order_count=by_status[order_status][0], total_amount=by_status[order_status][1])
+                for order_status in OrderStatus
+            }
+            buckets.append(OrderRollupBucket(
+                bucket_start=start_of_bucket,
+                order_count=sum(figures.order_count for figures in statuses.values()),
+                total_amount=sum((figures.total_amount for figures in statuses.values()), Decimal(0)),
+                statuses=statuses,
+            ))
+        return OrderAnalyticsResponse(granularity=granularity, buckets=buckets)
+
+    @staticmethod
+    def fold(connection: Connection, batch_size: int = ROLLUP_COMPACT_BATCH_SIZE) -> int:
+        """
+        Fold up to `batch_size` of the oldest deltas into the hourly and daily
+        rollups and delete them, returning how many were folded. Deltas another
+        compactor holds locked are skipped, so workers never fold one twice.
+        """
+        deltas = connection.execute(
+            select(deltas_table).order_by(deltas_table.c.delta_id).limit(batch_size).with_for_update(skip_locked=True)
+        ).all()
+        if not deltas:
+            return 0
+        sums = defaultdict(lambda: [0, Decimal(0)])
+        for delta in deltas:
+            for granularity in RollupGranularity:
+                figures = sums[(granularity.value, bucket_start(delta.bucket_start, granularity), delta.status)]
+                figures[0] += delta.order_count
+                figures[1] += delta.total_amount
+
+        for (granularity, start_of_bucket, order_status), (count, amount) in sums.items():
+            if not count and not amount:
+                continue
+            key = {"granularity": granularity, "bucket_start": start_of_bucket, "status": order_status}
+            stmt = update(rollups_table).where(*(rollups_table.c[column] == value for column, value in key.items())).values(
+                order_count=rollups_table.c.order_count + count, total_amount=rollups_table.c.total_amount + amount
+            )
+            if connection.execute(stmt).rowcount == 0:
+                connection.execute(insert(rollups_table).values(**key, order_count=count, total_amount=amount))
+        connection.execute(delete(deltas_table).where(deltas_table.c.delta_id.in_([delta.delta_id for delta in deltas])))
+        return len(deltas)
+
+class RollupCompactor:
+    """
+    Background thread of each worker folding order_rollup_deltas into
+    order_rollups every ROLLUP_COMPACT_SECONDS.
+    """
+
+    def __init__(self, interval_seconds: float = ROLLUP_COMPACT_SECONDS, batch_size: int = ROLLUP_COMPACT_BATCH_SIZE):
+        self.interval_seconds = interval_seconds
+        self.batch_size = batch_size
+        self._lock = threading.Lock()
+        self._thread = None
+        self._runs = 0
+        self._folded = 0
+        self._failures = 0
+        self._last_run = None
+
+    def start(self):
+        # Started on first use so importing the app starts no thread, and after the worker has forked
+        if self.interval_seconds <= 0:
+            return
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._run, name="rollup-compactor", daemon=True)
+        self._thread.start()
+
+    def compact(self) -> int:
+        """Fold deltas until none are left, returning how many were folded"""
+        folded = 0
+        while True:
+            with engine.begin() as connection:
+                batch = OrderRollupService.fold(connection, self.batch_size)
+            folded += batch
+            if batch < self.batch_size:
+                break
+        with self._lock:
+            self._runs += 1
+            self._folded += folded
+            self._last_run = time.time()
+        return folded
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "running": self._thread is not None,
+                "interval_seconds": self.interval_seconds,
+                "runs": self._runs,
+                "folded": self._folded,
+                "failures": self._failures,
+                "last_run": self._last_run,
+            }
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval_seconds)
+            try:
+                self.compact()
+            except Exception:
+                # E.g. two workers creating the same new bucket; the deltas stay and are folded next time
+                with self._lock:
+                    self._failures += 1
+                logger.exception("Order rollup compaction failed")
+
+# Folds the deltas logged by OrderService writes
+rollup_compactor = RollupCompactor()
@@ -1,46 +1,225 @@
 # app/services/order_service.py
 
+from sqlalchemy import insert, select, union_all
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 from app.database.models import Order, User
-from app.validators import OrderCreate, OrderUpdate, OrderResponse, OrderListResponse, OrderStatus
+from app.validators import OrderCreate, OrderUpdate, OrderResponse, OrderListResponse, OrderStatus, TotalMode
+from app.validators import OrderBulkCreate, OrderBulkItemResult, OrderBulkResponse, ExportFormat
+from app.validators import OrderSearchFilters, OrderSearchResponse, OrderSortField, SortDirection
+from app.config.database import open_read_session, close_read_session
+from app.services.pagination import paginate, seek_after
+from app.utils import encode_cursor, decode_cursor
+from app.services.count_service import CountService
+from app.services.writes import FAST_WRITES, update_returning
+from app.services.order_stats_service import OrderStatsService, OrderFigures
+from app.services.order_rollup_service import OrderRollupService
+from app.cache import order_cache
+from app.events import order_events
+from app.order_codes import order_code_generator, ORDER_CODE_RETRIES
 from fastapi import HTTPException, status
-import uuid
+from collections import Counter, defaultdict
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+from typing import Callable, Dict, Iterator, List, Optional
+import csv
+import io
+import json
+
+# Columns written by the order export, in output order
+EXPORT_COLUMNS = ("order_id", "order_code", "user_id", "order_date", "total_amount", "status", "created_at", "updated_at")
+# Rows fetched per server-side cursor batch during an export
+EXPORT_BATCH_SIZE = 1000
+# Filter shapes accepted by search_orders, (equality filters, sort/range column) -> index that serves it.
+# Anything else is rejected so a search can never fall back to a full scan and sort.
+SEARCH_INDEXES = {
+    ((), "order_id"): "PRIMARY",
+    ((), "created_at"): "ix_orders_created_at_order_id",
+    ((), "order_date"): "ix_orders_order_date_order_id",
+    ((), "total_amount"): "ix_orders_total_amount_order_id",
+    (("user_id",), "order_id"): "ix_orders_user_id_order_id",
+    (("user_id",), "created_at"): "ix_orders_user_id_created_at_order_id",
+    (("user_id",), "order_date"): "ix_orders_user_id_order_date_order_id",
+    (("user_id",), "total_amount"): "ix_orders_user_id_total_amount_order_id",
+    (("status",), "order_id"): "ix_orders_status_order_id",
+    (("status",), "created_at"): "ix_orders_status_created_at_order_id",
+    (("status",), "order_date"): "ix_orders_status_order_date_order_id",
+    (("status",), "total_amount"): "ix_orders_status_total_amount_order_id",
+    (("user_id", "status"), "order_id"): "ix_orders_user_id_status_order_id",
+}
 
 class OrderService:
     @staticmethod
-    def create_order(db: Session, order: OrderCreate, user_id: int) -> OrderResponse:
+    def generate_order_code() -> str:
+        return order_code_generator.generate()
+
+    @staticmethod
+    def create_order(db: Session, order: OrderCreate, user_id: int,
+                     before_commit: Optional[Callable[[OrderResponse], None]] = None) -> OrderResponse:
+        """
+        Create an order for a user. `before_commit` is called with the response
+        inside the order's transaction, e.g. to store it for an idempotency key.
+        """
         # Check if user exists
         user = db.query(User).filter_by(user_id=user_id).first()
         if not user:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
         
-        # Generate order code if not provided
-        order_code = order.order_code or f"ORD-{uuid.uuid4().hex[:8].upper()}"
-        
-        # Create new order
-        new_order = Order(
-            order_code=order_code,
-            user_id=user_id,
-            total_amount=order.total_amount,
-            status=OrderStatus.PENDING
-        )
-        db.add(new_order)
-        db.commit()
-        db.refresh(new_order)
-        return OrderResponse.model_validate(new_order)
+        if order.order_code and db.query(Order.order_id).filter_by(order_code=order.order_code).first():
+            raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Order code already exists")
+
+        # Only a generated code can be retried, a supplied one is the client's to change
+        for _ in range(1 if order.order_code else ORDER_CODE_RETRIES):
+            # Generate order code if not provided
+            order_code = order.order_code or OrderService.generate_order_code()
+            
+            # Create new order
+            new_order = Order(
+                order_code=order_code,
+                user_id=user_id,
+                total_amount=order.total_amount,
+                status=OrderStatus.PENDING
+            )
+            db.add(new_order)
+            try:
+                db.flush()
+                # One read of the server defaults (order_date...), for the rollups and the response alike
+                db.refresh(new_order)
+                response = OrderResponse.model_validate(new_order)
+                OrderStatsService.record(db, user_id, added=[(response.status, response.total_amount)])
+                OrderRollupService.record(db, added=[(response.order_date, response.status, response.total_amount)])
+                if before_commit is not None:
+                    before_commit(response)
+                db.commit()
+                break
+            except IntegrityError:
+                db.rollback()
+                if not db.query(Order.order_id).filter_by(order_code=order_code).first():
+                    raise
+                if order.order_code:
+                    # Taken by a concurrent request after the check above
+                    raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Order code already exists")
+                # A generated code collided, try a fresh one
+        else:
+            raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                                detail="Could not allocate a unique order code, please retry")
+        CountService.adjust(("orders", None), 1)
+        CountService.adjust(("orders", user_id), 1)
+        order_events.publish("order.created", response)
+        return response
+
+    @staticmethod
+    def create_orders_bulk(db: Session, bulk: OrderBulkCreate) -> OrderBulkResponse:
+        """
+        Create many orders with a fixed number of round trips: one SELECT for the
+        referenced users, one for clashing order codes, one multi-row INSERT and
+        one SELECT to read back the created rows, plus one order summary UPDATE
+        per user and one INSERT of rollup deltas. Items that fail validation are
+        reported individually and do not stop the rest of the batch.
+        """
+        items = bulk.orders
+        user_ids = {item.user_id for item in items}
+        existing_users = {row.user_id for row in db.query(User.user_id).filter(User.user_id.in_(user_ids))}
+
+        supplied_codes = [item.order_code for item in items if item.order_code]
+        taken_codes = set()
+        if supplied_codes:
+            taken_codes = {row.order_code for row in db.query(Order.order_code).filter(Order.order_code.in_(supplied_codes))}
+
+        errors = {}
+        rows = []
+        row_indexes = []
+        for index, item in enumerate(items):
+            if item.user_id not in existing_users:
+                errors[index] = "User not found"
+                continue
+            order_code = item.order_code or OrderService.generate_order_code()
+            if order_code in taken_codes:
+                errors[index] = "Order code already exists"
+                continue
+            taken_codes.add(order_code)
+            rows.append({
+                "order_code": order_code,
+                "user_id": item.user_id,
+                "total_amount": item.total_amount,
+                "status": OrderStatus.PENDING,
+            })
+            row_indexes.append(index)
+
+        created = {}
+        if rows:
+            shard_router = db.info.get("shard_router")
+            try:
+                if shard_router is None:
+                    db.execute(insert(Order), rows)
+                else:
+                    shard_router.insert_rows(db, Order.__table__, rows)
+                # Read back before committing, the rollups need the order_date the database assigned
+                codes = [row["order_code"] for row in rows]
+                created = {order.order_code: order for order in db.execute(select(Order.__table__).where(Order.order_code.in_(codes)))}
+                added = defaultdict(list)
+                for row in rows:
+                    added[row["user_id"]].append((row["status"], row["total_amount"]))
+                for user_id, figures in added.items():
+                    OrderStatsService.record(db, user_id, added=figures)
+                OrderRollupService.record(db, added=[(order.order_date, order.status, order.total_amount) for order in created.values()])
+                db.commit()
+            except IntegrityError:
+                # A concurrent request took one of the codes between the check and the insert
+                db.rollback()
+                raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Order code conflict, please retry the batch")
+
+            CountService.adjust(("orders", None), len(rows))
+            for user_id, count in Counter(row["user_id"] for row in rows).items():
+                CountService.adjust(("orders", user_id), count)
+
+        results = [OrderBulkItemResult(index=index, success=False, error=error) for index, error in errors.items()]
+        for index, row in zip(row_indexes, rows):
+            response = OrderResponse.model_validate(created[row["order_code"]])
+            order_events.publish("order.created", response)
+            results.append(OrderBulkItemResult(index=index, success=True, order=response))
+        results.sort(key=lambda result: result.index)
+        return OrderBulkResponse(results=results, created=len(rows), failed=len(errors))
 
     @staticmethod
     def get_order(db: Session, order_id: int) -> OrderResponse:
+        return order_cache.get_or_load(order_id, lambda: OrderService._load_order(db, order_id), db.info.get("replica", False))
+
+    @staticmethod
+    def _load_order(db: Session, order_id: int) -> OrderResponse:
         order = db.query(Order).filter_by(order_id=order_id).first()
         if not order:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Order not found")
         return OrderResponse.model_validate(order)
 
+    @staticmethod
+    def get_orders(db: Session, order_ids: List[int]) -> Dict[int, OrderResponse]:
+        """Orders by id, cache misses fetched with one IN query; ids that do not exist are left out"""
+        return order_cache.get_many_or_load(order_ids, lambda ids: OrderService._load_orders(db, ids), db.info.get("replica", False))
+
+    @staticmethod
+    def _load_orders(db: Session, order_ids: List[int]) -> Dict[int, OrderResponse]:
+        orders = db.query(Order).filter(Order.order_id.in_(order_ids)).all()
+        return {order.order_id: OrderResponse.model_validate(order) for order in orders}
+
     @staticmethod
     def update_order(db: Session, order_id: int, order_update: OrderUpdate) -> OrderResponse:
-        order = db.query(Order).filter_by(order_id=order_id).first()
+        values = order_update.model_dump(exclude_none=True)
+        if FAST_WRITES and values:
+            order, before = OrderService._update_figures(db, order_id, values)
+            if not order:
+                raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Order not found")
+            OrderService._record_change(db, order, before)
+            db.commit()
+            order_cache.invalidate(order_id)
+            response = OrderResponse.model_validate(order)
+            order_events.publish("order.updated", response)
+            return response
+
+        order = db.query(Order).filter_by(order_id=order_id).with_for_update().first()
         if not order:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Order not found")
+        before = (order.status, order.total_amount)
         
         # Update fields
         if order_update.total_amount is not None:
@@ -48,45 +227,273 @@ class OrderService:
         if order_update.status is not None:
             order.status = order_update.status
         
+        db.flush()
+        OrderService._record_change(db, order, before)
         db.commit()
+        order_cache.invalidate(order_id)
         db.refresh(order)
-        return OrderResponse.model_validate(order)
+        response = OrderResponse.model_validate(order)
+        order_events.publish("order.updated", response)
+        return response
 
     @staticmethod
     def delete_order(db: Session, order_id: int):
-        order = db.query(Order).filter_by(order_id=order_id).first()
+        order = db.query(Order).filter_by(order_id=order_id).with_for_update().first()
         if not order:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Order not found")
+        user_id = order.user_id
+        response = OrderResponse.model_validate(order)
         db.delete(order)
+        db.flush()
+        OrderStatsService.record(db, user_id, removed=[(order.status, order.total_amount)])
+        OrderRollupService.record(db, removed=[(order.order_date, order.status, order.total_amount)])
         db.commit()
+        order_cache.invalidate(order_id)
+        CountService.adjust(("orders", None), -1)
+        CountService.adjust(("orders", user_id), -1)
+        order_events.publish("order.deleted", response)
 
     @staticmethod
-    def list_orders(db: Session, page: int = 1, per_page: int = 10) -> OrderListResponse:
+    def list_orders(db: Session, page: int = 1, per_page: int = 10, cursor: Optional[str] = None,
+                    total_mode: TotalMode = TotalMode.EXACT) -> OrderListResponse:
         query = db.query(Order)
-        total = query.count()
-        orders = query.offset((page - 1) * per_page).limit(per_page).all()
-        return OrderListResponse(orders=[OrderResponse.model_validate(order) for order in orders], total=total, page=page, per_page=per_page)
+        total = CountService.get_total(query, ("orders", None), total_mode)
+        orders, next_cursor = paginate(query, Order.order_id, page, per_page, cursor)
+        return OrderListResponse(orders=[OrderResponse.model_validate(order) for order in orders], total=total, total_mode=total_mode,
+                                 page=page, per_page=per_page, next_cursor=next_cursor)
 
     @staticmethod
-    def list_user_orders(db: Session, user_id: int, page: int = 1, per_page: int = 10) -> OrderListResponse:
+    def list_user_orders(db: Session, user_id: int, page: int = 1, per_page: int = 10, cursor: Optional[str] = None,
+                         total_mode: TotalMode = TotalMode.EXACT) -> OrderListResponse:
         query = db.query(Order).filter_by(user_id=user_id)
-        total = query.count()
-        orders = query.offset((page - 1) * per_page).limit(per_page).all()
-        return OrderListResponse(orders=[OrderResponse.model_validate(order) for order in orders], total=total, page=page, per_page=per_page)
+        total = CountService.get_total(query, ("orders", user_id), total_mode)
+        orders, next_cursor = paginate(query, Order.order_id, page, per_page, cursor)
+        return OrderListResponse(orders=[OrderResponse.model_validate(order) for order in orders], total=total, total_mode=total_mode,
+                                 page=page, per_page=per_page, next_cursor=next_cursor)
+
+    @staticmethod
+    def search_orders(db: Session, filters: OrderSearchFilters, per_page: int = 10, cursor: Optional[str] = None) -> OrderSearchResponse:
+        """
+        Filter orders with keyset pagination over (sort column, order_id).
+
+        At most one range (created_at, order_date or total_amount) is allowed and
+        results are sorted by that column, so each accepted shape in
+        SEARCH_INDEXES reads one contiguous index range. Several statuses are
+        searched as one short, already ordered page per status, merged with
+        UNION ALL, instead of sorting every row that matches the IN list.
+        Orders with no order_date or created_at are not returned when sorting
+        by that column.
+        """
+        ranges = {
+            column: bounds for column, bounds in (
+                ("created_at", (filters.created_from, filters.created_to)),
+                ("order_date", (filters.order_date_from, filters.order_date_to)),
+                ("total_amount", (filters.min_amount, filters.max_amount)),
+            ) if bounds != (None, None)
+        }
+        if len(ranges) > 1:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
+                                detail="Only one of the created_at, order_date and total_amount ranges can be used at a time")
+        range_column = next(iter(ranges), None)
+        sort = filters.sort or OrderSortField(range_column or OrderSortField.ORDER_ID.value)
+        if range_column and sort.value != range_column:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"A {range_column} range must be sorted by {range_column}")
+        statuses = list(dict.fromkeys(filters.status or []))
+        equality = tuple(name for name, used in (("user_id", filters.user_id is not None), ("status", bool(statuses))) if used)
+        if (equality, sort.value) not in SEARCH_INDEXES:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
+                                detail=f"Filtering by {' and '.join(equality)} cannot be combined with sorting by {sort.value}")
+
+        table = Order.__table__
+        descending = filters.direction == SortDirection.DESC
+        conditions = []
+        if filters.user_id is not None:
+            conditions.append(table.c.user_id == filters.user_id)
+        if range_column:
+            column = table.c[range_column]
+            low, high = ranges[range_column]
+            if low is not None:
+                conditions.append(column >= low)
+            if high is not None:
+                conditions.append(column <= high if range_column == "total_amount" else column < high)
+        elif table.c[sort.value].nullable:
+            # A NULL has no place in the keyset order and cannot be written to a cursor, so those orders are left out
+            conditions.append(table.c[sort.value].is_not(None))
+        if cursor:
+            last_value, last_key = OrderService._decode_search_cursor(cursor, sort, filters.direction)
+            conditions.append(seek_after(table.c[sort.value], table.c.order_id, descending, last_value, last_key))
+
+        def _ordering(columns):
+            keys = [columns[sort.value]] if sort == OrderSortField.ORDER_ID else [columns[sort.value], columns.order_id]
+            return [key.desc() for key in keys] if descending else keys
+
+        def _page(*extra):
+            return select(table).where(*conditions, *extra).order_by(*_ordering(table.c)).limit(per_page + 1)
+
+        if len(statuses) > 1:
+            merged = union_all(*(select(_page(table.c.status == value).subquery()) for value in statuses)).subquery()
+            stmt = select(merged).order_by(*_ordering(merged.c)).limit(per_page + 1)
+        else:
+            stmt = _page(table.c.status == statuses[0]) if statuses else _page()
+
+        rows = db.execute(stmt).all()
+        if db.info.get("shard_router") is not None:
+            # Each shard returned its own first page; merge them, keeping one copy of a user's rows while they are being moved
+            unique = {row.order_id: row for row in rows}
+            rows = sorted(unique.values(), key=lambda row: (getattr(row, sort.value), row.order_id), reverse=descending)[:per_page + 1]
+        next_cursor = None
+        if per_page > 0 and len(rows) > per_page:
+            rows = rows[:per_page]
+            last_value = getattr(rows[-1], sort.value)
+            next_cursor = encode_cursor({
+                "sort": sort.value,
+                "direction": filters.direction.value,
+                "value": last_value.isoformat() if isinstance(last_value, datetime) else str(last_value),
+                "order_id": rows[-1].order_id,
+            })
+        return OrderSearchResponse(orders=[OrderResponse.model_validate(row) for row in rows], per_page=per_page,
+                                   sort=sort, direction=filters.direction, next_cursor=next_cursor)
+
+    @staticmethod
+    def _decode_search_cursor(cursor: str, sort: OrderSortField, direction: SortDirection):
+        try:
+            values = decode_cursor(cursor)
+            if values["sort"] != sort.value or values["direction"] != direction.value:
+                raise ValueError("cursor was issued for a different ordering")
+            last_key = int(values["order_id"])
+            if sort == OrderSortField.ORDER_ID:
+                return last_key, last_key
+            if sort == OrderSortField.TOTAL_AMOUNT:
+                return Decimal(values["value"]), last_key
+            return datetime.fromisoformat(values["value"]), last_key
+        except (ValueError, KeyError, TypeError, InvalidOperation):
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
 
     @staticmethod
     def update_order_status(db: Session, order_id: int, new_status: OrderStatus) -> OrderResponse:
-        order = db.query(Order).filter_by(order_id=order_id).first()
+        if FAST_WRITES:
+            order, before = OrderService._update_figures(db, order_id, {"status": new_status})
+            if not order:
+                raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Order not found")
+            OrderService._record_change(db, order, before)
+            db.commit()
+            order_cache.invalidate(order_id)
+            response = OrderResponse.model_validate(order)
+            order_events.publish("order.status_changed", response)
+            return response
+
+        order = db.query(Order).filter_by(order_id=order_id).with_for_update().first()
         if not order:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Order not found")
+        before = (order.status, order.total_amount)
         
         order.status = new_status
+        db.flush()
+        OrderService._record_change(db, order, before)
         db.commit()
+        order_cache.invalidate(order_id)
         db.refresh(order)
-        return OrderResponse.model_validate(order)
+        response = OrderResponse.model_validate(order)
+        order_events.publish("order.status_changed", response)
+        return response
+
+    @staticmethod
+    def _update_figures(db: Session, order_id: int, values: dict):
+        """
+        Apply `values` to an order with one UPDATE, returning the updated row and
+        the (status, total_amount) it replaced, or (None, None) when the order
+        does not exist. The cached order supplies the replaced figures, and the
+        UPDATE only matches while the row still holds them, so it needs no read
+        of its own; without a cached copy, or when it is stale, the figures are
+        read under a row lock first.
+        """
+        cached = order_cache.peek(order_id)
+        if cached is not None:
+            before = (cached.status, cached.total_amount)
+            order = update_returning(db, Order.order_id, order_id, values, expected={"status": before[0], "total_amount": before[1]})
+            if order:
+                return order, before
+        before = OrderService._lock_figures(db, order_id)
+        if not before:
+            return None, None
+        return update_returning(db, Order.order_id, order_id, values), tuple(before)
+
+    @staticmethod
+    def _lock_figures(db: Session, order_id: int):
+        """(status, total_amount) of an order, locked until commit so the summary update sees what the write replaced"""
+        return db.execute(select(Order.status, Order.total_amount).where(Order.order_id == order_id).with_for_update()).first()
+
+    @staticmethod
+    def _record_change(db: Session, order, before: OrderFigures):
+        """Pass an update of `order` from the `before` figures on to its user's summary and the rollups, if either changed"""
+        after = (order.status, order.total_amount)
+        if after == tuple(before):
+            return
+        OrderStatsService.record(db, order.user_id, removed=[before], added=[after])
+        OrderRollupService.record(db, removed=[(order.order_date, *before)], added=[(order.order_date, *after)])
 
     @staticmethod
     def check_order_ownership(db: Session, order_id: int, user_id: int) -> bool:
         """Check if an order belongs to a specific user"""
         order = db.query(Order).filter_by(order_id=order_id, user_id=user_id).first()
         return order is not None
+
+    @staticmethod
+    def export_orders(export_format: ExportFormat, user_id: Optional[int] = None, order_status: Optional[OrderStatus] = None,
+                      created_from: Optional[datetime] = None, created_to: Optional[datetime] = None,
+                      primary_sessions=None) -> Iterator[str]:
+        """
+        Stream matching orders as NDJSON lines or CSV rows.
+
+        Rows are read through a server-side cursor in batches of EXPORT_BATCH_SIZE
+        and formatted straight from the column values, so memory use does not
+        grow with the size of the export. The generator owns its session because
+        it keeps running after the request's dependencies have been torn down;
+        exports read from a replica when one is configured, else from a session
+        of `primary_sessions` (SessionLocal by default). Sharded exports
+        stream from every shard at once, merged by order_id.
+        """
+        stmt = select(*(getattr(Order, column) for column in EXPORT_COLUMNS)).order_by(Order.order_id)
+        if user_id is not None:
+            stmt = stmt.where(Order.user_id == user_id)
+        if order_status is not None:
+            stmt = stmt.where(Order.status == order_status)
+        if created_from is not None:
+            stmt = stmt.where(Order.created_at >= created_from)
+        if created_to is not None:
+            stmt = stmt.where(Order.created_at < created_to)
+
+        def _value(value):
+            if isinstance(value, datetime):
+                return value.isoformat()
+            if isinstance(value, OrderStatus):
+                return value.value
+            return value if value is None or isinstance(value, int) else str(value)
+
+        db = open_read_session(primary_sessions=primary_sessions)
+        try:
+            shard_router = db.info.get("shard_router")
+            if shard_router is None:
+                batches = db.execute(stmt.execution_options(yield_per=EXPORT_BATCH_SIZE)).partitions()
+            else:
+                # One cursor per shard, merged by order_id
+                batches = shard_router.merge_partitions(db, stmt, lambda row: row.order_id, EXPORT_BATCH_SIZE)
+            if export_format == ExportFormat.CSV:
+                buffer = io.StringIO()
+                writer = csv.writer(buffer)
+                writer.writerow(EXPORT_COLUMNS)
+                for batch in batches:
+                    writer.writerows([_value(value) for value in row] for row in batch)
+                    yield buffer.getvalue()
+                    buffer.seek(0)
+                    buffer.truncate()
+                if buffer.tell():
+                    yield buffer.getvalue()
+            else:
+                for batch in batches:
+                    yield "".join(
+                        json.dumps(dict(zip(EXPORT_COLUMNS, (_value(value) for value in row))), separators=(",", ":")) + "\n"
+                        for row in batch
+                    )
+        finally:
+            close_read_session(db)
@@ -0,0 +1,146 @@
+# app/services/order_stats_service.py
+
+from collections import Counter
+from decimal import Decimal
+from typing import Iterable, Optional, Tuple
+from sqlalchemy import Select, Update, case, func, insert, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from app.database.models import Order, User, UserOrderStats
+from app.validators import OrderStatus, UserOrderStatsResponse
+from app.services.writes import _row_shard
+from fastapi import HTTPException, status
+
+# user_order_stats counter column of each status
+STATUS_COLUMNS = {order_status: f"{order_status.value}_count" for order_status in OrderStatus}
+
+# (status, total_amount) of an order as it was before or is after a write
+OrderFigures = Tuple[OrderStatus, Decimal]
+
+class OrderStatsService:
+    """
+    Per-user order summary kept in user_order_stats.
+
+    Every order write passes the figures it removed and added to record(),
+    which adjusts the user's row with one UPDATE inside the write's own
+    transaction, so reading the summary is a primary key lookup however many
+    orders the user has. create_user() inserts each new user's row; a user
+    created some other way gets one computed from their orders on their
+    first order write. rebuild_order_stats.py recomputes the whole table to find
+    and repair drift.
+    """
+
+    @staticmethod
+    def get_stats(db: Session, user_id: int) -> UserOrderStatsResponse:
+        stats = db.get(UserOrderStats, user_id)
+        if stats is None:
+            if db.query(User.user_id).filter_by(user_id=user_id).first() is None:
+                raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
+            # No order has been written for the user since the table was introduced
+            return OrderStatsService.empty(user_id)
+        return UserOrderStatsResponse(
+            user_id=user_id,
+            order_count=stats.order_count,
+            total_spent=stats.total_spent,
+            last_order_date=stats.last_order_date,
+            status_counts={order_status: getattr(stats, column) for order_status, column in STATUS_COLUMNS.items()},
+        )
+
+    @staticmethod
+    def empty(user_id: int) -> UserOrderStatsResponse:
+        return UserOrderStatsResponse(user_id=user_id, order_count=0, total_spent=Decimal("0.00"), last_order_date=None,
+                                      status_counts={order_status: 0 for order_status in OrderStatus})
+
+    @staticmethod
+    def create(db: Session, user_id: int):
+        """Insert the all-zero row of a new user, in the transaction that creates the user"""
+        db.execute(OrderStatsService.initial_row(None, user_id), bind_arguments=_row_shard(db, UserOrderStats.user_id, user_id))
+
+    @staticmethod
+    async def create_async(db: AsyncSession, user_id: int):
+        """create() on an AsyncSession"""
+        await db.execute(OrderStatsService.initial_row(None, user_id))
+
+    @staticmethod
+    def record(db: Session, user_id: int, removed: Iterable[OrderFigures] = (), added: Iterable[OrderFigures] = ()):
+        """
+        Apply an order write of `user_id` to their summary: a create adds one
+        order, a delete removes one, an update removes the old figures and adds
+        the new ones. Call after the write has been flushed, before committing.
+        """
+        stmt = OrderStatsService.adjustment(user_id, removed, added)
+        if stmt is None:
+            return
+        # The user's shard, which an INSERT could not be routed to from its WHERE clause
+        bind_arguments = _row_shard(db, UserOrderStats.user_id, user_id)
+        if db.execute(stmt, bind_arguments=bind_arguments).rowcount:
+            return
+        # A user created outside create_user() (e.g. by a script) has no row yet
+        computed = db.execute(OrderStatsService.aggregates(user_id), bind_arguments=bind_arguments).mappings().first()
+        try:
+            with db.begin_nested():
+                db.execute(OrderStatsService.initial_row(computed, user_id), bind_arguments=bind_arguments)
+        except IntegrityError:
+            # A concurrent write inserted it first, computed without this write; apply this write on top
+            db.execute(stmt, bind_arguments=bind_arguments)
+
+    @staticmethod
+    async def record_async(db: AsyncSession, user_id: int, removed: Iterable[OrderFigures] = (), added: Iterable[OrderFigures] = ()):
+        """record() on an AsyncSession"""
+        stmt = OrderStatsService.adjustment(user_id, removed, added)
+        if stmt is None or (await db.execute(stmt)).rowcount:
+            return
+        computed = (await db.execute(OrderStatsService.aggregates(user_id))).mappings().first()
+        try:
+            async with db.begin_nested():
+                await db.execute(OrderStatsService.initial_row(computed, user_id))
+        except IntegrityError:
+            await db.execute(stmt)
+
+    @staticmethod
+    def adjustment(user_id: int, removed: Iterable[OrderFigures], added: Iterable[OrderFigures]) -> Optional[Update]:
+        """UPDATE applying the changes to the user's row in place, None when nothing the summary tracks changed"""
+        changes = [(figures, -1) for figures in removed] + [(figures, 1) for figures in added]
+        table = UserOrderStats.__table__
+        order_delta = sum(sign for _, sign in changes)
+        spent_delta = sum((amount * sign for (order_status, amount), sign in changes if order_status != OrderStatus.CANCELLED), Decimal(0))
+        status_deltas = Counter()
+        for (order_status, _), sign in changes:
+            status_deltas[order_status] += sign
+
+        values = {}
+        if order_delta:
+            values["order_count"] = table.c.order_count + order_delta
+            # The orders are already written, so this is the date after the change; (user_id, order_date) is indexed
+            values["last_order_date"] = select(func.max(Order.order_date)).where(Order.user_id == user_id).scalar_subquery()
+        if spent_delta:
+            values["total_spent"] = table.c.total_spent + spent_delta
+        for order_status, delta in status_deltas.items():
+            if delta:
+                column = STATUS_COLUMNS[order_status]
+                values[column] = table.c[column] + delta
+        if not values:
+            return None
+        return update(table).where(table.c.user_id == user_id).values(**values)
+
+    @staticmethod
+    def aggregates(user_id: Optional[int] = None) -> Select:
+        """The summary columns computed from orders, per user_id (for one user when given)"""
+        stmt = select(
+            Order.user_id,
+            func.count(Order.order_id).label("order_count"),
+            func.coalesce(func.sum(case((Order.status != OrderStatus.CANCELLED, Order.total_amount), else_=0)), 0).label("total_spent"),
+            func.max(Order.order_date).label("last_order_date"),
+            *(func.coalesce(func.sum(case((Order.status == order_status, 1), else_=0)), 0).label(column)
+              for order_status, column in STATUS_COLUMNS.items()),
+        ).group_by(Order.user_id)
+        return stmt.where(Order.user_id == user_id) if user_id is not None else stmt
+
+    @staticmethod
+    def initial_row(computed, user_id: int):
+        """INSERT of a user's row from their aggregates() result, all zero when they have no orders"""
+        values = {column: 0 for column in ("order_count", "total_spent", *STATUS_COLUMNS.values())}
+        if computed is not None:
+            values.update({key: value for key, value in computed.items() if key != "user_id"})
+        return insert(UserOrderStats.__table__).values(user_id=user_id, **values)
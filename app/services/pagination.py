@@ -0,0 +1,81 @@
+# app/services/pagination.py
+
+from typing import Optional, Tuple, List
+from sqlalchemy import Select, and_, or_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Query
+from fastapi import HTTPException, status
+from app.utils import encode_cursor, decode_cursor
+
+def paginate(query: Query, key_column, page: int, per_page: int, cursor: Optional[str] = None) -> Tuple[List, Optional[str]]:
+    """
+    Fetch one page of rows ordered by an indexed, unique key column.
+
+    Without a cursor the page is selected with OFFSET (legacy page/per_page mode).
+    With a cursor the query seeks past the last key seen (keyset mode), so the
+    cost of a page does not depend on how far the client has scrolled.
+    Both modes return a next_cursor that can be used to continue in keyset mode.
+    """
+    shard_router = query.session.info.get("shard_router")
+    if shard_router is not None and len(shard_router.statement_shards(query.statement)) > 1:
+        return _paginate_shards(query, key_column, page, per_page, cursor)
+    return _trim(_bounded(query, key_column, page, per_page, cursor).all(), key_column, per_page)
+
+def _paginate_shards(query: Query, key_column, page: int, per_page: int, cursor: Optional[str]) -> Tuple[List, Optional[str]]:
+    """
+    paginate() for a query that runs on several shards.
+
+    Every shard returns its own first rows past the cursor, or its first
+    offset + per_page rows, and the page is cut out of their merge by key.
+    Keyset pages therefore cost the same as unsharded ones, while OFFSET pages
+    read `offset` rows from every shard.
+    """
+    skip = 0 if cursor else (page - 1) * per_page
+    rows = _bounded(query, key_column, 1, skip + per_page, cursor).all()
+    # A user being moved between shards is briefly on both, keep one copy of their rows
+    merged = {}
+    for row in rows:
+        merged.setdefault(getattr(row, key_column.key), row)
+    return _trim([merged[key] for key in sorted(merged)][skip:], key_column, per_page)
+
+async def paginate_async(db: AsyncSession, stmt: Select, key_column, page: int, per_page: int,
+                         cursor: Optional[str] = None) -> Tuple[List, Optional[str]]:
+    """paginate() for a select() of ORM entities run on an AsyncSession"""
+    result = await db.scalars(_bounded(stmt, key_column, page, per_page, cursor))
+    return _trim(result.all(), key_column, per_page)
+
+def _bounded(query, key_column, page: int, per_page: int, cursor: Optional[str]):
+    """Order, seek or offset, and limit a Query or select() to one page plus one row"""
+    query = query.order_by(key_column)
+    if cursor:
+        try:
+            last_key = int(decode_cursor(cursor)[key_column.key])
+        except (ValueError, KeyError, TypeError):
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+        query = query.where(key_column > last_key)
+    else:
+        query = query.offset((page - 1) * per_page)
+    # Fetch one extra row to know whether another page exists
+    return query.limit(per_page + 1)
+
+def _trim(rows: List, key_column, per_page: int) -> Tuple[List, Optional[str]]:
+    next_cursor = None
+    if per_page > 0 and len(rows) > per_page:
+        rows = rows[:per_page]
+        next_cursor = encode_cursor({key_column.key: getattr(rows[-1], key_column.key)})
+    return rows, next_cursor
+
+def seek_after(sort_column, key_column, descending: bool, last_value, last_key):
+    """
+    Condition selecting the rows that come after (last_value, last_key) when
+    ordering by (sort_column, key_column).
+
+    Written as `sort >= v AND (sort > v OR key > k)` rather than a row value
+    comparison so the leading range on sort_column can use an index on every
+    backend.
+    """
+    if sort_column is key_column:
+        return key_column < last_key if descending else key_column > last_key
+    if descending:
+        return and_(sort_column <= last_value, or_(sort_column < last_value, key_column < last_key))
+    return and_(sort_column >= last_value, or_(sort_column > last_value, key_column > last_key))
@@ -3,6 +3,8 @@
 from sqlalchemy.orm import Session
 from app.database.models import Permission
 from app.validators import PermissionCreate, PermissionUpdate, PermissionResponse, PermissionListResponse
+from app.services.authorization_service import permission_engine
+from app.services.writes import FAST_WRITES, update_returning
 from fastapi import HTTPException, status
 
 class PermissionService:
@@ -20,6 +22,7 @@ class PermissionService:
         )
         db.add(new_permission)
         db.commit()
+        permission_engine.invalidate()
         db.refresh(new_permission)
         return PermissionResponse.model_validate(new_permission)
 
@@ -32,6 +35,16 @@ class PermissionService:
 
     @staticmethod
     def update_permission(db: Session, permission_id: int, permission_update: PermissionUpdate) -> PermissionResponse:
+        # Empty strings are ignored, matching the field-by-field path below
+        values = {field: value for field, value in permission_update.model_dump().items() if value}
+        if FAST_WRITES and values:
+            permission = update_returning(db, Permission.permission_id, permission_id, values)
+            if not permission:
+                raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Permission not found")
+            db.commit()
+            permission_engine.invalidate()
+            return PermissionResponse.model_validate(permission)
+
         permission = db.query(Permission).filter_by(permission_id=permission_id).first()
         if not permission:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Permission not found")
@@ -45,6 +58,7 @@ class PermissionService:
             permission.description = permission_update.description
         
         db.commit()
+        permission_engine.invalidate()
         db.refresh(permission)
         return PermissionResponse.model_validate(permission)
 
@@ -55,6 +69,7 @@ class PermissionService:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Permission not found")
         db.delete(permission)
         db.commit()
+        permission_engine.invalidate()
 
     @staticmethod
     def list_permissions(db: Session) -> PermissionListResponse:
@@ -4,6 +4,9 @@ from sqlalchemy.orm import Session
 from app.database.models import Role, Permission, RolePermission
 from app.validators import RoleCreate, RoleUpdate, RoleResponse, RoleListResponse
 from app.validators import PermissionResponse
+from app.services.authorization_service import permission_engine
+from app.services.writes import FAST_WRITES, update_returning
+from app.cache import user_cache
 from fastapi import HTTPException, status
 
 class RoleService:
@@ -40,6 +43,17 @@ class RoleService:
 
     @staticmethod
     def update_role(db: Session, role_id: int, role_update: RoleUpdate) -> RoleResponse:
+        # Empty strings are ignored, matching the field-by-field path below
+        values = {field: value for field, value in role_update.model_dump().items() if value}
+        if FAST_WRITES and values:
+            role = update_returning(db, Role.role_id, role_id, values)
+            if not role:
+                raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Role not found")
+            db.commit()
+            # Cached users embed their role
+            user_cache.clear()
+            return RoleResponse.model_validate(role)
+
         role = db.query(Role).filter_by(role_id=role_id).first()
         if not role:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Role not found")
@@ -53,6 +67,7 @@ class RoleService:
             role.description = role_update.description
         
         db.commit()
+        user_cache.clear()
         db.refresh(role)
         return RoleResponse.model_validate(role)
 
@@ -63,6 +78,8 @@ class RoleService:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Role not found")
         db.delete(role)
         db.commit()
+        permission_engine.invalidate()
+        user_cache.clear()
 
     @staticmethod
     def list_roles(db: Session) -> RoleListResponse:
@@ -93,6 +110,7 @@ class RoleService:
         role_permission = RolePermission(role_id=role_id, permission_id=permission_id)
         db.add(role_permission)
         db.commit()
+        permission_engine.grant(role_id, permission_id)
 
     @staticmethod
     def remove_permission_from_role(db: Session, role_id: int, permission_id: int):
@@ -105,6 +123,7 @@ class RoleService:
         
         db.delete(role_permission)
         db.commit()
+        permission_engine.revoke(role_id, permission_id)
 
     @staticmethod
     def get_role_permissions(db: Session, role_id: int) -> list[PermissionResponse]:
@@ -1,10 +1,21 @@
 # app/services/user_service.py
 
-from sqlalchemy.orm import Session
-from app.database.models import User, Role
-from app.validators import UserCreate, UserUpdate, UserResponse, UserListResponse
+from sqlalchemy.orm import Session, joinedload, selectinload
+from app.config.database import shard_router
+from app.database.models import User, Role, Order, UserOrderStats
+from app.validators import UserCreate, UserUpdate, UserResponse, UserListResponse, TotalMode
 from app.utils import hash_password
+from app.services.pagination import paginate
+from app.services.count_service import CountService
+from app.services.order_stats_service import OrderStatsService
+from app.services.writes import FAST_WRITES, update_by_pk
+from app.cache import user_cache
 from fastapi import HTTPException, status
+from typing import Dict, List, Optional
+
+# Loads UserResponse.role along with the users. Sharded users cannot be joined to the roles
+# on the global database, so there the roles come from one extra IN query instead.
+ROLE_LOADER = selectinload(User.role) if shard_router else joinedload(User.role)
 
 class UserService:
     @staticmethod
@@ -42,19 +53,52 @@ class UserService:
             role_id=role_id
         )
         db.add(new_user)
+        db.flush()
+        OrderStatsService.create(db, new_user.user_id)
         db.commit()
         db.refresh(new_user)
+        CountService.adjust(("users", None), 1)
         return UserResponse.model_validate(new_user)
 
     @staticmethod
     def get_user(db: Session, user_id: int) -> UserResponse:
-        user = db.query(User).filter_by(user_id=user_id).first()
+        return user_cache.get_or_load(user_id, lambda: UserService._load_user(db, user_id), db.info.get("replica", False))
+
+    @staticmethod
+    def _load_user(db: Session, user_id: int) -> UserResponse:
+        user = db.query(User).options(ROLE_LOADER).filter_by(user_id=user_id).first()
         if not user:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
         return UserResponse.model_validate(user)
 
+    @staticmethod
+    def get_users(db: Session, user_ids: List[int]) -> Dict[int, UserResponse]:
+        """Users by id, cache misses fetched with one IN query; ids that do not exist are left out"""
+        return user_cache.get_many_or_load(user_ids, lambda ids: UserService._load_users(db, ids), db.info.get("replica", False))
+
+    @staticmethod
+    def _load_users(db: Session, user_ids: List[int]) -> Dict[int, UserResponse]:
+        users = db.query(User).options(ROLE_LOADER).filter(User.user_id.in_(user_ids)).all()
+        return {user.user_id: UserResponse.model_validate(user) for user in users}
+
     @staticmethod
     def update_user(db: Session, user_id: int, user_update: UserUpdate) -> UserResponse:
+        if FAST_WRITES:
+            values = {}
+            if user_update.username:
+                values["username"] = user_update.username
+            if user_update.email:
+                values["email"] = user_update.email
+            if user_update.password:
+                values["hashed_password"] = hash_password(user_update.password)
+            if values:
+                if not update_by_pk(db, User.user_id, user_id, values):
+                    raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
+                db.commit()
+                user_cache.invalidate(user_id)
+            # Read back with the role joined in, RETURNING cannot carry the relationship
+            return UserService.get_user(db, user_id)
+
         user = db.query(User).filter_by(user_id=user_id).first()
         if not user:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
@@ -68,6 +112,7 @@ class UserService:
             user.hashed_password = hash_password(user_update.password)
         
         db.commit()
+        user_cache.invalidate(user_id)
         db.refresh(user)
         return UserResponse.model_validate(user)
 
@@ -76,13 +121,21 @@ class UserService:
         user = db.query(User).filter_by(user_id=user_id).first()
         if not user:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
+        if db.query(Order.order_id).filter_by(user_id=user_id).first() is not None:
+            raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="User has orders, delete them first")
+        db.query(UserOrderStats).filter_by(user_id=user_id).delete()
         db.delete(user)
         db.commit()
+        user_cache.invalidate(user_id)
+        CountService.adjust(("users", None), -1)
         
     @staticmethod
-    def list_users(db: Session, page: int = 1, per_page: int = 10) -> UserListResponse:
+    def list_users(db: Session, page: int = 1, per_page: int = 10, cursor: Optional[str] = None,
+                   total_mode: TotalMode = TotalMode.EXACT) -> UserListResponse:
         query = db.query(User)
-        total = query.count()
-        users = query.offset((page - 1) * per_page).limit(per_page).all()
-        return UserListResponse(users=[UserResponse.model_validate(user) for user in users], total=total, page=page, per_page=per_page)
+        total = CountService.get_total(query, ("users", None), total_mode)
+        # Load roles up front (see ROLE_LOADER) so serialising UserResponse.role doesn't query per user
+        users, next_cursor = paginate(query.options(ROLE_LOADER), User.user_id, page, per_page, cursor)
+        return UserListResponse(users=[UserResponse.model_validate(user) for user in users], total=total, total_mode=total_mode,
+                                page=page, per_page=per_page, next_cursor=next_cursor)
 
@@ -0,0 +1,69 @@
+# app/services/writes.py
+
+import os
+from typing import Optional
+from sqlalchemy import update, select
+from sqlalchemy.engine import Row
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+# Single-statement UPDATE paths instead of SELECT, mutate, COMMIT, refresh
+FAST_WRITES = os.getenv("FAST_WRITES", "true").lower() == "true"
+
+def update_returning(db: Session, pk_column, pk_value, values: dict, expected: Optional[dict] = None) -> Optional[Row]:
+    """
+    Apply `values` to the row whose primary key is `pk_value` with one UPDATE and
+    return the updated row, or None when no row matched. With `expected`, the
+    row only matches while those columns still hold those values.
+
+    Uses UPDATE ... RETURNING where the dialect supports it; otherwise (MySQL)
+    the matched rowcount decides the 404 and one SELECT reads the row back
+    inside the same transaction. The caller commits.
+    """
+    bind_arguments = _row_shard(db, pk_column, pk_value)
+    if bind_arguments is None:
+        return None
+    table = pk_column.table
+    stmt = _matching(update(table).where(pk_column == pk_value), table, expected).values(**values)
+    if db.get_bind(**bind_arguments).dialect.update_returning:
+        return db.execute(stmt.returning(*table.columns), bind_arguments=bind_arguments).first()
+    if db.execute(stmt, bind_arguments=bind_arguments).rowcount == 0:
+        return None
+    return db.execute(select(*table.columns).where(pk_column == pk_value), bind_arguments=bind_arguments).first()
+
+def update_by_pk(db: Session, pk_column, pk_value, values: dict) -> bool:
+    """Apply `values` to one row with a single UPDATE, returning whether it matched"""
+    bind_arguments = _row_shard(db, pk_column, pk_value)
+    if bind_arguments is None:
+        return False
+    stmt = update(pk_column.table).where(pk_column == pk_value).values(**values)
+    return db.execute(stmt, bind_arguments=bind_arguments).rowcount > 0
+
+def _matching(stmt, table, expected: Optional[dict]):
+    return stmt.where(*(table.c[column] == value for column, value in expected.items())) if expected else stmt
+
+def _row_shard(db: Session, pk_column, pk_value) -> Optional[dict]:
+    """
+    bind_arguments sending a statement on one row to the shard that holds it
+    (nothing to add on an unsharded session), or None when no shard has the row.
+    """
+    shard_router = db.info.get("shard_router")
+    if shard_router is None:
+        return {}
+    shard_id = shard_router.locate(db, pk_column.table, pk_value)
+    return None if shard_id is None else {"shard_id": shard_id}
+
+async def update_returning_async(db: AsyncSession, pk_column, pk_value, values: dict, expected: Optional[dict] = None) -> Optional[Row]:
+    """update_returning() on an AsyncSession"""
+    table = pk_column.table
+    stmt = _matching(update(table).where(pk_column == pk_value), table, expected).values(**values)
+    if db.get_bind().dialect.update_returning:
+        return (await db.execute(stmt.returning(*table.columns))).first()
+    if (await db.execute(stmt)).rowcount == 0:
+        return None
+    return (await db.execute(select(*table.columns).where(pk_column == pk_value))).first()
+
+async def update_by_pk_async(db: AsyncSession, pk_column, pk_value, values: dict) -> bool:
+    """update_by_pk() on an AsyncSession"""
+    stmt = update(pk_column.table).where(pk_column == pk_value).values(**values)
+    return (await db.execute(stmt)).rowcount > 0
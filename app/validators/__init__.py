@@ -1,9 +1,10 @@
 # app/validators/__init__.py
 
 # Import all validators to make them available
+from .pagination import TotalMode, SortDirection, MAX_BATCH_IDS
 from .user import (
     UserBase, UserCreate, UserUpdate, UserResponse,
-    UserWithOrdersResponse, UserProfileResponse, UserListResponse
+    UserWithOrdersResponse, UserProfileResponse, UserListResponse, UserBatchResponse
 )
 from .role import (
     RoleBase, RoleCreate, RoleUpdate, RoleResponse,
@@ -15,14 +16,20 @@ from .permission import (
 )
 from .order import (
     OrderStatus, OrderBase, OrderCreate, OrderUpdate, OrderResponse,
-    OrderWithUserResponse, OrderListResponse, OrderStatusUpdate
+    OrderWithUserResponse, OrderListResponse, OrderStatusUpdate,
+    OrderBulkItem, OrderBulkCreate, OrderBulkItemResult, OrderBulkResponse,
+    ExportFormat, OrderSortField, OrderSearchFilters, OrderSearchResponse, OrderBatchResponse,
+    UserOrderStatsResponse, RollupGranularity, OrderStatusRollup, OrderRollupBucket, OrderAnalyticsResponse
 )
 # Auth validators removed for now - will be added later
 
 __all__ = [
+    # Pagination models
+    "TotalMode", "SortDirection", "MAX_BATCH_IDS",
+    
     # User models
     "UserBase", "UserCreate", "UserUpdate", "UserResponse",
-    "UserWithOrdersResponse", "UserProfileResponse", "UserListResponse",
+    "UserWithOrdersResponse", "UserProfileResponse", "UserListResponse", "UserBatchResponse",
     
     # Role models
     "RoleBase", "RoleCreate", "RoleUpdate", "RoleResponse",
@@ -35,6 +42,9 @@ __all__ = [
     # Order models
     "OrderStatus", "OrderBase", "OrderCreate", "OrderUpdate", "OrderResponse",
     "OrderWithUserResponse", "OrderListResponse", "OrderStatusUpdate",
+    "OrderBulkItem", "OrderBulkCreate", "OrderBulkItemResult", "OrderBulkResponse",
+    "ExportFormat", "OrderSortField", "OrderSearchFilters", "OrderSearchResponse", "OrderBatchResponse",
+    "UserOrderStatsResponse", "RollupGranularity", "OrderStatusRollup", "OrderRollupBucket", "OrderAnalyticsResponse",
     
     # Auth models - removed for now
 ]
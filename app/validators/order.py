@@ -2,9 +2,13 @@
 
 from enum import Enum
 from pydantic import BaseModel, Field, ConfigDict
-from typing import Optional, List
+from typing import Optional, List, Dict
 from datetime import datetime
 from decimal import Decimal
+from .pagination import TotalMode, SortDirection
+
+# Maximum number of orders accepted by a single bulk create request
+MAX_BULK_ORDERS = 1000
 
 class OrderStatus(str, Enum):
     """
@@ -21,6 +25,23 @@ class OrderStatus(str, Enum):
     COMPLETED = "completed"
     CANCELLED = "cancelled"
 
+class ExportFormat(str, Enum):
+    """Output formats supported by the order export endpoint"""
+    NDJSON = "ndjson"
+    CSV = "csv"
+
+class RollupGranularity(str, Enum):
+    """Bucket sizes of the order analytics rollups"""
+    HOUR = "hour"
+    DAY = "day"
+
+class OrderSortField(str, Enum):
+    """Columns the order search endpoint can sort by"""
+    ORDER_ID = "order_id"
+    CREATED_AT = "created_at"
+    ORDER_DATE = "order_date"
+    TOTAL_AMOUNT = "total_amount"
+
 class OrderBase(BaseModel):
     """Base Order model with common fields"""
     total_amount: Decimal = Field(..., gt=0, description="Order total amount must be greater than 0")
@@ -54,10 +75,84 @@ class OrderWithUserResponse(OrderResponse):
 class OrderListResponse(BaseModel):
     """Response model for order list"""
     orders: List[OrderResponse]
-    total: int
+    total: Optional[int] = Field(None, description="Total row count, null when total_mode is none")
+    total_mode: TotalMode = Field(TotalMode.EXACT, description="How total was computed")
     page: int
     per_page: int
+    next_cursor: Optional[str] = Field(None, description="Opaque cursor for the next page, null on the last page")
 
 class OrderStatusUpdate(BaseModel):
     """Model for updating only order status"""
     status: OrderStatus = Field(..., description="New order status")
+
+class OrderBulkItem(OrderCreate):
+    """Single order inside a bulk create request"""
+    user_id: int = Field(..., description="ID of the user the order belongs to")
+
+class OrderBulkCreate(BaseModel):
+    """Bulk order creation model"""
+    orders: List[OrderBulkItem] = Field(..., min_length=1, max_length=MAX_BULK_ORDERS)
+
+class OrderBulkItemResult(BaseModel):
+    """Outcome of one item of a bulk create request"""
+    index: int = Field(..., description="Position of the item in the request")
+    success: bool
+    order: Optional[OrderResponse] = None
+    error: Optional[str] = None
+
+class OrderBulkResponse(BaseModel):
+    """Response model for bulk order creation"""
+    results: List[OrderBulkItemResult]
+    created: int
+    failed: int
+
+class OrderSearchFilters(BaseModel):
+    """Filters and ordering of an order search, ranges are [from, to)"""
+    user_id: Optional[int] = None
+    status: Optional[List[OrderStatus]] = None
+    created_from: Optional[datetime] = None
+    created_to: Optional[datetime] = None
+    order_date_from: Optional[datetime] = None
+    order_date_to: Optional[datetime] = None
+    min_amount: Optional[Decimal] = Field(None, description="Inclusive lower bound of total_amount")
+    max_amount: Optional[Decimal] = Field(None, description="Inclusive upper bound of total_amount")
+    sort: Optional[OrderSortField] = Field(None, description="Defaults to the range filtered column, else order_id")
+    direction: SortDirection = SortDirection.ASC
+
+class OrderSearchResponse(BaseModel):
+    """Response model for order search"""
+    orders: List[OrderResponse]
+    per_page: int
+    sort: OrderSortField
+    direction: SortDirection
+    next_cursor: Optional[str] = Field(None, description="Opaque cursor for the next page, null on the last page")
+
+class OrderBatchResponse(BaseModel):
+    """Response model for fetching several orders by id"""
+    orders: List[OrderResponse] = Field(..., description="Found orders, in the order their ids were requested")
+    missing: List[int] = Field(..., description="Requested ids with no matching order")
+
+class UserOrderStatsResponse(BaseModel):
+    """Order summary of one user"""
+    user_id: int
+    order_count: int
+    total_spent: Decimal = Field(..., description="Sum of total_amount over the user's orders that are not cancelled")
+    last_order_date: Optional[datetime] = Field(None, description="Date of the most recent order, null without orders")
+    status_counts: Dict[OrderStatus, int] = Field(..., description="Number of orders in each status")
+
+class OrderStatusRollup(BaseModel):
+    """Orders of one status within an analytics bucket"""
+    order_count: int
+    total_amount: Decimal
+
+class OrderRollupBucket(BaseModel):
+    """One hour or day of orders, by order_date"""
+    bucket_start: datetime
+    order_count: int
+    total_amount: Decimal = Field(..., description="Sum of total_amount over all statuses, cancelled included")
+    statuses: Dict[OrderStatus, OrderStatusRollup]
+
+class OrderAnalyticsResponse(BaseModel):
+    """Response model for order analytics"""
+    granularity: RollupGranularity
+    buckets: List[OrderRollupBucket] = Field(..., description="Buckets in the range that have orders, oldest first")
@@ -0,0 +1,24 @@
+# app/validators/pagination.py
+
+from enum import Enum
+
+# Maximum number of ids accepted by the batch GET endpoints
+MAX_BATCH_IDS = 100
+
+class TotalMode(str, Enum):
+    """
+    Total Count Mode Enum
+
+    Controls how the `total` field of a paginated list response is computed:
+    - exact: run COUNT(*) against the database
+    - cached: serve an in-memory counter, reconciled against the database periodically
+    - none: skip counting, `total` is returned as null
+    """
+    EXACT = "exact"
+    CACHED = "cached"
+    NONE = "none"
+
+class SortDirection(str, Enum):
+    """Sort direction of a keyset-paginated listing"""
+    ASC = "asc"
+    DESC = "desc"
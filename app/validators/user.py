@@ -5,6 +5,7 @@ from typing import Optional, List
 from datetime import datetime
 from .role import RoleResponse
 from .order import OrderResponse
+from .pagination import TotalMode
 
 class UserBase(BaseModel):
     """Base User model with common fields"""
@@ -47,6 +48,13 @@ class UserProfileResponse(UserResponse):
 class UserListResponse(BaseModel):
     """Response model for user list"""
     users: List[UserResponse]
-    total: int
+    total: Optional[int] = Field(None, description="Total row count, null when total_mode is none")
+    total_mode: TotalMode = Field(TotalMode.EXACT, description="How total was computed")
     page: int
     per_page: int
+    next_cursor: Optional[str] = Field(None, description="Opaque cursor for the next page, null on the last page")
+
+class UserBatchResponse(BaseModel):
+    """Response model for fetching several users by id"""
+    users: List[UserResponse] = Field(..., description="Found users, in the order their ids were requested")
+    missing: List[int] = Field(..., description="Requested ids with no matching user")
@@ -0,0 +1,176 @@
+# benchmarks/bench_async.py
+
+"""
+Throughput of the sync routes (threadpool + blocking Session) against the
+async routes (ASYNC_ROUTES, AsyncSession on aiosqlite) at 50, 200 and 1000
+concurrent clients.
+
+Each mode runs a real uvicorn worker in a subprocess over the same seeded
+SQLite file. Clients loop over a mix of GET /orders/{id}, GET /orders/ and
+PATCH /orders/{id}/status with the entity cache off, so every request does
+database work. --db-latency-ms adds a fixed wait to every statement inside the
+driver's own thread, standing in for the network round trip and query time
+of MySQL: the sync routes hold a threadpool thread (40 by default) through
+that wait, the async routes only hold a connection. Both modes get the same
+pool size, so the difference is the thread cap.
+
+The default is reads only. SQLite allows one writer at a time, so
+--write-ratio mostly measures its file lock and soon shows "database is
+locked" errors in both modes.
+
+    python -m benchmarks.bench_async --db-latency-ms 50
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+from sqlalchemy import event
+from benchmarks.common import BENCH_DB_PATH, make_engine, seed
+
+USERS = 1000
+STATUSES = ("pending", "in_process", "completed", "cancelled")
+
+def serve(port: int, latency_ms: float):
+    """Run the app in this process, with latency_ms added to every statement"""
+    import uvicorn
+    from app.config.database import engine, async_engine
+    from main import app
+
+    def _trace(statement):
+        time.sleep(latency_ms / 1000)
+
+    @event.listens_for(engine, "connect")
+    def _sync_latency(dbapi_connection, connection_record):
+        dbapi_connection.set_trace_callback(_trace)
+
+    if async_engine is not None:
+        @event.listens_for(async_engine.sync_engine, "connect")
+        def _async_latency(dbapi_connection, connection_record):
+            # aiosqlite runs the callback on its connection thread, like the sync driver does on the request thread
+            dbapi_connection.run_async(lambda connection: connection.set_trace_callback(_trace))
+
+    uvicorn.run(app, host="127.0.0.1", port=port, log_level="warning", access_log=False)
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def start_server(async_routes: bool, latency_ms: float, pool_size: int):
+    port = _free_port()
+    env = {
+        **os.environ,
+        "DATABASE_URL": f"sqlite:///{BENCH_DB_PATH}",
+        "ASYNC_ROUTES": "true" if async_routes else "false",
+        "ENTITY_CACHE_ENABLED": "false",
+        "DB_POOL_SIZE": str(pool_size),
+        "DB_MAX_OVERFLOW": "0",
+        "DB_POOL_PRE_PING": "false",
+        "QUERY_STATS_ENABLED": "false",
+        # The bulkheads' own engines are not the ones serve() adds latency to, nor sized by --pool-size
+        "BULKHEADS_ENABLED": "false",
+    }
+    process = subprocess.Popen([sys.executable, "-m", "benchmarks.bench_async", "--serve", str(port),
+                                "--db-latency-ms", str(latency_ms)], env=env)
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            urllib.request.urlopen(f"http://127.0.0.1:{port}/ping", timeout=1)
+            return process, port
+        except OSError:
+            time.sleep(0.2)
+    process.kill()
+    raise RuntimeError("server did not start")
+
+async def _request(reader, writer, method: str, path: str, body: bytes = b"") -> int:
+    """One HTTP/1.1 keep-alive exchange; a raw stream keeps the client cheap next to the server it measures"""
+    head = f"{method} {path} HTTP/1.1\r\nHost: bench\r\nContent-Length: {len(body)}\r\n"
+    if body:
+        head += "Content-Type: application/json\r\n"
+    writer.write(head.encode() + b"\r\n" + body)
+    headers = await reader.readuntil(b"\r\n\r\n")
+    status_line, *lines = headers.decode("latin-1").split("\r\n")
+    length = next((int(line.split(":", 1)[1]) for line in lines if line.lower().startswith("content-length:")), 0)
+    await reader.readexactly(length)
+    return int(status_line.split()[1])
+
+async def run_clients(port: int, clients: int, seconds: float, orders: int, write_ratio: float) -> dict:
+    latencies = []
+    errors = 0
+    rng = random.Random(7)
+    stop_at = time.monotonic() + seconds
+
+    async def client_loop():
+        nonlocal errors
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        try:
+            while time.monotonic() < stop_at:
+                pick = rng.random()
+                order_id = rng.randint(1, orders)
+                started = time.perf_counter()
+                if pick < write_ratio:
+                    body = f'{{"status":"{rng.choice(STATUSES)}"}}'.encode()
+                    status_code = await _request(reader, writer, "PATCH", f"/orders/{order_id}/status", body)
+                elif pick < write_ratio + 0.2:
+                    status_code = await _request(reader, writer, "GET", f"/orders/?per_page=20&total_mode=cached&page={rng.randint(1, 50)}")
+                else:
+                    status_code = await _request(reader, writer, "GET", f"/orders/{order_id}")
+                if status_code < 400:
+                    latencies.append(time.perf_counter() - started)
+                else:
+                    errors += 1
+        finally:
+            writer.close()
+
+    started = time.perf_counter()
+    results = await asyncio.gather(*(client_loop() for _ in range(clients)), return_exceptions=True)
+    elapsed = time.perf_counter() - started
+    errors += sum(1 for result in results if isinstance(result, Exception))
+    latencies.sort()
+    return {
+        "rps": len(latencies) / elapsed,
+        "errors": errors,
+        "p50": latencies[len(latencies) // 2] * 1000 if latencies else 0.0,
+        "p99": latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000 if latencies else 0.0,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", type=int, nargs="+", default=[50, 200, 1000])
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--orders", type=int, default=50_000)
+    parser.add_argument("--db-latency-ms", type=float, default=50)
+    parser.add_argument("--pool-size", type=int, default=100, help="connections per engine, same for both modes")
+    parser.add_argument("--write-ratio", type=float, default=0.0)
+    parser.add_argument("--serve", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        serve(args.serve, args.db_latency_ms)
+        return
+
+    engine = make_engine()
+    seed(engine, users=USERS, orders=args.orders, tokens=0)
+    engine.dispose()
+
+    print(f"{args.orders} orders, {args.db_latency_ms} ms per statement, pool {args.pool_size}, "
+          f"{args.write_ratio:.0%} writes, {args.seconds:.0f}s per run, {os.cpu_count()} CPUs shared with the clients")
+    for async_routes in (False, True):
+        process, port = start_server(async_routes, args.db_latency_ms, args.pool_size)
+        try:
+            for clients in args.clients:
+                result = asyncio.run(run_clients(port, clients, args.seconds, args.orders, args.write_ratio))
+                print(f"{'async' if async_routes else 'sync':<6} {clients:>5} clients  {result['rps']:8.0f} req/s  "
+                      f"p50 {result['p50']:8.1f} ms  p99 {result['p99']:8.1f} ms  errors {result['errors']}")
+        finally:
+            process.terminate()
+            process.wait()
+
+if __name__ == "__main__":
+    main()
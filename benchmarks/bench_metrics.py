@@ -0,0 +1,63 @@
+# benchmarks/bench_metrics.py
+
+"""
+Per-request overhead of MetricsMiddleware: a trivial ASGI app called directly,
+with and without the middleware, plus the cost of rendering /metrics.
+
+    python -m benchmarks.bench_metrics
+"""
+
+import argparse
+import asyncio
+import time
+from app.metrics import HttpMetrics, MetricsMiddleware
+
+class _Route:
+    path_format = "/orders/{order_id}"
+
+async def _app(scope, receive, send):
+    scope["route"] = _Route
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b"{}"})
+
+async def _receive():
+    return {"type": "http.request", "body": b""}
+
+async def _send(message):
+    pass
+
+async def _per_call_us(app, calls: int) -> float:
+    started = time.perf_counter()
+    for _ in range(calls):
+        await app({"type": "http", "method": "GET", "path": "/orders/1"}, _receive, _send)
+    return (time.perf_counter() - started) / calls * 1e6
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=200_000)
+    args = parser.parse_args()
+
+    metrics = HttpMetrics()
+    wrapped = MetricsMiddleware(_app, metrics)
+    loop = asyncio.new_event_loop()
+    loop.run_until_complete(_per_call_us(wrapped, 1000))
+    bare = min(loop.run_until_complete(_per_call_us(_app, args.calls)) for _ in range(3))
+    instrumented = min(loop.run_until_complete(_per_call_us(wrapped, args.calls)) for _ in range(3))
+    loop.close()
+    print(f"{'bare app':<40} {bare:8.2f} us/request")
+    print(f"{'with MetricsMiddleware':<40} {instrumented:8.2f} us/request")
+    print(f"{'overhead':<40} {instrumented - bare:8.2f} us/request")
+
+    for routes in (20, 200):
+        metrics = HttpMetrics()
+        for i in range(routes):
+            for status_code in (200, 404, 500):
+                metrics.started("GET")
+                metrics.finished("GET", f"/route{i}/{{id}}", status_code, 0.01)
+        started = time.perf_counter()
+        for _ in range(100):
+            metrics.render()
+        print(f"{f'render, {routes * 3} series':<40} {(time.perf_counter() - started) * 10:8.2f} ms")
+
+if __name__ == "__main__":
+    main()
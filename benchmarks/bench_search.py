@@ -0,0 +1,101 @@
+# benchmarks/bench_search.py
+
+"""
+Latency of GET /orders/search for every accepted filter shape (SEARCH_INDEXES
+in app/services/order_service.py), first page and a page reached by cursor,
+with and without the indexes added in migration d4a7c3e1f820.
+
+    python -m benchmarks.bench_search --orders 2000000
+"""
+
+import argparse
+from datetime import datetime
+from decimal import Decimal
+from sqlalchemy import event, text
+from sqlalchemy.orm import Session
+from app.database.models import Order
+from app.services.order_service import OrderService, SEARCH_INDEXES
+from app.validators import OrderSearchFilters, OrderStatus
+from benchmarks.common import make_engine, seed, measure, print_row
+
+# Indexes introduced by migration d4a7c3e1f820, dropped for the "before" run
+SEARCH_ONLY_INDEXES = [index for index in Order.__table__.indexes if index.name in set(SEARCH_INDEXES.values())
+                       and index.name not in ("ix_orders_user_id_order_id", "ix_orders_status_order_id", "ix_orders_created_at_order_id")]
+
+WEEK = {"from": datetime(2025, 6, 1), "to": datetime(2025, 6, 8)}
+RANGES = {
+    "order_id": {},
+    "created_at": {"created_from": WEEK["from"], "created_to": WEEK["to"]},
+    "order_date": {"order_date_from": WEEK["from"], "order_date_to": WEEK["to"]},
+    "total_amount": {"min_amount": Decimal("500"), "max_amount": Decimal("520")},
+}
+EQUALITY = {
+    (): {},
+    ("user_id",): {"user_id": 42},
+    ("status",): {"status": [OrderStatus.PENDING, OrderStatus.CANCELLED]},
+    ("user_id", "status"): {"user_id": 42, "status": [OrderStatus.PENDING, OrderStatus.COMPLETED]},
+}
+
+def search_page(db: Session, filters: OrderSearchFilters, per_page: int, depth: int):
+    """Follow the cursor `depth` pages in and return that page"""
+    result = OrderService.search_orders(db, filters, per_page)
+    for _ in range(depth):
+        if not result.next_cursor:
+            break
+        result = OrderService.search_orders(db, filters, per_page, result.next_cursor)
+    return result
+
+def run(engine, label: str, per_page: int, repeat: int):
+    print(f"\n== {label}")
+    statements = []
+
+    def _capture(conn, cursor, statement, parameters, context, executemany):
+        statements.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", _capture)
+    with Session(engine) as db:
+        for (equality, sort), index_name in SEARCH_INDEXES.items():
+            filters = OrderSearchFilters(sort=sort, **EQUALITY[equality], **RANGES[sort])
+            name = f"{'+'.join(equality) or '-'} / {sort}"
+            first = search_page(db, filters, per_page, 0)
+            cursor = first.next_cursor
+            print_row(f"{name} first page", measure(lambda: OrderService.search_orders(db, filters, per_page), repeat=repeat, warmup=2),
+                      f"{len(first.orders)} rows")
+            if cursor:
+                print_row(f"{name} next page", measure(lambda: OrderService.search_orders(db, filters, per_page, cursor), repeat=repeat, warmup=2))
+            statements.clear()
+            OrderService.search_orders(db, filters, per_page)
+            statement, parameters = statements[-1]
+            plan = " | ".join(row[-1] for row in db.connection().exec_driver_sql("EXPLAIN QUERY PLAN " + statement, parameters))
+            print(f"    expected index {index_name}; plan: {plan}")
+    event.remove(engine, "before_cursor_execute", _capture)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=10_000)
+    parser.add_argument("--orders", type=int, default=2_000_000)
+    parser.add_argument("--per-page", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--skip-before", action="store_true", help="only measure with the search indexes in place")
+    args = parser.parse_args()
+
+    engine = make_engine()
+    print(f"Seeding {args.users} users and {args.orders} orders...")
+    seed(engine, users=args.users, orders=args.orders, tokens=0)
+
+    if not args.skip_before:
+        with engine.begin() as conn:
+            for index in SEARCH_ONLY_INDEXES:
+                index.drop(conn)
+            conn.execute(text("ANALYZE"))
+        run(engine, "before (without migration d4a7c3e1f820)", args.per_page, max(args.repeat // 4, 1))
+        with engine.begin() as conn:
+            for index in SEARCH_ONLY_INDEXES:
+                index.create(conn)
+
+    with engine.begin() as conn:
+        conn.execute(text("ANALYZE"))
+    run(engine, "after (migration d4a7c3e1f820)", args.per_page, args.repeat)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+# benchmarks/bench_serialization.py
+
+"""
+Serialisation cost per OrderListResponse / UserListResponse page: FastAPI's
+default response_model path against the single-pass ModelJSONResponse.
+
+    python -m benchmarks.bench_serialization
+"""
+
+import argparse
+import json
+from datetime import datetime, timedelta
+from decimal import Decimal
+from fastapi.encoders import jsonable_encoder
+from pydantic import TypeAdapter
+from app.responses import ModelJSONResponse
+from app.validators import OrderListResponse, OrderResponse, OrderStatus, UserListResponse, UserResponse, RoleResponse
+from benchmarks.common import measure, print_row
+
+def order_page(size: int) -> OrderListResponse:
+    now = datetime(2025, 6, 1, 12, 0, 0)
+    orders = [
+        OrderResponse(order_id=i, order_code=f"ORD-{i:012d}", user_id=i % 50 + 1, order_date=now + timedelta(minutes=i),
+                      total_amount=Decimal("123.45") + i, status=list(OrderStatus)[i % 4], created_at=now, updated_at=now)
+        for i in range(size)
+    ]
+    return OrderListResponse(orders=orders, total=1_000_000, page=1, per_page=size)
+
+def user_page(size: int) -> UserListResponse:
+    now = datetime(2025, 6, 1, 12, 0, 0)
+    role = RoleResponse(role_id=2, name="Customer", key="customer", description="Limited access", created_at=now)
+    users = [
+        UserResponse(user_id=i, username=f"user{i}", email=f"user{i}@example.com", role_id=2, created_at=now, role=role)
+        for i in range(size)
+    ]
+    return UserListResponse(users=users, total=1_000_000, page=1, per_page=size)
+
+def fastapi_default(adapter: TypeAdapter, model) -> bytes:
+    """What FastAPI does with a returned model: validate, dump, encode, json.dumps"""
+    value = adapter.validate_python(model, from_attributes=True)
+    content = jsonable_encoder(adapter.dump_python(value, mode="json"))
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")).encode("utf-8")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=300)
+    args = parser.parse_args()
+
+    for name, build, model_type in (("OrderListResponse", order_page, OrderListResponse), ("UserListResponse", user_page, UserListResponse)):
+        adapter = TypeAdapter(model_type)
+        print(f"\n== {name}")
+        for size in (10, 100, 1000):
+            page = build(size)
+            assert json.loads(fastapi_default(adapter, page)) == json.loads(ModelJSONResponse(page).body)
+            default = measure(lambda: fastapi_default(adapter, page), repeat=args.repeat)
+            fast = measure(lambda: ModelJSONResponse(page), repeat=args.repeat)
+            print_row(f"page size {size:>4} response_model", default)
+            print_row(f"page size {size:>4} ModelJSONResponse", fast, f"{default['mean'] / fast['mean']:.1f}x faster")
+
+if __name__ == "__main__":
+    main()
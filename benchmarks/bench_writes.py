@@ -0,0 +1,68 @@
+# benchmarks/bench_writes.py
+
+"""
+Round trips and latency of the single-statement write path (FAST_WRITES)
+against the SELECT, mutate, COMMIT, refresh path.
+
+    python -m benchmarks.bench_writes --repeat 2000
+"""
+
+import argparse
+import itertools
+from decimal import Decimal
+from sqlalchemy import event
+from sqlalchemy.orm import sessionmaker
+from app.services import order_service, user_service, OrderService, UserService
+from app.validators import OrderStatus, OrderUpdate, UserUpdate
+from benchmarks.common import make_engine, seed, measure, print_row
+
+def round_trips(engine, func) -> int:
+    """Statements plus COMMITs issued by one call"""
+    counter = {"trips": 0}
+
+    def _count(*args):
+        counter["trips"] += 1
+
+    event.listen(engine, "before_cursor_execute", _count)
+    event.listen(engine, "commit", _count)
+    try:
+        func()
+    finally:
+        event.remove(engine, "before_cursor_execute", _count)
+        event.remove(engine, "commit", _count)
+    return counter["trips"]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--orders", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=1000)
+    args = parser.parse_args()
+
+    engine = make_engine()
+    seed(engine, users=1000, orders=args.orders)
+    Session = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    statuses = itertools.cycle(list(OrderStatus))
+    order_ids = itertools.cycle(range(1, args.orders + 1, 7))
+    user_ids = itertools.cycle(range(1, 1001))
+    renames = itertools.count()
+
+    operations = {
+        "update_order_status": lambda db: OrderService.update_order_status(db, next(order_ids), next(statuses)),
+        "update_order": lambda db: OrderService.update_order(db, next(order_ids), OrderUpdate(total_amount=Decimal("19.99"))),
+        "update_user": lambda db: UserService.update_user(db, next(user_ids), UserUpdate(username=f"renamed{next(renames)}")),
+    }
+
+    for fast in (False, True):
+        order_service.FAST_WRITES = user_service.FAST_WRITES = fast
+        print(f"\n== {'fast single-statement path' if fast else 'select / mutate / commit / refresh'}")
+        for name, operation in operations.items():
+            db = Session()
+            try:
+                trips = round_trips(engine, lambda: operation(db))
+                stats = measure(lambda: operation(db), repeat=args.repeat)
+            finally:
+                db.close()
+            print_row(name, stats, f"round trips {trips}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+# benchmarks/common.py
+
+"""
+Shared helpers for the benchmark scripts.
+
+Benchmarks run against a throwaway SQLite file seeded with synthetic users and
+orders, so they can be run anywhere with `python -m benchmarks.<name>` from
+the project root.
+"""
+
+import os
+import random
+import statistics
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from decimal import Decimal
+from sqlalchemy import create_engine, event, insert
+from app.config.database import Base
+from app.database.models import Role, User, Order, AuthenticateToken
+from app.validators import OrderStatus
+
+BENCH_DB_PATH = os.getenv("BENCH_DB_PATH", "/tmp/orders_bench.db")
+
+def make_engine(path: str = BENCH_DB_PATH, fresh: bool = True):
+    """Create a SQLite engine with the full schema"""
+    if fresh and os.path.exists(path):
+        os.remove(path)
+    engine = create_engine(f"sqlite:///{path}")
+
+    @event.listens_for(engine, "connect")
+    def _pragmas(dbapi_connection, connection_record):
+        # Keep fsync out of the numbers, benchmarks compare query work not disks
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=OFF")
+        cursor.close()
+
+    Base.metadata.create_all(engine)
+    return engine
+
+def seed(engine, users: int = 1000, orders: int = 100_000, tokens: int = 5000, batch_size: int = 20_000, rng_seed: int = 42):
+    """Insert synthetic roles, users, tokens and orders spread over the last year"""
+    rng = random.Random(rng_seed)
+    statuses = list(OrderStatus)
+    start = datetime(2025, 1, 1)
+    with engine.begin() as conn:
+        conn.execute(insert(Role), [{"role_id": 1, "name": "Customer", "key": "customer", "description": "Benchmark role"}])
+        conn.execute(insert(User), [
+            {"user_id": i, "username": f"user{i}", "email": f"user{i}@example.com", "hashed_password": "x", "role_id": 1}
+            for i in range(1, users + 1)
+        ])
+        if tokens:
+            conn.execute(insert(AuthenticateToken), [
+                {"user_id": rng.randint(1, users), "access_token": "a", "access_token_expires_at": start,
+                 "refresh_token": "r", "refresh_token_expires_at": start}
+                for _ in range(tokens)
+            ])
+        for offset in range(0, orders, batch_size):
+            rows = []
+            for order_id in range(offset + 1, min(offset + batch_size, orders) + 1):
+                created_at = start + timedelta(seconds=order_id * 31_536_000 // orders)
+                rows.append({
+                    "order_id": order_id,
+                    "order_code": f"ORD-{order_id:012d}",
+                    "user_id": rng.randint(1, users),
+                    "order_date": created_at,
+                    "total_amount": Decimal(rng.randint(100, 100_000)) / 100,
+                    "status": rng.choice(statuses),
+                    "created_at": created_at,
+                    "updated_at": created_at,
+                })
+            conn.execute(insert(Order), rows)
+
+def measure(func, repeat: int = 200, warmup: int = 10) -> dict:
+    """Run func repeatedly and return latency percentiles in milliseconds"""
+    for _ in range(warmup):
+        func()
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - started) * 1000)
+    samples.sort()
+    return {
+        "mean": statistics.fmean(samples),
+        "p50": samples[len(samples) // 2],
+        "p99": samples[min(len(samples) - 1, int(len(samples) * 0.99))],
+    }
+
+@contextmanager
+def count_statements(engine):
+    """Count SQL statements executed on an engine inside the block"""
+    counter = {"statements": 0}
+
+    def _count(*args):
+        counter["statements"] += 1
+
+    event.listen(engine, "before_cursor_execute", _count)
+    try:
+        yield counter
+    finally:
+        event.remove(engine, "before_cursor_execute", _count)
+
+def print_row(label: str, stats: dict, extra: str = ""):
+    print(f"{label:<42} mean {stats['mean']:8.3f} ms  p50 {stats['p50']:8.3f} ms  p99 {stats['p99']:8.3f} ms  {extra}")
@@ -1,26 +1,66 @@
 # main.py
 
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
+from fastapi.routing import APIRoute
+from app.config.database import ASYNC_ROUTES
+from app.hashing import password_hasher
+from app.middleware import ReadYourWritesMiddleware
+from app.metrics import METRICS_ENABLED, MetricsMiddleware
+from app.query_stats import QUERY_STATS_ENABLED, QueryStatsMiddleware
 from app.routers import (
     ping_router, 
     users_router, 
     orders_router,
     roles_router,
-    permissions_router
+    permissions_router,
+    internal_router,
+    metrics_router,
+    async_users_router,
+    async_orders_router
 )
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    # Stop the bcrypt worker processes, started on the first hash, with the server
+    password_hasher.shutdown()
+
 app = FastAPI(
     title="User Order API",
     description="A RESTful API for managing users and orders with Role-Based Access Control",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
+app.add_middleware(ReadYourWritesMiddleware)
+if QUERY_STATS_ENABLED:
+    app.add_middleware(QueryStatsMiddleware)
+# Added last so it is outermost and times the whole stack
+if METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+
 # Register all routers
+if ASYNC_ROUTES:
+    # First, so the async handlers win over the sync routes they replace
+    app.include_router(async_users_router)
+    app.include_router(async_orders_router)
 app.include_router(ping_router)
 app.include_router(users_router)
 app.include_router(orders_router)
 app.include_router(roles_router)
 app.include_router(permissions_router)
+app.include_router(internal_router)
+app.include_router(metrics_router)
 
+def hide_shadowed_routes(routes):
+    """Leave routes that an earlier route with the same path and method always wins over out of the OpenAPI schema"""
+    seen = set()
+    for route in routes:
+        if isinstance(route, APIRoute):
+            keys = {(route.path_format, method) for method in route.methods}
+            if keys <= seen:
+                route.include_in_schema = False
+            seen |= keys
 
-
+hide_shadowed_routes(app.routes)
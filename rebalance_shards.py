@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+Shard Rebalancing Script
+
+Manages the user/order shards configured with SHARD_DATABASE_URLS (see
+app/config/sharding.py):
+
+    python rebalance_shards.py init                 # create the sharded tables on every shard
+    python rebalance_shards.py where USER_ID        # show which shard holds a user
+    python rebalance_shards.py move USER_ID SHARD   # move one user's rows to another shard
+
+A move runs while the API keeps serving the user. The user is first marked
+as moving in user_shards; once every worker has reloaded its remap table,
+writes for that user get 503 with Retry-After while reads carry on from the
+old shard. The user, their orders and their order summary are then copied
+to the target in one transaction, user_shards is pointed at the target, and
+after another reload period the user is writable again and the rows are
+deleted from the old shard.
+The write pause lasts about twice SHARD_DIRECTORY_TTL_SECONDS plus the copy.
+"""
+
+import argparse
+import sys
+import time
+from sqlalchemy import delete, insert, inspect, select, update
+from sqlalchemy.schema import CreateIndex, CreateTable
+from app.config.database import shard_router
+from app.config.sharding import SHARDED_TABLES, SHARD_DIRECTORY_TTL_SECONDS
+from app.database.models import User, Order, UserShard, UserOrderStats
+
+# Orders copied per INSERT during a move
+COPY_BATCH_SIZE = 1000
+
+users = User.__table__
+orders = Order.__table__
+user_order_stats = UserOrderStats.__table__
+user_shards = UserShard.__table__
+
+def init_shards():
+    """Create the users, orders and user_order_stats tables, with their indexes, on every shard that lacks them"""
+    for shard_id, engine in shard_router.engines.items():
+        with engine.begin() as connection:
+            existing = inspect(connection)
+            for table in (users, orders, user_order_stats):
+                if existing.has_table(table.name):
+                    print(f"Shard {shard_id}: {table.name} already exists, skipping...")
+                    continue
+                # users.role_id points at roles on the global database, which the shard cannot check
+                local_keys = [key for key in table.foreign_key_constraints if key.referred_table.name in SHARDED_TABLES]
+                connection.execute(CreateTable(table, include_foreign_key_constraints=local_keys))
+                for index in table.indexes:
+                    connection.execute(CreateIndex(index))
+                print(f"Shard {shard_id}: created {table.name}.")
+
+def current_shard(user_id: int) -> str:
+    """Where a user lives according to the database, not a worker's cached copy"""
+    with shard_router.global_engine.connect() as connection:
+        shard_id = connection.execute(select(user_shards.c.shard).where(user_shards.c.user_id == user_id)).scalar()
+    return shard_id or shard_router.ring.shard_for(user_id)
+
+def set_placement(user_id: int, shard_id: str, moving: bool):
+    """Record a user's shard in user_shards, dropping the row when it says no more than the hash ring does"""
+    with shard_router.global_engine.begin() as connection:
+        if shard_id == shard_router.ring.shard_for(user_id) and not moving:
+            connection.execute(delete(user_shards).where(user_shards.c.user_id == user_id))
+            return
+        values = {"shard": shard_id, "moving": moving}
+        if not connection.execute(update(user_shards).where(user_shards.c.user_id == user_id).values(**values)).rowcount:
+            connection.execute(insert(user_shards).values(user_id=user_id, **values))
+
+def copy_user(user_id: int, source: str, target: str) -> int:
+    """Copy a user, their orders and their order summary from source to target in one transaction, returning the number of orders"""
+    with shard_router.engines[source].connect() as source_connection, shard_router.engines[target].begin() as target_connection:
+        user_row = source_connection.execute(select(users).where(users.c.user_id == user_id)).mappings().first()
+        stats_row = source_connection.execute(select(user_order_stats).where(user_order_stats.c.user_id == user_id)).mappings().first()
+        # Leftovers of an interrupted move
+        for table in (user_order_stats, orders, users):
+            target_connection.execute(delete(table).where(table.c.user_id == user_id))
+        target_connection.execute(insert(users), [dict(user_row)])
+        if stats_row is not None:
+            target_connection.execute(insert(user_order_stats), [dict(stats_row)])
+        copied = 0
+        result = source_connection.execute(
+            select(orders).where(orders.c.user_id == user_id).order_by(orders.c.order_id).execution_options(yield_per=COPY_BATCH_SIZE)
+        )
+        for batch in result.mappings().partitions():
+            target_connection.execute(insert(orders), [dict(row) for row in batch])
+            copied += len(batch)
+    return copied
+
+def delete_user_rows(user_id: int, shard_id: str):
+    with shard_router.engines[shard_id].begin() as connection:
+        for table in (user_order_stats, orders, users):
+            connection.execute(delete(table).where(table.c.user_id == user_id))
+
+def move_user(user_id: int, target: str, settle_seconds: float):
+    """Move one user's rows to `target` while the API keeps running"""
+    if target not in shard_router.engines:
+        print(f"Unknown shard {target}, configured shards: {', '.join(shard_router.engines)}")
+        sys.exit(1)
+    source = current_shard(user_id)
+    if source == target:
+        print(f"User {user_id} is already on shard {target}.")
+        return
+    with shard_router.engines[source].connect() as connection:
+        if connection.execute(select(users.c.user_id).where(users.c.user_id == user_id)).first() is None:
+            print(f"User {user_id} not found on shard {source}.")
+            sys.exit(1)
+
+    print(f"Moving user {user_id} from shard {source} to shard {target}...")
+    set_placement(user_id, source, moving=True)
+    print(f"Writes paused, waiting {settle_seconds}s for every worker to notice...")
+    time.sleep(settle_seconds)
+    try:
+        copied = copy_user(user_id, source, target)
+    except Exception:
+        set_placement(user_id, source, moving=False)
+        print("Copy failed, the user stays on the old shard and is writable again.")
+        raise
+    print(f"Copied the user and {copied} orders.")
+
+    set_placement(user_id, target, moving=True)
+    print(f"Switched to shard {target}, waiting {settle_seconds}s before resuming writes...")
+    time.sleep(settle_seconds)
+    set_placement(user_id, target, moving=False)
+    delete_user_rows(user_id, source)
+    print(f"Done, removed the old rows from shard {source}.")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("init", help="create the sharded tables on every shard")
+    where = commands.add_parser("where", help="show which shard holds a user")
+    where.add_argument("user_id", type=int)
+    move = commands.add_parser("move", help="move one user's rows to another shard")
+    move.add_argument("user_id", type=int)
+    move.add_argument("shard")
+    move.add_argument("--settle-seconds", type=float, default=SHARD_DIRECTORY_TTL_SECONDS + 1,
+                      help="how long workers need to reload user_shards (default: SHARD_DIRECTORY_TTL_SECONDS + 1)")
+    args = parser.parse_args()
+
+    if shard_router is None:
+        print("Sharding is not configured, set SHARD_DATABASE_URLS first.")
+        sys.exit(1)
+
+    if args.command == "init":
+        init_shards()
+    elif args.command == "where":
+        print(f"User {args.user_id} is on shard {current_shard(args.user_id)} "
+              f"(hash ring shard {shard_router.ring.shard_for(args.user_id)}).")
+    else:
+        move_user(args.user_id, args.shard, args.settle_seconds)
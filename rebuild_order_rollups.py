@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Order Rollups Rebuild Script
+
+Recomputes order_rollups (see app/services/order_rollup_service.py) from the
+orders table, e.g. right after the migration that adds it:
+
+    python rebuild_order_rollups.py                                   # every order
+    python rebuild_order_rollups.py --from 2026-01-01 --to 2026-02-01  # whole days in the range
+
+Orders are streamed from the primary database, or from every shard when
+SHARD_DATABASE_URLS is set, and summed per hour in memory. The rollups and
+pending deltas of the covered days are then replaced in one transaction.
+Order writes committing while the orders are read may be counted twice or
+not at all, so run it while orders are not being written.
+"""
+
+import argparse
+from collections import defaultdict
+from datetime import datetime
+from decimal import Decimal
+from sqlalchemy import delete, insert, select
+from app.config.database import engine, shard_router
+from app.database.models import Order, OrderRollup, OrderRollupDelta
+from app.services.order_rollup_service import bucket_start
+from app.validators import RollupGranularity
+
+# Orders fetched per round trip while streaming
+STREAM_BATCH_SIZE = 10000
+
+rollups_table = OrderRollup.__table__
+deltas_table = OrderRollupDelta.__table__
+
+def hourly_sums(start: datetime = None, end: datetime = None) -> dict:
+    """{(hour, status): [count, total]} over the orders with order_date in [start, end)"""
+    sums = defaultdict(lambda: [0, Decimal(0)])
+    stmt = select(Order.order_date, Order.status, Order.total_amount).where(Order.order_date.is_not(None))
+    if start is not None:
+        stmt = stmt.where(Order.order_date >= start)
+    if end is not None:
+        stmt = stmt.where(Order.order_date < end)
+    databases = shard_router.engines if shard_router else {"primary": engine}
+    for name, db_engine in databases.items():
+        scanned = 0
+        with db_engine.connect() as connection:
+            for batch in connection.execute(stmt.execution_options(yield_per=STREAM_BATCH_SIZE)).partitions():
+                for order_date, order_status, amount in batch:
+                    figures = sums[(bucket_start(order_date, RollupGranularity.HOUR), order_status)]
+                    figures[0] += 1
+                    figures[1] += amount
+                scanned += len(batch)
+        print(f"[{name}] read {scanned} orders.")
+    return sums
+
+def rebuild_order_rollups(start: datetime = None, end: datetime = None) -> int:
+    """Replace the rollups of the days in [start, end) (all of them by default), returning the number of rows written"""
+    sums = hourly_sums(start, end)
+    rows = []
+    days = defaultdict(lambda: [0, Decimal(0)])
+    for (hour, order_status), (count, amount) in sums.items():
+        rows.append({"granularity": RollupGranularity.HOUR.value, "bucket_start": hour, "status": order_status,
+                     "order_count": count, "total_amount": amount})
+        figures = days[(bucket_start(hour, RollupGranularity.DAY), order_status)]
+        figures[0] += count
+        figures[1] += amount
+    rows += [{"granularity": RollupGranularity.DAY.value, "bucket_start": day, "status": order_status,
+              "order_count": count, "total_amount": amount} for (day, order_status), (count, amount) in days.items()]
+
+    with engine.begin() as connection:
+        for table in (rollups_table, deltas_table):
+            stmt = delete(table)
+            if start is not None:
+                stmt = stmt.where(table.c.bucket_start >= start)
+            if end is not None:
+                stmt = stmt.where(table.c.bucket_start < end)
+            connection.execute(stmt)
+        if rows:
+            connection.execute(insert(rollups_table), rows)
+    return len(rows)
+
+def day(value: str) -> datetime:
+    return datetime.strptime(value, "%Y-%m-%d")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--from", dest="start", type=day, help="first day to rebuild, YYYY-MM-DD (default: the earliest order)")
+    parser.add_argument("--to", dest="end", type=day, help="day after the last one to rebuild, YYYY-MM-DD (default: the latest order)")
+    args = parser.parse_args()
+
+    if args.start and args.end and args.end <= args.start:
+        parser.error("--to must be after --from")
+    written = rebuild_order_rollups(args.start, args.end)
+    print(f"Done, wrote {written} rollup rows.")
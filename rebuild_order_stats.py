@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Order Stats Rebuild Script
+
+Recomputes user_order_stats (see app/services/order_stats_service.py) from the
+orders table and reports every user whose summary row has drifted:
+
+    python rebuild_order_stats.py           # report drift only
+    python rebuild_order_stats.py --fix     # also rewrite the drifted rows
+
+Users are checked in chunks of --chunk-size by user_id, on the primary
+database or on every shard when SHARD_DATABASE_URLS is set, so it can run
+against a live system. A row being fixed is locked while it is recomputed,
+so order writes arriving meanwhile are applied on top of the fixed row.
+"""
+
+import argparse
+from decimal import Decimal
+from sqlalchemy import delete, insert, select
+from app.config.database import engine, shard_router
+from app.database.models import User, Order, UserOrderStats
+from app.services.order_stats_service import OrderStatsService, STATUS_COLUMNS
+
+# Columns compared between the stored row and the recomputed one
+COMPARED_COLUMNS = ("order_count", "total_spent", "last_order_date", *STATUS_COLUMNS.values())
+
+# Users checked per round trip
+DEFAULT_CHUNK_SIZE = 1000
+
+stats_table = UserOrderStats.__table__
+
+def expected_rows(connection, user_ids):
+    """The summary each user should have, computed from their orders"""
+    computed = connection.execute(OrderStatsService.aggregates().where(Order.user_id.in_(user_ids))).mappings()
+    rows = {user_id: {"order_count": 0, "total_spent": Decimal("0.00"), "last_order_date": None,
+                      **{column: 0 for column in STATUS_COLUMNS.values()}} for user_id in user_ids}
+    for row in computed:
+        rows[row["user_id"]].update({column: row[column] for column in COMPARED_COLUMNS})
+    return rows
+
+def stored_rows(connection, user_ids, lock: bool = False):
+    stmt = select(stats_table).where(stats_table.c.user_id.in_(user_ids))
+    if lock:
+        stmt = stmt.with_for_update()
+    return {row["user_id"]: row for row in connection.execute(stmt).mappings()}
+
+def drifted(expected, stored):
+    """The columns whose stored value differs from the expected one, None when there is no stored row"""
+    if stored is None:
+        return None
+    return [column for column in COMPARED_COLUMNS if stored[column] != expected[column]]
+
+def fix_rows(connection, user_ids):
+    """Rewrite the given users' rows from their orders, with the rows locked"""
+    stored_rows(connection, user_ids, lock=True)
+    expected = expected_rows(connection, user_ids)
+    connection.execute(delete(stats_table).where(stats_table.c.user_id.in_(user_ids)))
+    connection.execute(insert(stats_table), [{"user_id": user_id, **row} for user_id, row in expected.items()])
+
+def check_database(name: str, db_engine, chunk_size: int, fix: bool) -> int:
+    """Check every user on one database, returning the number of drifted rows"""
+    found = 0
+    last_id = 0
+    while True:
+        with db_engine.connect() as connection:
+            user_ids = connection.execute(
+                select(User.user_id).where(User.user_id > last_id).order_by(User.user_id).limit(chunk_size)
+            ).scalars().all()
+            if not user_ids:
+                break
+            expected = expected_rows(connection, user_ids)
+            stored = stored_rows(connection, user_ids)
+        last_id = user_ids[-1]
+
+        bad = []
+        for user_id in user_ids:
+            stored_row = stored.get(user_id)
+            columns = drifted(expected[user_id], stored_row)
+            if columns is None:
+                # Created lazily on the user's next order write, only wrong if they already have orders
+                if expected[user_id]["order_count"]:
+                    print(f"[{name}] user {user_id}: missing summary row ({expected[user_id]['order_count']} orders)")
+                    bad.append(user_id)
+            elif columns:
+                details = ", ".join(f"{column} {stored_row[column]} != {expected[user_id][column]}" for column in columns)
+                print(f"[{name}] user {user_id}: {details}")
+                bad.append(user_id)
+
+        if bad and fix:
+            with db_engine.begin() as connection:
+                fix_rows(connection, bad)
+        found += len(bad)
+    return found
+
+def rebuild_order_stats(chunk_size: int, fix: bool) -> int:
+    databases = shard_router.engines if shard_router else {"primary": engine}
+    total = 0
+    for name, db_engine in databases.items():
+        print(f"Checking {name}...")
+        found = check_database(name, db_engine, chunk_size, fix)
+        print(f"[{name}] {found} drifted rows{', fixed' if fix and found else ''}.")
+        total += found
+    return total
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--fix", action="store_true", help="rewrite the drifted rows from the orders table")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help=f"users checked per query (default: {DEFAULT_CHUNK_SIZE})")
+    args = parser.parse_args()
+
+    drift = rebuild_order_stats(args.chunk_size, args.fix)
+    print(f"Done, {drift} drifted rows in total.")
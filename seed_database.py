@@ -84,6 +84,9 @@ def seed_database():
                     # Role-Permission Assignment Permissions
                     ('Assign Permission to Role', 'role_permission:assign', 'Assign permissions to roles'),
                     ('Remove Permission from Role', 'role_permission:remove', 'Remove permissions from roles'),
+                    
+                    # Operations Permissions
+                    ('Read Internals', 'internal:read', 'View the /internal pool, cache, replica and shard diagnostics'),
                 ]
                 
                 # Insert permissions without hard-coded IDs
@@ -115,7 +118,8 @@ def seed_database():
                         'order:read_own', 'order:update_own', 'order:delete_own', 'order:update_status',
                         'role:create', 'role:read', 'role:update', 'role:delete', 'role:list', 'role:read_permissions',
                         'permission:create', 'permission:read', 'permission:update', 'permission:delete', 'permission:list',
-                        'role_permission:assign', 'role_permission:remove'
+                        'role_permission:assign', 'role_permission:remove',
+                        'internal:read'
                     ]
                     
                     # Customer gets LIMITED permissions
@@ -0,0 +1,58 @@
+# tests/test_query_counts.py
+
+import pytest
+from sqlalchemy import event, text
+from sqlalchemy.engine import Engine
+
+USER_COUNT = 30
+
+@pytest.fixture(scope="module")
+def client(tmp_path_factory):
+    """App on a fresh SQLite database with one role and USER_COUNT users"""
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        # Read when the app modules are imported, so set before the first import
+        monkeypatch.setenv("DATABASE_URL", f"sqlite:///{tmp_path_factory.mktemp('db') / 'query_counts.db'}")
+
+        from fastapi.testclient import TestClient
+        from app.config.database import Base, engine
+        import app.database.models  # noqa: F401
+        from main import app
+
+        Base.metadata.create_all(engine)
+        with engine.begin() as connection:
+            connection.execute(text("INSERT INTO roles (name, key, description) VALUES ('Customer', 'customer', 'Limited access')"))
+            connection.execute(
+                text("INSERT INTO users (username, email, hashed_password, role_id) VALUES (:username, :email, 'x', 1)"),
+                [{"username": f"user{i}", "email": f"user{i}@example.com"} for i in range(USER_COUNT)],
+            )
+        with TestClient(app) as test_client:
+            yield test_client
+
+@pytest.fixture
+def statements(client):
+    """SQL statements the app runs during the test, on any of its engines"""
+    executed = []
+
+    def record(connection, cursor, statement, parameters, context, executemany):
+        executed.append(statement)
+
+    event.listen(Engine, "before_cursor_execute", record)
+    yield executed
+    event.remove(Engine, "before_cursor_execute", record)
+
+@pytest.mark.parametrize("per_page", [1, 5, 25])
+def test_list_users_query_count_is_independent_of_page_size(client, statements, per_page):
+    response = client.get(f"/users/?per_page={per_page}")
+    assert response.status_code == 200
+    body = response.json()
+    assert len(body["users"]) == per_page
+    assert body["total"] == USER_COUNT
+    assert all(user["role"]["key"] == "customer" for user in body["users"])
+    # One COUNT for the total and one SELECT joining the roles
+    assert len(statements) == 2
+
+def test_get_user_loads_role_in_same_query(client, statements):
+    response = client.get("/users/7")
+    assert response.status_code == 200
+    assert response.json()["role"]["key"] == "customer"
+    assert len(statements) == 1